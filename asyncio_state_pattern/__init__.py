@@ -1,15 +1,55 @@
+from .event import Event  # noqa: F401
 from .state import State  # noqa: F401
 from .state_machine import StateMachine, StateMachineError  # noqa: F401
+from .machine_pool import MachinePool  # noqa: F401
+from .sharding import HashRing, RuntimeStats, ShardedRuntime, WorkerStats  # noqa: F401
+from .deadlines import DeadlineOptions, DeadlinePolicy  # noqa: F401
+from .mailbox import OverflowOptions, OverflowPolicy  # noqa: F401
+from .metrics import Metrics, MetricsSink  # noqa: F401
+from .tracer import Tracer  # noqa: F401
+from .journal import Journal, read_journal, replay_journal  # noqa: F401
+from .snapshot import read_snapshots, write_snapshots  # noqa: F401
+from .timer_wheel import Timer, TimerWheel  # noqa: F401
 from .decorators import on_entry, on_exit, on_event  # noqa: F401
 from .logger import logger  # noqa: F401
 
 
 __all__ = [
+    # event
+    "Event",
     # state
     "State",
     # state_machine
     "StateMachine",
     "StateMachineError",
+    # machine_pool
+    "MachinePool",
+    # sharding
+    "HashRing",
+    "RuntimeStats",
+    "ShardedRuntime",
+    "WorkerStats",
+    # deadlines
+    "DeadlineOptions",
+    "DeadlinePolicy",
+    # mailbox
+    "OverflowOptions",
+    "OverflowPolicy",
+    # metrics
+    "Metrics",
+    "MetricsSink",
+    # tracer
+    "Tracer",
+    # journal
+    "Journal",
+    "read_journal",
+    "replay_journal",
+    # snapshot
+    "read_snapshots",
+    "write_snapshots",
+    # timer_wheel
+    "Timer",
+    "TimerWheel",
     # decorators
     "on_entry",
     "on_exit",
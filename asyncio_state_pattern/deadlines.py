@@ -0,0 +1,82 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple, Type
+
+from .state import State
+
+DEADLINE_KINDS = ("entry", "exit", "handler")
+"""The kinds of action that deadlines apply to."""
+
+
+class DeadlinePolicy(Enum):
+    """
+    What a state machine does after cancelling an action that missed its
+    deadline.
+    """
+
+    CONTINUE = "continue"
+    """
+    The transition or event dispatch carries on as if the action had returned.
+    An event whose handler was cancelled counts as consumed.
+    """
+
+    ERROR_STATE = "error_state"
+    """
+    As `CONTINUE`, then the machine transitions to `DeadlineOptions.error_state`
+    once the transition or event in progress is done.
+    """
+
+
+@dataclass(frozen=True)
+class DeadlineOptions:
+    entry: Optional[float] = None
+    """Seconds each entry action may take, unless its state declares its own."""
+
+    exit: Optional[float] = None
+    """Seconds each exit action may take, unless its state declares its own."""
+
+    handler: Optional[float] = None
+    """Seconds each event handler may take, unless its state declares its own."""
+
+    policy: DeadlinePolicy = DeadlinePolicy.CONTINUE
+    """What to do after an action is cancelled for missing its deadline."""
+
+    error_state: Optional[Type[State]] = None
+    """The state entered after a missed deadline with `DeadlinePolicy.ERROR_STATE`."""
+
+    def __post_init__(self) -> None:
+        for kind in DEADLINE_KINDS:
+            seconds = getattr(self, kind)
+            if seconds is not None and seconds <= 0:
+                raise ValueError(f"Arg `{kind}` - must be greater than 0")
+        if self.policy is DeadlinePolicy.ERROR_STATE and self.error_state is None:
+            raise ValueError("Arg `error_state` - must be set for ERROR_STATE")
+
+
+DeadlineTable = Dict[str, Tuple[Optional[float], ...]]
+"""
+The deadline of each kind of action of each state of a tree, keyed by kind
+and indexed by `StateNode.index`.
+"""
+
+
+def create_deadline_table(
+    state_classes: Any, options: Optional[DeadlineOptions]
+) -> Optional[DeadlineTable]:
+    """
+    Returns the deadlines of the given state classes, ordered by
+    `StateNode.index`, falling back to options for states that declare none.
+    Returns None if no action has a deadline.
+    """
+    table = {}
+    for i, kind in enumerate(DEADLINE_KINDS):
+        default = getattr(options, kind) if options is not None else None
+        table[kind] = tuple(
+            cls._deadlines[i]
+            if cls._deadlines is not None and cls._deadlines[i] is not None
+            else default
+            for cls in state_classes
+        )
+    if all(seconds is None for deadlines in table.values() for seconds in deadlines):
+        return None
+    return table
@@ -1,3 +1,6 @@
+import sys
+from typing import Hashable
+
 from .constants import entry_action_attr, exit_action_attr, event_action_attr
 
 
@@ -11,12 +14,16 @@ def on_exit(method):
     return method
 
 
-def on_event(event: str):
-    def decorator(method):
-        def wrapper(*args, **kwargs):
-            return method(*args, **kwargs)
+def on_event(event: Hashable):
+    """
+    Declares a method as a handler for an event id, or for a subclass of
+    `Event`. Handlers for an `Event` subclass are passed the event instance.
+    """
+    if isinstance(event, str):
+        event = sys.intern(event)
 
-        setattr(wrapper, event_action_attr, event)
-        return wrapper
+    def decorator(method):
+        setattr(method, event_action_attr, event)
+        return method
 
     return decorator
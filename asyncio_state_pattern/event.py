@@ -0,0 +1,62 @@
+from itertools import count
+from typing import Any, ClassVar, Tuple
+
+_event_ids = count()
+
+
+class Event:
+    """
+    Base class for typed events. Each subclass is assigned an integer
+    `event_id` when it is declared, which state machines use to look up the
+    subclass's handlers by index. Handlers declared with `on_event` for the
+    subclass are passed the event, so an event can carry a payload in the
+    attributes named by its `__slots__`:
+
+        class Brew(Event):
+            __slots__ = ("strength",)
+
+        machine.post_event(Brew(strength=3))
+
+    Events are matched by their exact type; handlers for a base event class
+    are not called for its subclasses.
+    """
+
+    __slots__ = ()
+
+    event_id: ClassVar[int] = -1
+    """The dispatch id of the event class, unique within the process."""
+
+    _fields: ClassVar[Tuple[str, ...]] = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.event_id = next(_event_ids)
+        fields = []
+        for klass in reversed(cls.__mro__):
+            slots = klass.__dict__.get("__slots__", ())
+            fields.extend((slots,) if isinstance(slots, str) else slots)
+        cls._fields = tuple(f for f in fields if not f.startswith("__"))
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        if len(args) > len(self._fields):
+            raise TypeError(
+                f"{self.__class__.__name__} takes at most {len(self._fields)}"
+                f" positional arguments but {len(args)} were given"
+            )
+        for name, value in zip(self._fields, args):
+            setattr(self, name, value)
+        for name, value in kwargs.items():
+            if name not in self._fields:
+                raise TypeError(
+                    f"{self.__class__.__name__} got an unexpected keyword argument '{name}'"
+                )
+            setattr(self, name, value)
+        missing = [name for name in self._fields if not hasattr(self, name)]
+        if missing:
+            raise TypeError(
+                f"{self.__class__.__name__} missing arguments: {', '.join(missing)}"
+            )
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{self.__class__.__name__}({fields})"
@@ -0,0 +1,68 @@
+import os
+import pickle
+import struct
+from typing import Any, BinaryIO, Iterator
+
+_header = struct.Struct("<4sB")
+_frame_header = struct.Struct("<I")
+
+HEADER_SIZE = _header.size
+"""The size of the magic bytes and version at the start of a file."""
+
+
+def encode_header(magic: bytes, version: int) -> bytes:
+    return _header.pack(magic, version)
+
+
+def check_header(header: bytes, magic: bytes, version: int, kind: str) -> None:
+    """Raises ValueError if header is not that of a file of the given kind."""
+    if len(header) < _header.size or header[:4] != magic:
+        raise ValueError(f"Not a {kind}")
+    if header[4] != version:
+        raise ValueError(f"Unsupported {kind} version {header[4]}")
+
+
+def encode_frame(obj: Any) -> bytes:
+    """Returns obj pickled and prefixed with its length."""
+    frame = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    return _frame_header.pack(len(frame)) + frame
+
+
+def read_frames(file: BinaryIO, allow_truncated: bool = False) -> Iterator[Any]:
+    """
+    Yields the objects of each frame written with `encode_frame`, until the
+    end of the file. A frame cut short by the end of the file raises
+    ValueError, or ends the file if `allow_truncated` is True.
+    """
+    while True:
+        header = file.read(_frame_header.size)
+        if not header:
+            return
+        if len(header) == _frame_header.size:
+            (size,) = _frame_header.unpack(header)
+            frame = file.read(size)
+            if len(frame) == size:
+                yield pickle.loads(frame)
+                continue
+        if allow_truncated:
+            return
+        raise ValueError("File is truncated")
+
+
+def find_frames_end(file: BinaryIO) -> int:
+    """
+    Returns the offset after the last complete frame, reading from the
+    current position of file, without decoding the frames.
+    """
+    end = file.tell()
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(end)
+    while True:
+        header = file.read(_frame_header.size)
+        if len(header) < _frame_header.size:
+            return end
+        (frame_size,) = _frame_header.unpack(header)
+        if end + _frame_header.size + frame_size > size:
+            return end
+        end = file.seek(frame_size, os.SEEK_CUR)
@@ -0,0 +1,244 @@
+import asyncio
+import os
+import threading
+from collections import deque
+from typing import Any, BinaryIO, Deque, Hashable, Iterator, List, Optional, Tuple
+
+from .framing import (
+    HEADER_SIZE,
+    check_header,
+    encode_frame,
+    encode_header,
+    find_frames_end,
+    read_frames,
+)
+from .logger import logger as asp_logger
+
+MAGIC = b"ASPJ"
+"""The first bytes of a journal file."""
+
+VERSION = 2
+"""The version of the journal format, stored after `MAGIC`."""
+
+_KIND = "state machine journal"
+
+
+class Journal:
+    """
+    An append-only log of the events processed by the state machines it is
+    attached to, for recovering their state with `replay_journal`.
+
+    Events are pickled as they are appended, so that changes made to them by
+    their handlers are not journaled, and buffered in memory to be written by
+    a background thread so that the event loop never waits on the file. The
+    thread writes everything appended since its last write at once, at most
+    every `flush_interval` seconds or once `max_batch_size` events are
+    buffered, and syncs the file to disk after each write if `fsync` is True.
+    Use `flush` to wait until the events appended so far have been written.
+    Once a write has failed, `append` and `flush` raise its error.
+
+    Events, and the keys of the machines that processed them, must be
+    picklable.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.01,
+        max_batch_size: int = 4096,
+        fsync: bool = True,
+    ) -> None:
+        if flush_interval < 0:
+            raise ValueError("Arg `flush_interval` - must not be negative")
+        if max_batch_size < 1:
+            raise ValueError("Arg `max_batch_size` - must be at least 1")
+
+        self._path = path
+        self._flush_interval = flush_interval
+        self._max_batch_size = max_batch_size
+        self._fsync = fsync
+        self._logger = asp_logger
+        self._file = _open_journal(path)
+        self._pending: Deque[bytes] = deque()
+        self._appended = 0
+        self._written = 0
+        self._wake = threading.Event()
+        self._flush_now = threading.Event()
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[int, asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(
+            target=self._run, name=f"Journal({path})", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def append(self, key: Optional[Hashable], event: Any) -> None:
+        """
+        Appends an event processed by the machine with the given key. Must be
+        called from one thread at a time, normally the event loop's. Raises
+        the error that stopped the journal from writing, if any.
+        """
+        if self._closed:
+            raise ValueError(f"Journal {self._path} is closed")
+        if self._error is not None:
+            raise self._error
+        frame = encode_frame((key, event))
+        # Appending to a deque is atomic, so the writer thread can take events
+        # from the other end without a lock
+        pending = self._pending
+        pending.append(frame)
+        self._appended += 1
+        if not self._wake.is_set():
+            self._wake.set()
+        if len(pending) >= self._max_batch_size:
+            self._flush_now.set()
+
+    async def flush(self) -> None:
+        """
+        Waits until the events appended so far have been written, and synced
+        to disk if `fsync` is True. Raises the error that stopped the journal
+        from writing, if any.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            if self._written >= self._appended:
+                return
+            future = loop.create_future()
+            self._waiters.append((self._appended, loop, future))
+        self._flush_now.set()
+        self._wake.set()
+        await future
+
+    def close(self) -> None:
+        """
+        Writes any buffered events and closes the file, blocking until done.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._flush_now.set()
+        self._wake.set()
+        self._thread.join()
+        self._file.close()
+
+    def _run(self) -> None:
+        pending = self._pending
+        while True:
+            if not self._closed:
+                self._wake.wait()
+                if self._flush_interval:
+                    # Wait for more events, unless woken to flush or close
+                    self._flush_now.wait(self._flush_interval)
+            self._wake.clear()
+            self._flush_now.clear()
+            batch = [pending.popleft() for _ in range(len(pending))]
+
+            if batch and self._error is None:
+                try:
+                    self._write(batch)
+                except BaseException as e:
+                    self._logger.exception(f"Journal: Failed to write {self._path}")
+                    with self._lock:
+                        self._error = e
+
+            with self._lock:
+                self._written += len(batch)
+                error = self._error
+                done = []
+                waiting = []
+                for waiter in self._waiters:
+                    if waiter[0] <= self._written or error is not None:
+                        done.append(waiter)
+                    else:
+                        waiting.append(waiter)
+                self._waiters = waiting
+            for _, loop, future in done:
+                try:
+                    loop.call_soon_threadsafe(_resolve, future, error)
+                except RuntimeError:
+                    # The waiter's loop was closed
+                    pass
+            if self._closed and not pending:
+                return
+
+    def _write(self, batch: List[bytes]) -> None:
+        self._file.write(b"".join(batch))
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+
+
+def read_journal(path: str) -> Iterator[Tuple[Optional[Hashable], Any]]:
+    """
+    Yields the key of the machine and the event of each entry of a journal,
+    in the order they were appended. An entry cut short by a crash while it
+    was being written ends the journal.
+
+    Journals are decoded with pickle, so must only be read from trusted
+    sources.
+    """
+    with open(path, "rb") as file:
+        check_header(file.read(HEADER_SIZE), MAGIC, VERSION, _KIND)
+        yield from read_frames(file, allow_truncated=True)
+
+
+async def replay_journal(path: str, machines: Any, run_actions: bool = False) -> int:
+    """
+    Replays the events of a journal into the machines with the keys they were
+    appended with, looked up with `machines[key]`, as by
+    `StateMachine.replay`. Returns the number of events replayed.
+    """
+    replaying = {}
+    count = 0
+    try:
+        for key, event in read_journal(path):
+            machine = machines[key]
+            if machine not in replaying:
+                replaying[machine] = None
+                await machine._begin_replay(run_actions)
+            await machine._process_event(event)
+            count += 1
+    finally:
+        for machine in replaying:
+            machine._end_replay()
+    return count
+
+
+def _open_journal(path: str) -> BinaryIO:
+    """
+    Opens a journal for appending, writing its header if it is new. An entry
+    cut short by a crash at the end of an existing journal is removed, so
+    that entries appended after it can be read.
+    """
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, "r+b") as existing:
+            check_header(existing.read(HEADER_SIZE), MAGIC, VERSION, _KIND)
+            end = find_frames_end(existing)
+            if end < os.path.getsize(path):
+                existing.truncate(end)
+        return open(path, "ab")
+
+    file = open(path, "ab")
+    file.write(encode_header(MAGIC, VERSION))
+    file.flush()
+    return file
+
+
+def _resolve(future: asyncio.Future, error: Optional[BaseException]) -> None:
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(None)
@@ -1,4 +1,4 @@
 import logging
 
 logger = logging.getLogger("asyncio_state_pattern")
-logging.basicConfig(level=logging.WARNING)
+logger.addHandler(logging.NullHandler())
@@ -0,0 +1,214 @@
+import asyncio
+from logging import Logger
+from typing import Any, BinaryIO, Callable, Dict, Hashable, Iterator, List, Optional, Set
+
+from .logger import logger as asp_logger
+from .journal import Journal
+from .mailbox import MailboxStats, OverflowOptions
+from .metrics import MetricsSink
+from .snapshot import read_snapshots, write_snapshots
+from .state_machine import StateMachine, StateMachineError
+from .threadsafe import ThreadsafeInbox
+from .tracer import Tracer
+
+
+class MachinePool:
+    """
+    Runs many state machines on a fixed number of dispatcher tasks.
+
+    Machines with pending events are added to a shared ready list, and each
+    dispatcher takes a machine from the list and drains a batch of its events
+    (see `StateMachine.max_batch_size`) before returning it to the back of
+    the list if events remain. A machine is only ever handled by one
+    dispatcher at a time, so its events are processed in order and each
+    event runs to completion before the next one starts.
+    """
+
+    def __init__(
+        self,
+        dispatchers: int = 1,
+        logger: Optional[Logger] = None,
+        overflow: Optional[OverflowOptions] = None,
+        metrics: Optional[MetricsSink] = None,
+        tracer: Optional[Tracer] = None,
+        journal: Optional[Journal] = None,
+    ):
+        if dispatchers < 1:
+            raise ValueError("Arg `dispatchers` - must be at least 1")
+
+        self._logger = logger or asp_logger
+        self._overflow = overflow
+        self._metrics = metrics
+        self._tracer = tracer
+        self._journal = journal
+        self._num_dispatchers = dispatchers
+        self._machines: Dict[Hashable, StateMachine] = {}
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._scheduled: Set[StateMachine] = set()
+        self._dispatchers: List[asyncio.Task] = []
+        self._inbox: Optional[ThreadsafeInbox] = None
+
+    def __len__(self) -> int:
+        return len(self._machines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._machines
+
+    def __getitem__(self, key: Hashable) -> StateMachine:
+        return self._machines[key]
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._machines)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._dispatchers)
+
+    @property
+    def event_queue_stats(self) -> MailboxStats:
+        """Returns the sum of the event queue stats of all machines."""
+        totals = dict.fromkeys(MailboxStats.__dataclass_fields__, 0)
+        for machine in self._machines.values():
+            stats = machine._event_queue.stats
+            for name in totals:
+                totals[name] += getattr(stats, name)
+        return MailboxStats(**totals)
+
+    def add(self, key: Hashable, machine: StateMachine) -> None:
+        """
+        Adds a machine to the pool. The machine is started by a dispatcher
+        before its first event is processed, if it has not been started
+        already. If the pool has overflow options, a metrics sink, a tracer or
+        a journal, they replace the machine's own, and the machine's events are
+        journaled with its key.
+        """
+        if key in self._machines:
+            raise ValueError(f"MachinePool: Key {key!r} already in use")
+        if machine._running:
+            raise StateMachineError(
+                f"MachinePool: {machine.name} must be stopped before being added"
+            )
+        if machine._scheduler:
+            raise StateMachineError(
+                f"MachinePool: {machine.name} is already added to a MachinePool"
+            )
+
+        if self._overflow:
+            machine._event_queue.configure_overflow(self._overflow, machine)
+        if self._metrics is not None:
+            machine.metrics = self._metrics
+        if self._tracer is not None:
+            machine.tracer = self._tracer
+        if self._journal is not None:
+            machine.journal = self._journal
+            machine.journal_key = key
+        machine._scheduler = self._schedule
+        if self._inbox is not None:
+            machine._inbox = self._inbox
+        self._machines[key] = machine
+        if not machine._event_queue.empty():
+            self._schedule(machine)
+
+    def remove(self, key: Hashable) -> StateMachine:
+        """
+        Removes a machine from the pool. Events still pending for the machine
+        remain in its queue.
+        """
+        machine = self._machines.pop(key)
+        machine._scheduler = None
+        return machine
+
+    def write_snapshots(self, file: BinaryIO, chunk_size: int = 4096) -> int:
+        """
+        Writes snapshots of all machines in the pool to a binary file, and
+        returns the number of machines written. See `write_snapshots`.
+        """
+        return write_snapshots(file, self._machines.items(), chunk_size)
+
+    def restore_snapshots(
+        self, file: BinaryIO, factory: Callable[[Hashable], StateMachine]
+    ) -> int:
+        """
+        Adds the machines of a file written by `write_snapshots`, created by
+        calling factory with their key and restored as by
+        `StateMachine.restore`. Returns the number of machines added.
+        """
+        count = 0
+        for key, machine in read_snapshots(file, factory):
+            self.add(key, machine)
+            count += 1
+        return count
+
+    async def queue_event(
+        self,
+        key: Hashable,
+        event: Any,
+        priority: int = 0,
+        coalesce_key: Optional[Hashable] = None,
+    ) -> None:
+        await self._machines[key].queue_event(event, priority, coalesce_key)
+
+    async def start(self) -> None:
+        if self._dispatchers:
+            raise StateMachineError("MachinePool: Already started")
+        loop = asyncio.get_running_loop()
+        self._inbox = ThreadsafeInbox.for_loop(loop)
+        for machine in self._machines.values():
+            machine._inbox = self._inbox
+        self._dispatchers = [
+            loop.create_task(self._dispatch_loop())
+            for _ in range(self._num_dispatchers)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Waits for all pending events to be processed and then stops the
+        dispatcher tasks.
+        """
+        if not self._dispatchers:
+            self._logger.warning("MachinePool: Already stopped")
+            return
+        await self._ready.join()
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+
+    def _schedule(self, machine: StateMachine) -> None:
+        """Adds machine to the ready list, unless it is already there."""
+        if machine in self._scheduled:
+            return
+        self._scheduled.add(machine)
+        self._ready.put_nowait(machine)
+
+    async def _dispatch_loop(self) -> None:
+        ready = self._ready
+        while True:
+            machine = await ready.get()
+            try:
+                await self._dispatch(machine)
+            except Exception:
+                self._logger.exception(
+                    f"MachinePool: Unhandled error processing {machine.name} events"
+                )
+            finally:
+                # The machine stays scheduled while it is being processed, so
+                # it is only re-added here if more events are pending
+                if machine._event_queue.empty() or not self._owns(machine):
+                    self._scheduled.discard(machine)
+                else:
+                    ready.put_nowait(machine)
+                ready.task_done()
+
+    def _owns(self, machine: StateMachine) -> bool:
+        return machine._scheduler == self._schedule
+
+    async def _dispatch(self, machine: StateMachine) -> None:
+        if not self._owns(machine):
+            # Removed from the pool after being scheduled
+            return
+        if not machine._state:
+            await machine.start()
+        queue = machine._event_queue
+        if not queue.empty():
+            await machine._drain_events(queue.get_nowait())
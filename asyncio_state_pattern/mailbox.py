@@ -0,0 +1,532 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+
+class OverflowPolicy(Enum):
+    """What a bounded mailbox does with an item put while it is full."""
+
+    BLOCK = "block"
+    """`put` waits for space; `put_nowait` raises `asyncio.QueueFull`."""
+
+    DROP_NEWEST = "drop_newest"
+    """The new item is discarded."""
+
+    DROP_OLDEST = "drop_oldest"
+    """The oldest item with the lowest priority is discarded to make space."""
+
+    REJECT = "reject"
+    """`put` and `put_nowait` raise `asyncio.QueueFull`."""
+
+    SPILL = "spill"
+    """
+    The item is held in an overflow buffer of `spill_size` items and moved into
+    the mailbox when space is available. Items put while the overflow buffer is
+    also full are rejected.
+    """
+
+
+@dataclass(frozen=True)
+class OverflowOptions:
+    policy: OverflowPolicy = OverflowPolicy.BLOCK
+    """What to do with items put while the mailbox is full."""
+
+    spill_size: int = 0
+    """Size of the overflow buffer used by `OverflowPolicy.SPILL`."""
+
+    high_watermark: Optional[int] = None
+    """Queue size at which `on_watermark` is called with True."""
+
+    low_watermark: Optional[int] = None
+    """
+    Queue size at which `on_watermark` is called with False, after the high
+    watermark was reached. Defaults to half of the high watermark.
+    """
+
+    on_watermark: Optional[Callable[[Any, bool], None]] = None
+    """
+    Called with the owner of the mailbox (e.g. a `StateMachine`) and True when
+    the queue grows to the high watermark, then with False when it shrinks to
+    the low watermark, so that producers can throttle.
+    """
+
+    def __post_init__(self) -> None:
+        if self.policy is OverflowPolicy.SPILL and self.spill_size < 1:
+            raise ValueError("Arg `spill_size` - must be at least 1 for SPILL")
+        if self.high_watermark is not None:
+            if self.high_watermark < 1:
+                raise ValueError("Arg `high_watermark` - must be at least 1")
+            if self.low_watermark is None:
+                object.__setattr__(self, "low_watermark", self.high_watermark // 2)
+            elif not 0 <= self.low_watermark < self.high_watermark:
+                raise ValueError(
+                    "Arg `low_watermark` - must be less than `high_watermark`"
+                )
+
+
+_default_overflow = OverflowOptions()
+
+
+@dataclass(frozen=True)
+class MailboxStats:
+    size: int
+    """Number of queued items, including any in the overflow buffer."""
+
+    coalesced: int
+    """Number of items that replaced a pending item with the same key."""
+
+    dropped: int
+    """Number of items discarded by DROP_NEWEST or DROP_OLDEST."""
+
+    rejected: int
+    """Number of items refused with `asyncio.QueueFull`."""
+
+    spilled: int
+    """Number of items put in the overflow buffer."""
+
+
+class _Coalescible:
+    """A queued item that is replaced when an item with the same key is put."""
+
+    __slots__ = ("key", "item")
+
+    def __init__(self, key: Hashable, item: Any) -> None:
+        self.key = key
+        self.item = item
+
+
+class Mailbox:
+    """
+    A FIFO event queue for a single consumer.
+
+    Compared to `asyncio.Queue`, a mailbox has no lock or getter bookkeeping:
+    the consumer waits on one future that is resolved when an item is put.
+    Its deque is only allocated when the first item is put, so idle mailboxes
+    are small. Raises `asyncio.QueueEmpty` and `asyncio.QueueFull` like
+    `asyncio.Queue`.
+
+    Items are put with a priority, which must be 0 for a `Mailbox`. See
+    `PriorityMailbox` for a mailbox with multiple priority levels.
+
+    Items put with a coalesce key replace the pending item with the same key,
+    if there is one, keeping its position in the queue.
+
+    What happens to items put while a bounded mailbox is full is set by its
+    `OverflowOptions`.
+    """
+
+    __slots__ = (
+        "_items",
+        "_size",
+        "_maxsize",
+        "_waiter",
+        "_putters",
+        "_coalescing",
+        "_spill",
+        "_overflow_options",
+        "_on_watermark",
+        "_above_watermark",
+        "_fast",
+        "coalesced",
+        "dropped",
+        "rejected",
+        "spilled",
+    )
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        overflow: Optional[OverflowOptions] = None,
+        owner: Any = None,
+    ) -> None:
+        self._items: Optional[Deque[Any]] = None
+        self._size = 0
+        self._maxsize = maxsize
+        self._waiter: Optional[asyncio.Future] = None
+        self._putters: Optional[Deque[asyncio.Future]] = None
+        self._coalescing: Optional[Dict[Hashable, _Coalescible]] = None
+        self._spill: Optional[Deque[Tuple[Any, int]]] = None
+        self.configure_overflow(overflow or _default_overflow, owner)
+        self.coalesced = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.spilled = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    def qsize(self) -> int:
+        return len(self)
+
+    @property
+    def stats(self) -> MailboxStats:
+        return MailboxStats(
+            size=len(self) + (len(self._spill) if self._spill else 0),
+            coalesced=self.coalesced,
+            dropped=self.dropped,
+            rejected=self.rejected,
+            spilled=self.spilled,
+        )
+
+    def configure_overflow(self, overflow: OverflowOptions, owner: Any = None) -> None:
+        """
+        Sets how items put while the mailbox is full are handled. `owner` is
+        passed to the watermark callback.
+        """
+        self._overflow_options = overflow
+        self._above_watermark = False
+        # Unbounded mailboxes without watermarks can skip overflow handling
+        self._fast = (
+            type(self) is Mailbox
+            and not self._maxsize
+            and overflow.high_watermark is None
+        )
+        self._on_watermark = None
+        if overflow.on_watermark is not None:
+            callback = overflow.on_watermark
+            self._on_watermark = lambda above: callback(owner, above)
+
+    def empty(self) -> bool:
+        return not self._size
+
+    def full(self) -> bool:
+        return 0 < self._maxsize <= self._size
+
+    def put_nowait(
+        self, item: Any, priority: int = 0, coalesce_key: Optional[Hashable] = None
+    ) -> None:
+        """
+        Puts an item in the mailbox. If it is full, the item is handled by the
+        overflow policy, which may raise QueueFull.
+        """
+        if self._fast and coalesce_key is None and not priority:
+            items = self._items
+            if items is None:
+                items = self._items = deque()
+            items.append(item)
+            self._size += 1
+            waiter = self._waiter
+            if waiter is not None and not waiter.done():
+                waiter.set_result(None)
+            return
+        self._put(item, priority, coalesce_key)
+
+    def _put(
+        self, item: Any, priority: int, coalesce_key: Optional[Hashable]
+    ) -> None:
+        # Checked first, so that a refused item never coalesces, overflows or
+        # displaces a queued item
+        self._check_priority(priority)
+        if coalesce_key is not None:
+            if self._coalesce(coalesce_key, item):
+                return
+            entry = _Coalescible(coalesce_key, item)
+        else:
+            entry = item
+
+        if 0 < self._maxsize <= self._size:
+            if not self._overflow(entry, priority):
+                return
+        else:
+            self._append(entry, priority)
+
+        if coalesce_key is not None:
+            self._coalescing[coalesce_key] = entry
+        high_watermark = self._overflow_options.high_watermark
+        if (
+            high_watermark is not None
+            and not self._above_watermark
+            and self._size >= high_watermark
+        ):
+            self._above_watermark = True
+            if self._on_watermark:
+                self._on_watermark(True)
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def put(
+        self, item: Any, priority: int = 0, coalesce_key: Optional[Hashable] = None
+    ) -> None:
+        """
+        Puts an item in the mailbox, waiting for space if it is full and the
+        overflow policy is BLOCK.
+        """
+        while (
+            self._overflow_options.policy is OverflowPolicy.BLOCK
+            and self.full()
+            and not self._is_pending(coalesce_key)
+        ):
+            if self._putters is None:
+                self._putters = deque()
+            putter = asyncio.get_running_loop().create_future()
+            self._putters.append(putter)
+            try:
+                await putter
+            except BaseException:
+                putter.cancel()
+                try:
+                    self._putters.remove(putter)
+                except ValueError:
+                    pass
+                if not self.full() and not putter.cancelled():
+                    # Pass the wakeup on to the next waiting producer
+                    self._wake_putter()
+                raise
+        self.put_nowait(item, priority, coalesce_key)
+
+    def get_nowait(self) -> Any:
+        """Removes and returns an item, raising QueueEmpty if there is none."""
+        if self._fast:
+            items = self._items
+            if not items:
+                raise asyncio.QueueEmpty
+            item = items.popleft()
+            self._size -= 1
+            if type(item) is _Coalescible:
+                del self._coalescing[item.key]
+                item = item.item
+            return item
+        return self._get()
+
+    def _get(self) -> Any:
+        if not self._size:
+            raise asyncio.QueueEmpty
+        item = self._pop()
+        if type(item) is _Coalescible:
+            del self._coalescing[item.key]
+            item = item.item
+        if self._spill:
+            self._append(*self._spill.popleft())
+        elif self._putters:
+            self._wake_putter()
+        if (
+            self._above_watermark
+            and self._size <= self._overflow_options.low_watermark
+        ):
+            self._above_watermark = False
+            if self._on_watermark:
+                self._on_watermark(False)
+        return item
+
+    async def get(self) -> Any:
+        """Removes and returns an item, waiting for one if there is none."""
+        while self.empty():
+            await self.wait()
+        return self.get_nowait()
+
+    async def wait(self) -> None:
+        """
+        Waits until an item is put in the mailbox or `wake` is called. Returns
+        immediately if the mailbox is not empty.
+        """
+        if not self.empty():
+            return
+        self._waiter = asyncio.get_running_loop().create_future()
+        try:
+            await self._waiter
+        finally:
+            self._waiter = None
+
+    def wake(self) -> None:
+        """Wakes the consumer if it is waiting, without putting an item."""
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def pending(self) -> List[Tuple[Any, int, Optional[Hashable]]]:
+        """
+        Returns each queued item with its priority and coalesce key, in the
+        order they would be got, followed by any in the overflow buffer.
+        """
+        entries = self._entries()
+        if self._spill:
+            entries.extend(self._spill)
+        return [
+            (entry.item, priority, entry.key)
+            if type(entry) is _Coalescible
+            else (entry, priority, None)
+            for entry, priority in entries
+        ]
+
+    def clear(self) -> None:
+        if self._items:
+            self._items.clear()
+        self._size = 0
+        self._clear()
+
+    def _clear(self) -> None:
+        if self._coalescing:
+            self._coalescing.clear()
+        if self._spill:
+            self._spill.clear()
+        if self._above_watermark:
+            self._above_watermark = False
+            if self._on_watermark:
+                self._on_watermark(False)
+        while self._putters:
+            self._wake_putter()
+
+    def _overflow(self, entry: Any, priority: int) -> bool:
+        """
+        Handles an item put while the mailbox is full, returning True if the
+        item was queued and False if it was discarded.
+        """
+        policy = self._overflow_options.policy
+        if policy is OverflowPolicy.DROP_NEWEST:
+            self.dropped += 1
+            return False
+        if policy is OverflowPolicy.DROP_OLDEST:
+            oldest = self._pop_oldest()
+            if type(oldest) is _Coalescible:
+                del self._coalescing[oldest.key]
+            self.dropped += 1
+            self._append(entry, priority)
+            return True
+        if policy is OverflowPolicy.SPILL:
+            if self._spill is None:
+                self._spill = deque()
+            if len(self._spill) < self._overflow_options.spill_size:
+                self._spill.append((entry, priority))
+                self.spilled += 1
+                return True
+        self.rejected += 1
+        raise asyncio.QueueFull
+
+    def _check_priority(self, priority: int) -> None:
+        if priority:
+            raise ValueError(f"Arg `priority` - must be 0, got {priority}")
+
+    def _append(self, item: Any, priority: int) -> None:
+        items = self._items
+        if items is None:
+            items = self._items = deque()
+        items.append(item)
+        self._size += 1
+
+    def _entries(self) -> List[Tuple[Any, int]]:
+        """Returns the queued entries and their priorities, in order."""
+        return [(entry, 0) for entry in self._items] if self._items else []
+
+    def _pop(self) -> Any:
+        self._size -= 1
+        return self._items.popleft()
+
+    def _pop_oldest(self) -> Any:
+        """Removes the oldest item with the lowest priority."""
+        self._size -= 1
+        return self._items.popleft()
+
+    def _is_pending(self, coalesce_key: Optional[Hashable]) -> bool:
+        return (
+            coalesce_key is not None
+            and self._coalescing is not None
+            and coalesce_key in self._coalescing
+        )
+
+    def _coalesce(self, coalesce_key: Hashable, item: Any) -> bool:
+        """
+        Replaces the pending item with the given key, returning False if there
+        is no such item.
+        """
+        coalescing = self._coalescing
+        if coalescing is None:
+            self._coalescing = {}
+            return False
+        cell = coalescing.get(coalesce_key)
+        if cell is None:
+            return False
+        cell.item = item
+        self.coalesced += 1
+        return True
+
+    def _wake_putter(self) -> None:
+        while self._putters:
+            putter = self._putters.popleft()
+            if not putter.done():
+                putter.set_result(None)
+                return
+
+
+class PriorityMailbox(Mailbox):
+    """
+    A mailbox with multiple priority levels. Items with a higher priority are
+    returned first, and items with the same priority are returned in the
+    order they were put. A coalesced item keeps the priority of the item it
+    replaced.
+    """
+
+    __slots__ = ("_levels",)
+
+    def __init__(
+        self,
+        levels: int,
+        maxsize: int = 0,
+        overflow: Optional[OverflowOptions] = None,
+        owner: Any = None,
+    ) -> None:
+        if levels < 1:
+            raise ValueError("Arg `levels` - must be at least 1")
+        super().__init__(maxsize, overflow, owner)
+        self._levels: List[Optional[Deque[Any]]] = [None] * levels
+
+    @property
+    def levels(self) -> int:
+        return len(self._levels)
+
+    def level_size(self, priority: int) -> int:
+        """Returns the number of items queued with the given priority."""
+        items = self._levels[priority]
+        return len(items) if items else 0
+
+    def clear(self) -> None:
+        for items in self._levels:
+            if items:
+                items.clear()
+        self._size = 0
+        self._clear()
+
+    def _check_priority(self, priority: int) -> None:
+        if priority < 0:
+            raise ValueError(f"Arg `priority` - must not be negative, got {priority}")
+        if priority >= len(self._levels):
+            raise ValueError(
+                f"Arg `priority` - must be between 0 and {len(self._levels) - 1}"
+            )
+
+    def _append(self, item: Any, priority: int) -> None:
+        levels = self._levels
+        items = levels[priority]
+        if items is None:
+            items = levels[priority] = deque()
+        items.append(item)
+        self._size += 1
+
+    def _entries(self) -> List[Tuple[Any, int]]:
+        levels = self._levels
+        return [
+            (entry, priority)
+            for priority in range(len(levels) - 1, -1, -1)
+            if levels[priority]
+            for entry in levels[priority]
+        ]
+
+    def _pop(self) -> Any:
+        levels = self._levels
+        priority = len(levels) - 1
+        while not levels[priority]:
+            priority -= 1
+        self._size -= 1
+        return levels[priority].popleft()
+
+    def _pop_oldest(self) -> Any:
+        for items in self._levels:
+            if items:
+                self._size -= 1
+                return items.popleft()
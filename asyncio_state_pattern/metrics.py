@@ -0,0 +1,300 @@
+import json
+from bisect import bisect_left
+from typing import Any, Dict, List, Tuple
+
+LATENCY_BUCKETS = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+)
+"""Default upper bounds, in seconds, of event and handler latency histograms."""
+
+DWELL_BUCKETS = (0.001, 0.01, 0.1, 1.0, 10.0, 60.0, 600.0, 3600.0)
+"""Default upper bounds, in seconds, of state dwell time histograms."""
+
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+"""Default upper bounds of event queue depth histograms."""
+
+
+class MetricsSink:
+    """
+    Receives measurements from the state machines it is attached to. The
+    methods do nothing by default; subclasses override the ones they need.
+    State machines without a sink take no measurements.
+    """
+
+    __slots__ = ()
+
+    def record_transition(self, machine: Any, source: str, dest: str) -> None:
+        """
+        Called for each transition, with the name of the source leaf state,
+        or "[*]" for the initial transition, and the destination leaf state.
+        """
+
+    def record_dwell(self, machine: Any, state: str, seconds: float) -> None:
+        """Called when a state is exited, with the time since it was entered."""
+
+    def record_event(self, machine: Any, event: str, seconds: float) -> None:
+        """Called with the time taken to dispatch an event to its handlers."""
+
+    def record_handler(self, machine: Any, handler: str, seconds: float) -> None:
+        """Called with the time taken by each event handler that was called."""
+
+    def record_queue_depth(self, machine: Any, depth: int) -> None:
+        """
+        Called with the number of queued events each time the run loop starts
+        processing a batch of events.
+        """
+
+    def record_deadline_miss(self, machine: Any, kind: str, action: str) -> None:
+        """
+        Called when an action is cancelled for missing its deadline, with the
+        kind of action ("entry", "exit" or "handler") and its name.
+        """
+
+
+class Histogram:
+    """
+    Counts observations in fixed buckets, each counting the observations up
+    to its upper bound that are above the previous bound. A final bucket
+    counts observations above the last bound.
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "Histogram") -> None:
+        """Adds the observations of a histogram with the same bounds."""
+        if other.bounds != self.bounds:
+            raise ValueError("Arg `other` - must have the same bucket bounds")
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def cumulative_counts(self) -> List[int]:
+        """Returns the number of observations up to each bound, and in total."""
+        total = 0
+        cumulative = []
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bounds": list(self.bounds),
+            "counts": list(self.counts),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class Metrics(MetricsSink):
+    """
+    A metrics sink that aggregates the measurements of every state machine it
+    is attached to, labelled by the state machine's name. Collectors can be
+    combined with `merge`, and exported with `to_prometheus` or `to_json`.
+
+    Transition counts are keyed by (machine, source, dest), deadline miss
+    counts by (machine, kind, action), and histograms of
+    dwell times, event and handler latencies and queue depths by (machine,
+    state), (machine, event), (machine, handler) and (machine,).
+    """
+
+    __slots__ = (
+        "namespace",
+        "_latency_buckets",
+        "_dwell_buckets",
+        "_depth_buckets",
+        "transitions",
+        "dwell",
+        "events",
+        "handlers",
+        "queue_depth",
+        "deadline_misses",
+    )
+
+    def __init__(
+        self,
+        namespace: str = "asp",
+        latency_buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+        dwell_buckets: Tuple[float, ...] = DWELL_BUCKETS,
+        depth_buckets: Tuple[float, ...] = DEPTH_BUCKETS,
+    ) -> None:
+        self.namespace = namespace
+        self._latency_buckets = tuple(latency_buckets)
+        self._dwell_buckets = tuple(dwell_buckets)
+        self._depth_buckets = tuple(depth_buckets)
+        self.transitions: Dict[Tuple[str, str, str], int] = {}
+        self.dwell: Dict[Tuple[str, str], Histogram] = {}
+        self.events: Dict[Tuple[str, str], Histogram] = {}
+        self.handlers: Dict[Tuple[str, str], Histogram] = {}
+        self.queue_depth: Dict[Tuple[str], Histogram] = {}
+        self.deadline_misses: Dict[Tuple[str, str, str], int] = {}
+
+    def record_transition(self, machine: Any, source: str, dest: str) -> None:
+        key = (machine.name, source, dest)
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+
+    def record_dwell(self, machine: Any, state: str, seconds: float) -> None:
+        self._histogram(self.dwell, (machine.name, state), self._dwell_buckets).observe(
+            seconds
+        )
+
+    def record_event(self, machine: Any, event: str, seconds: float) -> None:
+        self._histogram(
+            self.events, (machine.name, event), self._latency_buckets
+        ).observe(seconds)
+
+    def record_handler(self, machine: Any, handler: str, seconds: float) -> None:
+        self._histogram(
+            self.handlers, (machine.name, handler), self._latency_buckets
+        ).observe(seconds)
+
+    def record_queue_depth(self, machine: Any, depth: int) -> None:
+        self._histogram(
+            self.queue_depth, (machine.name,), self._depth_buckets
+        ).observe(depth)
+
+    def record_deadline_miss(self, machine: Any, kind: str, action: str) -> None:
+        key = (machine.name, kind, action)
+        self.deadline_misses[key] = self.deadline_misses.get(key, 0) + 1
+
+    def merge(self, other: "Metrics") -> None:
+        """Adds the measurements of another collector to this one."""
+        for key, count in other.transitions.items():
+            self.transitions[key] = self.transitions.get(key, 0) + count
+        for key, count in other.deadline_misses.items():
+            self.deadline_misses[key] = self.deadline_misses.get(key, 0) + count
+        for name in ("dwell", "events", "handlers", "queue_depth"):
+            histograms = getattr(self, name)
+            for key, histogram in getattr(other, name).items():
+                self._histogram(histograms, key, histogram.bounds).merge(histogram)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "transitions": [
+                {"machine": m, "source": s, "dest": d, "count": count}
+                for (m, s, d), count in self.transitions.items()
+            ],
+            "dwell": [
+                {"machine": m, "state": s, **h.to_dict()}
+                for (m, s), h in self.dwell.items()
+            ],
+            "events": [
+                {"machine": m, "event": e, **h.to_dict()}
+                for (m, e), h in self.events.items()
+            ],
+            "handlers": [
+                {"machine": m, "handler": name, **h.to_dict()}
+                for (m, name), h in self.handlers.items()
+            ],
+            "queue_depth": [
+                {"machine": m, **h.to_dict()} for (m,), h in self.queue_depth.items()
+            ],
+            "deadline_misses": [
+                {"machine": m, "kind": k, "action": a, "count": count}
+                for (m, k, a), count in self.deadline_misses.items()
+            ],
+        }
+
+    def to_json(self, **kwargs: Any) -> str:
+        """Returns the measurements as JSON. Keyword args are passed to json.dumps."""
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self) -> str:
+        """Returns the measurements in the Prometheus text exposition format."""
+        ns = self.namespace
+        lines = [
+            f"# HELP {ns}_transitions_total Number of transitions between states.",
+            f"# TYPE {ns}_transitions_total counter",
+        ]
+        for (machine, source, dest), count in self.transitions.items():
+            labels = _labels(machine=machine, source=source, dest=dest)
+            lines.append(f"{ns}_transitions_total{{{labels}}} {count}")
+
+        lines.append(
+            f"# HELP {ns}_deadline_misses_total Number of actions cancelled for missing their deadline."
+        )
+        lines.append(f"# TYPE {ns}_deadline_misses_total counter")
+        for (machine, kind, action), count in self.deadline_misses.items():
+            labels = _labels(machine=machine, kind=kind, action=action)
+            lines.append(f"{ns}_deadline_misses_total{{{labels}}} {count}")
+
+        for name, help_text, histograms, label_names in (
+            (
+                "state_dwell_seconds",
+                "Time spent in a state before exiting it.",
+                self.dwell,
+                ("machine", "state"),
+            ),
+            (
+                "event_duration_seconds",
+                "Time taken to dispatch an event to its handlers.",
+                self.events,
+                ("machine", "event"),
+            ),
+            (
+                "handler_duration_seconds",
+                "Time taken by an event handler.",
+                self.handlers,
+                ("machine", "handler"),
+            ),
+            (
+                "event_queue_depth",
+                "Number of queued events when a batch starts.",
+                self.queue_depth,
+                ("machine",),
+            ),
+        ):
+            lines.append(f"# HELP {ns}_{name} {help_text}")
+            lines.append(f"# TYPE {ns}_{name} histogram")
+            for key, histogram in histograms.items():
+                labels = _labels(**dict(zip(label_names, key)))
+                cumulative = histogram.cumulative_counts()
+                for bound, count in zip(histogram.bounds, cumulative):
+                    lines.append(
+                        f'{ns}_{name}_bucket{{{labels},le="{bound:g}"}} {count}'
+                    )
+                lines.append(f'{ns}_{name}_bucket{{{labels},le="+Inf"}} {cumulative[-1]}')
+                lines.append(f"{ns}_{name}_sum{{{labels}}} {histogram.sum:g}")
+                lines.append(f"{ns}_{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram(
+        histograms: Dict[Any, Histogram], key: Any, bounds: Tuple[float, ...]
+    ) -> Histogram:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(bounds)
+        return histogram
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
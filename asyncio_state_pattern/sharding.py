@@ -0,0 +1,396 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import queue
+from bisect import bisect
+from dataclasses import dataclass
+from hashlib import blake2b
+from logging import ERROR, Logger
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .logger import logger as asp_logger
+from .machine_pool import MachinePool
+from .mailbox import MailboxStats
+from .state_machine import StateMachine, StateMachineError
+
+
+def _hash(data: bytes) -> int:
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), "little")
+
+
+def _key_bytes(key: Hashable) -> bytes:
+    """Returns bytes for key that are the same in every process."""
+    if isinstance(key, bytes):
+        return key
+    if isinstance(key, str):
+        return key.encode()
+    if isinstance(key, int):
+        return str(key).encode()
+    return pickle.dumps(key, 4)
+
+
+class HashRing:
+    """
+    Maps keys to shards by consistent hashing. Each shard owns `replicas`
+    points on a ring of 64 bit hashes, and a key belongs to the shard owning
+    the first point at or after the key's hash. Adding a shard only moves the
+    keys that fall before its points, about 1 / shards of all keys.
+
+    Hashes are computed from the key's bytes rather than `hash()`, so a key
+    maps to the same shard in every process and across restarts.
+    """
+
+    __slots__ = ("_shards", "_replicas", "_points", "_owners")
+
+    def __init__(self, shards: int, replicas: int = 64) -> None:
+        if shards < 1:
+            raise ValueError("Arg `shards` - must be at least 1")
+        if replicas < 1:
+            raise ValueError("Arg `replicas` - must be at least 1")
+
+        self._shards = shards
+        self._replicas = replicas
+        ring = sorted(
+            (_hash(f"{shard}:{replica}".encode()), shard)
+            for shard in range(shards)
+            for replica in range(replicas)
+        )
+        self._points = [point for point, _ in ring]
+        self._owners = [shard for _, shard in ring]
+
+    def __len__(self) -> int:
+        return self._shards
+
+    def shard_for(self, key: Hashable) -> int:
+        """Returns the index of the shard that owns key."""
+        index = bisect(self._points, _hash(_key_bytes(key)))
+        return self._owners[index % len(self._owners)]
+
+
+@dataclass(frozen=True)
+class WorkerStats:
+    """Counters reported by a worker process of a `ShardedRuntime`."""
+
+    worker: int
+    """The index of the worker."""
+
+    pid: int
+    """The process id of the worker."""
+
+    machines: int
+    """Number of machines hosted by the worker."""
+
+    events_received: int
+    """Number of events received from the router."""
+
+    events_processed: int
+    """Number of events processed by the worker's machines."""
+
+    event_queue: MailboxStats
+    """The sum of the event queue stats of the worker's machines."""
+
+    events_dropped: int = 0
+    """
+    Number of events received that a machine's full event queue refused with
+    `asyncio.QueueFull`.
+    """
+
+
+@dataclass(frozen=True)
+class RuntimeStats:
+    """Counters of a `ShardedRuntime`, summed over its workers."""
+
+    events_routed: int
+    """Number of events queued with the router."""
+
+    batches_sent: int
+    """Number of batches of events sent to workers."""
+
+    workers: Tuple[WorkerStats, ...]
+    """The stats reported by each worker."""
+
+    @property
+    def machines(self) -> int:
+        return sum(w.machines for w in self.workers)
+
+    @property
+    def events_received(self) -> int:
+        return sum(w.events_received for w in self.workers)
+
+    @property
+    def events_processed(self) -> int:
+        return sum(w.events_processed for w in self.workers)
+
+    @property
+    def events_dropped(self) -> int:
+        return sum(w.events_dropped for w in self.workers)
+
+
+class ShardedRuntime:
+    """
+    Runs state machines in `workers` processes, each hosting the machines
+    whose keys a `HashRing` assigns to it on a `MachinePool`.
+
+    Machines are created in their worker by calling `factory` with their key
+    when the first event for the key arrives, so factory must be picklable
+    (e.g. a module level function). Events, and their keys, must be
+    picklable too.
+
+    Events queued with the router are batched per worker and sent once the
+    current event loop iteration ends, or once `batch_size` events are
+    waiting for a worker. All events for a key go to the same worker in the
+    order they were queued, so each machine processes its events in order.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[Hashable], StateMachine],
+        workers: int = 0,
+        dispatchers: int = 1,
+        batch_size: int = 1024,
+        mp_context: Optional[Any] = None,
+        logger: Optional[Logger] = None,
+    ) -> None:
+        workers = workers or os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("Arg `workers` - must be at least 1")
+        if dispatchers < 1:
+            raise ValueError("Arg `dispatchers` - must be at least 1")
+        if batch_size < 1:
+            raise ValueError("Arg `batch_size` - must be at least 1")
+
+        self._factory = factory
+        self._num_workers = workers
+        self._dispatchers = dispatchers
+        self._batch_size = batch_size
+        self._context = mp_context or multiprocessing.get_context("spawn")
+        self._logger = logger or asp_logger
+        self._ring = HashRing(workers)
+        self._shards: Dict[Hashable, int] = {}
+        self._batches: List[List[Tuple[Hashable, Any, int]]] = [
+            [] for _ in range(workers)
+        ]
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._inboxes: List[Any] = []
+        self._outbox: Optional[Any] = None
+        self._processes: List[Any] = []
+        self._control = asyncio.Lock()
+        self._events_routed = 0
+        self._batches_sent = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._processes)
+
+    @property
+    def workers(self) -> int:
+        return self._num_workers
+
+    def worker_for(self, key: Hashable) -> int:
+        """Returns the index of the worker hosting the machine with key."""
+        shard = self._shards.get(key)
+        if shard is None:
+            shard = self._shards[key] = self._ring.shard_for(key)
+        return shard
+
+    async def start(self) -> None:
+        if self._processes:
+            raise StateMachineError("ShardedRuntime: Already started")
+        self._outbox = self._context.Queue()
+        self._inboxes = [self._context.Queue() for _ in range(self._num_workers)]
+        self._processes = [
+            self._context.Process(
+                target=_run_worker,
+                args=(
+                    index,
+                    self._factory,
+                    self._dispatchers,
+                    self._inboxes[index],
+                    self._outbox,
+                ),
+                name=f"ShardedRuntime-{index}",
+                daemon=True,
+            )
+            for index in range(self._num_workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+    def post_event(self, key: Hashable, event: Any, priority: int = 0) -> None:
+        """Queues an event for the machine with key, creating it if needed."""
+        if not self._processes:
+            raise StateMachineError("ShardedRuntime: Not started")
+        shard = self._shards.get(key)
+        if shard is None:
+            shard = self._shards[key] = self._ring.shard_for(key)
+        batch = self._batches[shard]
+        batch.append((key, event, priority))
+        self._events_routed += 1
+        if len(batch) >= self._batch_size:
+            self._send(shard)
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_soon(self.flush)
+
+    async def queue_event(self, key: Hashable, event: Any, priority: int = 0) -> None:
+        self.post_event(key, event, priority)
+
+    def flush(self) -> None:
+        """Sends the events batched for each worker without waiting."""
+        self._flush_handle = None
+        for shard, batch in enumerate(self._batches):
+            if batch:
+                self._send(shard)
+
+    async def stats(self) -> RuntimeStats:
+        """Returns the router's counters and the stats reported by each worker."""
+        if not self._processes:
+            raise StateMachineError("ShardedRuntime: Not started")
+        async with self._control:
+            self.flush()
+            workers = await self._request("stats")
+        return RuntimeStats(self._events_routed, self._batches_sent, workers)
+
+    async def stop(self) -> RuntimeStats:
+        """
+        Sends the batched events, waits for each worker to process all events
+        it was sent, and then stops the workers. Returns the final stats.
+        """
+        if not self._processes:
+            self._logger.warning("ShardedRuntime: Already stopped")
+            return RuntimeStats(self._events_routed, self._batches_sent, ())
+        async with self._control:
+            self.flush()
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            workers = await self._request("stop")
+            loop = asyncio.get_running_loop()
+            for process in self._processes:
+                await loop.run_in_executor(None, process.join)
+            for channel in (*self._inboxes, self._outbox):
+                channel.close()
+            self._processes = []
+            self._inboxes = []
+            self._outbox = None
+        return RuntimeStats(self._events_routed, self._batches_sent, workers)
+
+    def _send(self, shard: int) -> None:
+        batch = self._batches[shard]
+        self._batches[shard] = []
+        self._inboxes[shard].put(batch)
+        self._batches_sent += 1
+
+    async def _request(self, command: str) -> Tuple[WorkerStats, ...]:
+        """Sends a command to every worker and returns their replies in order."""
+        for inbox in self._inboxes:
+            inbox.put(command)
+        loop = asyncio.get_running_loop()
+        replies: List[Optional[WorkerStats]] = [None] * self._num_workers
+        for _ in range(self._num_workers):
+            reply = await loop.run_in_executor(None, self._get_reply)
+            if isinstance(reply, str):
+                raise StateMachineError(f"ShardedRuntime: {reply}")
+            replies[reply.worker] = reply
+        return tuple(replies)
+
+    def _get_reply(self) -> Any:
+        """
+        Waits for a reply from a worker, returning an error message instead if
+        a worker exits without replying.
+        """
+        while True:
+            try:
+                return self._outbox.get(timeout=0.1)
+            except queue.Empty:
+                pass
+            for process in self._processes:
+                if not process.is_alive() and process.exitcode != 0:
+                    return f"Worker {process.name} exited with code {process.exitcode}"
+
+
+class _Worker:
+    """Hosts the machines of one shard of a `ShardedRuntime`."""
+
+    def __init__(
+        self,
+        index: int,
+        factory: Callable[[Hashable], StateMachine],
+        dispatchers: int,
+        inbox: Any,
+        outbox: Any,
+    ) -> None:
+        self._index = index
+        self._factory = factory
+        self._inbox = inbox
+        self._outbox = outbox
+        self._pool = MachinePool(dispatchers)
+        self._events_received = 0
+        self._events_dropped = 0
+
+    async def run(self) -> None:
+        pool = self._pool
+        await pool.start()
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, self._inbox.get)
+            if type(message) is list:
+                self._deliver(message)
+            elif message == "stats":
+                await self._drain()
+                self._outbox.put(self._stats())
+            elif message == "stop":
+                await pool.stop()
+                self._outbox.put(self._stats())
+                return
+
+    def _deliver(self, batch: List[Tuple[Hashable, Any, int]]) -> None:
+        machines = self._pool._machines
+        for key, event, priority in batch:
+            machine = machines.get(key)
+            if machine is None:
+                machine = self._factory(key)
+                self._pool.add(key, machine)
+            try:
+                machine.post_event(event, priority)
+            except asyncio.QueueFull:
+                # Only this event is lost; the shard's other machines carry on
+                self._events_dropped += 1
+                machine._log(
+                    ERROR,
+                    "sharded_event_dropped",
+                    "Event queue full, dropped event %(dropped)r",
+                    dropped=event,
+                )
+        self._events_received += len(batch)
+
+    async def _drain(self) -> None:
+        """Waits until the events delivered so far have been processed."""
+        await self._pool._ready.join()
+
+    def _stats(self) -> WorkerStats:
+        machines = self._pool._machines.values()
+        return WorkerStats(
+            worker=self._index,
+            pid=os.getpid(),
+            machines=len(machines),
+            events_received=self._events_received,
+            events_processed=sum(m.run_loop_stats.events for m in machines),
+            event_queue=self._pool.event_queue_stats,
+            events_dropped=self._events_dropped,
+        )
+
+
+def _run_worker(
+    index: int,
+    factory: Callable[[Hashable], StateMachine],
+    dispatchers: int,
+    inbox: Any,
+    outbox: Any,
+) -> None:
+    try:
+        asyncio.run(_Worker(index, factory, dispatchers, inbox, outbox).run())
+    except BaseException as e:
+        asp_logger.exception(f"ShardedRuntime: Worker {index} failed")
+        outbox.put(f"Worker {index} failed: {e!r}")
+        raise SystemExit(1)
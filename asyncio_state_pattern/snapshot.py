@@ -0,0 +1,104 @@
+import pickle
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from .framing import (
+    HEADER_SIZE,
+    check_header,
+    encode_frame,
+    encode_header,
+    read_frames,
+)
+
+MAGIC = b"ASPS"
+"""The first bytes of a snapshot or snapshot stream."""
+
+VERSION = 1
+"""The version of the snapshot format, stored after `MAGIC`."""
+
+SnapshotRecord = Tuple[
+    Optional[Hashable],
+    Optional[str],
+    Tuple[Tuple[str, Any], ...],
+    Tuple[Tuple[Any, int, Optional[Hashable]], ...],
+]
+"""
+A snapshot of one state machine: its key in a bulk snapshot (or None), the
+name of its active leaf state (or None if it was not started), the name and
+`State.snapshot_data` of each state with data, and each queued event with its
+priority and coalesce key.
+"""
+
+_KIND = "state machine snapshot"
+
+
+def dumps(record: SnapshotRecord) -> bytes:
+    """Encodes the snapshot of a single state machine."""
+    return encode_header(MAGIC, VERSION) + pickle.dumps(
+        record, pickle.HIGHEST_PROTOCOL
+    )
+
+
+def loads(data: bytes) -> SnapshotRecord:
+    """Decodes a snapshot encoded by `dumps`."""
+    check_header(data[:HEADER_SIZE], MAGIC, VERSION, _KIND)
+    return pickle.loads(memoryview(data)[HEADER_SIZE:])
+
+
+def write_snapshots(
+    file: BinaryIO,
+    machines: Iterable[Tuple[Hashable, Any]],
+    chunk_size: int = 4096,
+) -> int:
+    """
+    Writes snapshots of (key, state machine) pairs to a binary file, and
+    returns the number of machines written. Snapshots are written in frames
+    of up to `chunk_size` machines, so that machines are never all held in
+    memory at once, and so that state names and events shared by the
+    machines in a frame are only encoded once.
+    """
+    if chunk_size < 1:
+        raise ValueError("Arg `chunk_size` - must be at least 1")
+
+    file.write(encode_header(MAGIC, VERSION))
+    count = 0
+    records: List[SnapshotRecord] = []
+    for key, machine in machines:
+        records.append(machine._snapshot_record(key))
+        if len(records) == chunk_size:
+            file.write(encode_frame(records))
+            count += len(records)
+            records = []
+    if records:
+        file.write(encode_frame(records))
+        count += len(records)
+    return count
+
+
+def read_snapshots(
+    file: BinaryIO, factory: Callable[[Hashable], Any]
+) -> Iterator[Tuple[Hashable, Any]]:
+    """
+    Reads snapshots written by `write_snapshots`, yielding the key and state
+    machine of each. Machines are created by calling factory with their key,
+    and restored as by `StateMachine.restore`.
+
+    Snapshots are decoded with pickle, so must only be read from trusted
+    sources.
+    """
+    check_header(file.read(HEADER_SIZE), MAGIC, VERSION, _KIND)
+    for records in read_frames(file):
+        for record in records:
+            key = record[0]
+            machine = factory(key)
+            machine._restore_record(record)
+            yield key, machine
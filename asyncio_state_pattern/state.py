@@ -1,7 +1,13 @@
+import warnings
+from dataclasses import dataclass, field
+from inspect import iscoroutinefunction
 from logging import Logger
-from typing import Generic, TypeVar, Optional
+from types import MappingProxyType
+from typing import Any, Callable, ClassVar, Generic, Mapping, Tuple, TypeVar, Optional
 
+from .event import Event
 from .logger import logger as asp_logger
+from .transitions import parse_transition_table
 from .constants import (
     entry_action_attr,
     exit_action_attr,
@@ -11,40 +17,116 @@ from .constants import (
 
 T = TypeVar("T")
 
+Action = Callable[..., Any]
+
+ActionEntry = Tuple[Action, bool]
+"""An action and whether it is a coroutine function that must be awaited."""
+
+
+@dataclass(frozen=True)
+class ActionTable:
+    """
+    The entry, exit and event actions declared by a state class.
+    """
+
+    entry_actions: Tuple[ActionEntry, ...] = ()
+    exit_actions: Tuple[ActionEntry, ...] = ()
+    event_actions_by_id: Mapping[Any, Tuple[ActionEntry, ...]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+
 
 class State(Generic[T]):
     """
     Base class for a state.
+
+    States declared with `flyweight=True` have a single instance that is
+    shared by every state machine using the state. Flyweight states have no
+    `context`; instead their entry, exit and event actions are called with the
+    state machine as a second argument.
+
+    States declared with a `timeout` in seconds queue `timeout_event` if they
+    are still active once the timeout has elapsed since they were entered.
+
+    Composite states declared with `orthogonal=True` treat each of their sub
+    states as a region, and every region is active while the state is. Events
+    are dispatched to the active state of each region in turn, or
+    concurrently if the state is also declared with `independent=True`.
+
+    States declared with an `entry_deadline`, `exit_deadline` or
+    `handler_deadline` in seconds have their coroutine entry actions, exit
+    actions or event handlers cancelled if they take longer, overriding the
+    state machine's `DeadlineOptions`.
+
+    States may declare a `transitions` table mapping events to destination
+    states, given as classes or names, to `(destination, guard)` tuples, or to
+    lists of them tried in order. A table entry is dispatched to after the
+    state's own event handlers, and transitions to the first destination whose
+    guard passes without calling a coroutine of the state. Guards are plain
+    functions called like event handlers.
     """
 
+    __slots__ = ("_logger", "_context")
+
+    transitions: ClassVar[Mapping[Any, Any]] = MappingProxyType({})
+    _action_table: ClassVar[ActionTable] = ActionTable()
+    _flyweight: ClassVar[bool] = False
+    _timeout: ClassVar[Optional[Tuple[float, Any]]] = None
+    _orthogonal: ClassVar[bool] = False
+    _independent: ClassVar[bool] = False
+    _deadlines: ClassVar[Optional[Tuple[Optional[float], ...]]] = None
+
     def __init__(self, logger: Optional[Logger] = None) -> None:
         self._logger = logger or asp_logger
         self._context: Optional[T] = None
-        self._entry_actions = [
-            item
-            for item in self.__class__.__dict__.values()
-            if hasattr(item, entry_action_attr)
-        ]
-        self._exit_actions = [
-            item
-            for item in self.__class__.__dict__.values()
-            if hasattr(item, exit_action_attr)
-        ]
-        self._event_actions_by_id = {}
-        for item in [
-            i for i in self.__class__.__dict__.values() if hasattr(i, event_action_attr)
-        ]:
-            event_id = getattr(item, event_action_attr)
-            if event_id not in self._event_actions_by_id:
-                self._event_actions_by_id[event_id] = [item]
-            else:
-                self._event_actions_by_id[event_id].append(item)
 
-    def __init_subclass__(cls, initial: bool = False) -> None:
+    def __init_subclass__(
+        cls,
+        initial: bool = False,
+        flyweight: bool = False,
+        timeout: Optional[float] = None,
+        timeout_event: Any = "timeout",
+        orthogonal: bool = False,
+        independent: bool = False,
+        entry_deadline: Optional[float] = None,
+        exit_deadline: Optional[float] = None,
+        handler_deadline: Optional[float] = None,
+    ) -> None:
+        if timeout is not None and timeout <= 0:
+            raise ValueError("Arg `timeout` - must be greater than 0")
+        if independent and not orthogonal:
+            raise ValueError("Arg `independent` - requires `orthogonal=True`")
+        deadlines = (entry_deadline, exit_deadline, handler_deadline)
+        for kind, seconds in zip(("entry", "exit", "handler"), deadlines):
+            if seconds is not None and seconds <= 0:
+                raise ValueError(f"Arg `{kind}_deadline` - must be greater than 0")
+        if "process_event" in cls.__dict__:
+            warnings.warn(
+                f"{cls.__name__} overrides State.process_event, which state"
+                " machines no longer call to dispatch events. Declare handlers"
+                " with `on_event` or a `transitions` table instead.",
+                DeprecationWarning,
+                stacklevel=2,
+            )
         if initial:
             if not hasattr(cls, initial_state_attr):
                 setattr(cls, initial_state_attr, [])
             getattr(cls, initial_state_attr).append(cls.__name__)
+        cls._action_table = _create_action_table(cls)
+        cls._flyweight = flyweight
+        cls._timeout = (timeout, timeout_event) if timeout is not None else None
+        cls._orthogonal = orthogonal
+        cls._independent = independent
+        cls._deadlines = None if deadlines == (None, None, None) else deadlines
+
+    @classmethod
+    def _get_flyweight(cls) -> "State":
+        """Returns the instance of a flyweight state class shared by all machines."""
+        instance = cls.__dict__.get("_flyweight_instance")
+        if instance is None:
+            instance = cls()
+            cls._flyweight_instance = instance
+        return instance
 
     @property
     def context(self) -> T:
@@ -61,22 +143,108 @@ class State(Generic[T]):
         return self.__class__.__name__
 
     async def enter(self) -> None:
-        for method in self._entry_actions:
-            await method(self)
+        for action, is_async in self._action_table.entry_actions:
+            if is_async:
+                await action(self)
+            else:
+                action(self)
 
     async def exit(self) -> None:
-        for method in self._exit_actions:
-            await method(self)
+        for action, is_async in self._action_table.exit_actions:
+            if is_async:
+                await action(self)
+            else:
+                action(self)
+
+    def snapshot_data(self) -> Any:
+        """
+        Returns data to save in snapshots of the state machine, which is
+        passed to `restore_data` when the snapshot is restored. Returns None
+        if there is nothing to save. Only called for non-flyweight states
+        whose class overrides it, and the data must be picklable.
+        """
+        return None
+
+    def restore_data(self, data: Any) -> None:
+        """Restores data returned by `snapshot_data`."""
 
     async def queue_event(self) -> None:
         await self.context.queue_event(self.name)
 
-    async def process_event(self, event) -> bool:
-        if event not in self._event_actions_by_id:
+    async def process_event(self, event, context: Optional[T] = None) -> bool:
+        """
+        Calls the state's own handlers for an event, until one consumes it.
+        State machines dispatch events through handler chains compiled for
+        each state instead, so overriding this method is deprecated and has
+        no effect on them.
+        """
+        if isinstance(event, Event):
+            actions = self._action_table.event_actions_by_id.get(type(event))
+            payload = (event,)
+        else:
+            actions = self._action_table.event_actions_by_id.get(event)
+            payload = ()
+        if not actions:
             return False
 
-        for action in self._event_actions_by_id[event]:
-            consumed = await action(self)
+        args = (self, context, *payload) if self._flyweight else (self, *payload)
+        for action, is_async in actions:
+            consumed = action(*args)
+            if is_async:
+                consumed = await consumed
             if consumed:
                 return True
         return False
+
+
+def _create_action_table(cls: type) -> ActionTable:
+    """
+    Collects the actions declared on cls and on any non-state mixin classes
+    in its MRO. Actions declared on super states are excluded, as they belong
+    to the super state's own instance and run when that state is entered,
+    exited or dispatched to. Overridden methods are resolved through the MRO.
+
+    Actions may be plain functions or coroutine functions. Which kind each
+    action is gets recorded here, so that plain functions can be called
+    without creating a coroutine.
+
+    Entries of a `transitions` table declared on cls itself are added after
+    the event actions for the same event.
+    """
+    inherited = set()
+    for base in cls.__bases__:
+        if issubclass(base, State):
+            inherited.update(base.__mro__)
+    own_classes = [k for k in reversed(cls.__mro__) if k not in inherited]
+
+    names = dict.fromkeys(name for k in own_classes for name in k.__dict__)
+    members = []
+    for name in names:
+        owner = next(k for k in cls.__mro__ if name in k.__dict__)
+        if owner not in inherited:
+            members.append(owner.__dict__[name])
+
+    event_actions_by_id = {}
+    for item in members:
+        if hasattr(item, event_action_attr):
+            event_id = getattr(item, event_action_attr)
+            event_actions_by_id.setdefault(event_id, []).append(
+                (item, iscoroutinefunction(item))
+            )
+    table = cls.__dict__.get("transitions")
+    if table:
+        entries = parse_transition_table(f"{cls.__name__}.transitions", table)
+        for event_id, entry in entries.items():
+            event_actions_by_id.setdefault(event_id, []).append((entry, True))
+
+    return ActionTable(
+        entry_actions=tuple(
+            (i, iscoroutinefunction(i)) for i in members if hasattr(i, entry_action_attr)
+        ),
+        exit_actions=tuple(
+            (i, iscoroutinefunction(i)) for i in members if hasattr(i, exit_action_attr)
+        ),
+        event_actions_by_id=MappingProxyType(
+            {k: tuple(v) for k, v in event_actions_by_id.items()}
+        ),
+    )
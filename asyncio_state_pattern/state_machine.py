@@ -1,25 +1,128 @@
 import asyncio
-import inspect
-from logging import Logger
-from typing import List, Type, Optional, Any
+import sys
+from time import perf_counter_ns
+from dataclasses import dataclass
+from logging import DEBUG, ERROR, WARNING, Logger
+from typing import Awaitable, Callable, ClassVar, Dict, Hashable, Iterable, List, Mapping, Set, Tuple, Type, Optional, Any
 from inspect import isclass
 
+from .deadlines import DeadlineOptions, DeadlinePolicy, DeadlineTable, create_deadline_table
+from .event import Event
+from .journal import Journal
 from .state import State
 from .logger import logger as asp_logger
+from .mailbox import Mailbox, MailboxStats, OverflowOptions, PriorityMailbox
+from .metrics import MetricsSink
+from .snapshot import SnapshotRecord, dumps, loads
+from .threadsafe import ThreadsafeInbox
+from .timer_wheel import Timer, TimerWheel
+from .tracer import Tracer
+from .transitions import TableTransition, parse_machine_transition_table
 from .types import StateInstanceOrClass
-from .state_tree import create_state_tree, StateTree
+from .state_tree import create_state_tree, BoundAction, StateNode, StateTree, TransitionPlan
 
 
 class StateMachineError(Exception):
     pass
 
 
+@dataclass(slots=True)
+class RunLoopStats:
+    """
+    Counters describing how events were drained by `StateMachine.run`.
+    """
+
+    batches: int = 0
+    """Number of batches drained, one per wakeup of the run loop."""
+
+    events: int = 0
+    """Number of events processed."""
+
+    max_batch_size: int = 0
+    """The largest number of events processed in a single batch."""
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.events / self.batches if self.batches else 0.0
+
+
 class StateMachine:
+    __slots__ = (
+        "_logger",
+        "_log_prefix",
+        "_structured_logs",
+        "_transitioning",
+        "_event_queue",
+        "_max_batch_size",
+        "_max_batch_time",
+        "_yield_every",
+        "_run_loop_stats",
+        "_running",
+        "_stopping",
+        "_state",
+        "_regions",
+        "_busy_regions",
+        "_region_tasks",
+        "_event_handlers",
+        "_typed_event_handlers",
+        "_timers",
+        "_metrics",
+        "_tracer",
+        "_trace_tid",
+        "_journal",
+        "_journal_key",
+        "_replaying",
+        "_run_actions",
+        "_deadlines",
+        "_deadline_table",
+        "_deadline_missed",
+        "_instrumented",
+        "_entered_at",
+        "_run_task",
+        "_inbox",
+        "_scheduler",
+        "_state_tree",
+        "_states",
+    )
+
+    _state_trees: ClassVar[Dict[Tuple[type, ...], StateTree]] = {}
+    """
+    Validated state trees shared by all state machines, keyed by the list of
+    state classes they were built from, followed by the state machine class if
+    it declares a `transitions` table. Ordered from least to most recently
+    used.
+    """
+
+    max_state_trees: ClassVar[int] = 1024
+    """
+    The most state trees kept in the shared cache. The least recently used
+    tree is dropped once the cache is full, so that processes creating state
+    classes dynamically don't hold on to every tree and class they built.
+    """
+
+    transitions: ClassVar[Mapping[Tuple[Type[State], Any], Any]] = {}
+    """
+    Transitions declared by a state machine subclass, keyed by (source state
+    class, event) and otherwise declared as `State.transitions` are. Entries
+    are dispatched to after the source state's own handlers and table.
+    """
+
     def __init__(
         self,
         states=List[StateInstanceOrClass],
         logger: Optional[Logger] = None,
         max_event_queue_size: int = 0,
+        priority_levels: int = 1,
+        overflow: Optional[OverflowOptions] = None,
+        structured_logs: bool = False,
+        max_batch_size: Optional[int] = None,
+        max_batch_time: Optional[float] = None,
+        yield_every: int = 0,
+        metrics: Optional[MetricsSink] = None,
+        tracer: Optional[Tracer] = None,
+        journal: Optional[Journal] = None,
+        journal_key: Optional[Hashable] = None,
+        deadlines: Optional[DeadlineOptions] = None,
     ):
         if not states:
             raise ValueError(
@@ -31,45 +134,162 @@ class StateMachine:
                 "Arg `states` - values must be an instance or subclass of State"
             )
 
+        if max_batch_size is not None and max_batch_size < 1:
+            raise ValueError("Arg `max_batch_size` - must be at least 1")
+
+        if yield_every < 0:
+            raise ValueError("Arg `yield_every` - must not be negative")
+
+        if priority_levels < 1:
+            raise ValueError("Arg `priority_levels` - must be at least 1")
+
         self._logger = logger or asp_logger
+        self._log_prefix = sys.intern(f"{self.name}:")
+        self._structured_logs = structured_logs
         self._transitioning = False
-        self._event_queue = asyncio.Queue(max_event_queue_size)
+        if priority_levels > 1:
+            self._event_queue = PriorityMailbox(
+                priority_levels, max_event_queue_size, overflow, self
+            )
+        else:
+            self._event_queue = Mailbox(max_event_queue_size, overflow, self)
+        self._max_batch_size = max_batch_size
+        self._max_batch_time = max_batch_time
+        self._yield_every = yield_every
+        self._run_loop_stats = RunLoopStats()
         self._running = False
+        self._stopping = False
         self._state: State | None = None
+        self._regions: Optional[List[int]] = None
+        self._busy_regions: Set[int] = set()
+        self._region_tasks: Optional[List[asyncio.Task]] = None
+        self._event_handlers: Mapping[Any, Tuple[BoundAction, ...]] = {}
+        self._typed_event_handlers: Tuple[Tuple[BoundAction, ...], ...] = ()
+        self._timers: Optional[Dict[Timer, int]] = None
+        self._metrics: Optional[MetricsSink] = None
+        self._tracer: Optional[Tracer] = None
+        self._trace_tid = 0
+        self._journal: Optional[Journal] = None
+        self._journal_key = journal_key
+        self._replaying = False
+        self._run_actions = True
+        self._deadlines: Optional[DeadlineOptions] = None
+        self._deadline_table: Optional[DeadlineTable] = None
+        self._deadline_missed = False
+        self._instrumented = False
+        self._entered_at: Optional[List[int]] = None
         self._run_task: Optional[asyncio.Task] = None
-        self._state_tree = self._init_states(states)
+        self._inbox: Optional[ThreadsafeInbox] = None
+        self._scheduler: Optional[Callable[["StateMachine"], None]] = None
+        self._state_tree = self._get_state_tree(states)
+        self._states = self._init_states(states)
+        self._deadlines = deadlines
+        self._deadline_table = self._get_deadline_table(deadlines)
+        self._deadline_missed = False
+        self._update_instrumented()
+        if metrics is not None:
+            self.metrics = metrics
+        if tracer is not None:
+            self.tracer = tracer
+        if journal is not None:
+            self.journal = journal
+
+    def _get_state_tree(self, states: List[StateInstanceOrClass]) -> StateTree:
+        key = tuple(s if _is_state_subclass(s) else s.__class__ for s in states)
+        transitions = type(self).transitions
+        if transitions:
+            key = (*key, type(self))
+        trees = StateMachine._state_trees
+        tree = trees.pop(key, None)
+        if tree is not None:
+            trees[key] = tree
+            return tree
 
         try:
-            self._state_tree.infer_initial_states()
-            self._state_tree.validate()
+            if transitions:
+                name = f"{type(self).__name__}.transitions"
+                tree = create_state_tree(
+                    key[:-1], parse_machine_transition_table(name, transitions)
+                )
+            else:
+                tree = create_state_tree(key)
+            tree.infer_initial_states()
+            tree.validate()
         except ValueError as e:
-            raise ValueError(f"{log_prefix(self)} {e}")
+            raise ValueError(f"{self._log_prefix} {e}")
+
+        if len(trees) >= StateMachine.max_state_trees:
+            del trees[next(iter(trees))]
+        trees[key] = tree
+        return tree
 
-    def _init_states(self, states: List[StateInstanceOrClass]) -> StateTree:
-        state_classes = map(
-            lambda s: s if _is_state_subclass(s) else s.__class__, states
+    def _get_deadline_table(
+        self, options: Optional[DeadlineOptions]
+    ) -> Optional[DeadlineTable]:
+        tree = self._state_tree
+        tables = tree.deadline_tables
+        if options in tables:
+            return tables[options]
+
+        if options is not None and options.error_state is not None:
+            if options.error_state.__name__ not in tree.nodes:
+                raise ValueError(
+                    f"{self._log_prefix} Arg `deadlines` - error state '{options.error_state.__name__}' not found"
+                )
+        table = create_deadline_table(
+            [node.state_class for node in tree.nodes_by_index], options
         )
-        tree = create_state_tree(state_classes)
+        tables[options] = table
+        return table
 
+    def _init_states(self, states: List[StateInstanceOrClass]) -> List[State]:
+        """
+        Returns this machine's state instances, indexed by `StateNode.index`.
+        Composite states inferred from their sub states are instantiated with
+        no arguments.
+        """
+        nodes = self._state_tree.nodes
+        instances: List[Optional[State]] = [None] * len(nodes)
         for s in states:
             if _is_state_instance(s):
-                node = tree.nodes[s.name]
-                node.state_instance = s
+                instances[nodes[s.name].index] = s
+            elif s._flyweight:
+                instances[nodes[s.__name__].index] = s._get_flyweight()
             else:
-                node = tree.nodes[s.__name__]
-                node.state_instance = node.state_class()
-            node.state_instance.context = self
+                instances[nodes[s.__name__].index] = s()
 
-        return tree
+        for node in nodes.values():
+            if instances[node.index] is None:
+                if node.state_class._flyweight:
+                    instances[node.index] = node.state_class._get_flyweight()
+                else:
+                    instances[node.index] = node.state_class()
+
+        for instance in instances:
+            if not instance._flyweight:
+                instance.context = self
+        return instances
 
     @property
     def state(self) -> State | None:
         """
         Returns the current state instance, or None if the state machine is
-        not started.
+        not started. While an orthogonal state is active this is the
+        orthogonal state; see `active_states` for the states of its regions.
         """
         return self._state
 
+    @property
+    def active_states(self) -> Tuple[State, ...]:
+        """
+        Returns the active leaf state of each region while an orthogonal state
+        is active, otherwise the current state. Empty if the state machine is
+        not started.
+        """
+        if self._regions is not None:
+            return tuple(self._states[index] for index in self._regions)
+        return (self._state,) if self._state else ()
+
     @property
     def state_cls(self) -> Type[State] | None:
         """
@@ -78,6 +298,98 @@ class StateMachine:
         """
         return self.state if self.state else None
 
+    @property
+    def run_loop_stats(self) -> RunLoopStats:
+        """
+        Returns counters describing how events were drained by `run`.
+        """
+        return self._run_loop_stats
+
+    @property
+    def event_queue_stats(self) -> MailboxStats:
+        """
+        Returns the size of the event queue and counters for events that were
+        coalesced, dropped, rejected or spilled to the overflow buffer.
+        """
+        return self._event_queue.stats
+
+    @property
+    def metrics(self) -> Optional[MetricsSink]:
+        """
+        The sink that receives measurements of this machine's transitions,
+        events and event queue, or None if no measurements are taken.
+        Dwell times of states that are active when a sink is attached are
+        measured from when it was attached.
+        """
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, metrics: Optional[MetricsSink]) -> None:
+        self._metrics = metrics
+        self._update_instrumented()
+        if metrics is None:
+            self._entered_at = None
+        elif self._entered_at is None:
+            self._entered_at = [perf_counter_ns()] * len(self._states)
+
+    @property
+    def tracer(self) -> Optional[Tracer]:
+        """
+        The tracer that records spans of this machine's transitions, actions
+        and events, or None if no spans are recorded.
+        """
+        return self._tracer
+
+    @tracer.setter
+    def tracer(self, tracer: Optional[Tracer]) -> None:
+        if tracer is not None and tracer is not self._tracer:
+            self._trace_tid = tracer.new_thread_id()
+        self._tracer = tracer
+        self._update_instrumented()
+
+    @property
+    def journal(self) -> Optional[Journal]:
+        """
+        The journal that each event processed by this machine is appended to,
+        with `journal_key`, or None if events are not journaled.
+        """
+        return self._journal
+
+    @journal.setter
+    def journal(self, journal: Optional[Journal]) -> None:
+        self._journal = journal
+
+    @property
+    def journal_key(self) -> Optional[Hashable]:
+        """
+        The key that identifies this machine's events in its journal, which
+        is set to the machine's key when it is added to a `MachinePool`.
+        """
+        return self._journal_key
+
+    @journal_key.setter
+    def journal_key(self, key: Optional[Hashable]) -> None:
+        self._journal_key = key
+
+    @property
+    def deadlines(self) -> Optional[DeadlineOptions]:
+        """
+        The deadlines of this machine's actions, and what to do when one is
+        missed, or None if only the deadlines declared by states apply.
+        """
+        return self._deadlines
+
+    def _update_instrumented(self) -> None:
+        # Orthogonal regions and deadlines are only handled by the
+        # instrumented paths, so that machines without them are not slowed down
+        self._instrumented = (
+            self._metrics is not None
+            or self._tracer is not None
+            or self._replaying
+            or self._state_tree.has_orthogonal_states
+            or self._deadline_table is not None
+        )
+
     @property
     def name(self) -> str:
         return self.__class__.__name__
@@ -88,112 +400,1061 @@ class StateMachine:
         """
         if self._running:
             raise StateMachineError(
-                f"{log_prefix(self)} is already running and must be stopped before running again"
+                f"{self._log_prefix} is already running and must be stopped before running again"
+            )
+        if self._scheduler:
+            raise StateMachineError(
+                f"{self._log_prefix} Cannot be run while added to a MachinePool"
             )
 
         loop = event_loop if event_loop else asyncio.get_event_loop()
+        self._inbox = ThreadsafeInbox.for_loop(loop)
         self._run_task = loop.create_task(self._run_loop())
         self._running = True
 
     async def run_once(self) -> None:
         if self._running:
             raise StateMachineError(
-                f"{log_prefix(self)} Method cannot be used in conjunction with run"
+                f"{self._log_prefix} Method cannot be used in conjunction with run"
             )
         if not self._state:
             await self.start()
         try:
-            event = await self._event_queue.get_nowait()
-            await self._state.process_event(event)
+            event = self._event_queue.get_nowait()
+            await self._process_event(event)
         except asyncio.QueueEmpty:
             pass
 
     async def stop(self) -> None:
+        """
+        Stops the state machine once the event being processed, if any, has
+        been processed. Events still queued are discarded.
+        """
         if not self._running:
-            self._logger.warning(f"{log_prefix(self)}: Already stopped")
+            self._log(WARNING, "stop_ignored", "Already stopped")
             return
         self._running = False
-        await self._event_queue.put(None)
+        self._stopping = True
+        self._event_queue.wake()
         await asyncio.wait_for(self._run_task, timeout=None)
         await self._reset()
-        self._logger.debug(f"{log_prefix(self)} Stopped")
+        self._log(DEBUG, "stopped", "Stopped")
 
     async def start(self) -> None:
         if self._state:
-            raise StateMachineError(f"{log_prefix(self)} State machine already started")
+            raise StateMachineError(f"{self._log_prefix} State machine already started")
+        if self._inbox is None:
+            self._inbox = ThreadsafeInbox.for_loop(asyncio.get_running_loop())
         initial_state = next(
-            s.name for s in self._state_tree.root_node.children if s.initial
+            s.state_class for s in self._state_tree.root_node.children if s.initial
         )
         await self._transition_to(initial_state)
 
-    async def queue_event(self, event) -> None:
-        await self._event_queue.put(event)
+    async def queue_event(
+        self, event, priority: int = 0, coalesce_key: Optional[Hashable] = None
+    ) -> None:
+        """
+        Queues an event, which is either an event id or an instance of an
+        `Event` subclass that is passed to its handlers. If the queue has
+        reached `max_event_queue_size`, the event is handled by the overflow
+        policy, which by default waits for space. Events with a higher
+        priority, between 0 and `priority_levels - 1`, are processed first.
+
+        If a coalesce key is given and an event queued with the same key is
+        still pending, that event is replaced by this one in place.
+        """
+        await self._event_queue.put(event, priority, coalesce_key)
+        if self._scheduler:
+            self._scheduler(self)
+
+    def post_event(
+        self, event, priority: int = 0, coalesce_key: Optional[Hashable] = None
+    ) -> None:
+        """
+        Queues an event without waiting. If the queue has reached
+        `max_event_queue_size`, the event is handled by the overflow policy,
+        which by default raises `asyncio.QueueFull`.
+        """
+        self._event_queue.put_nowait(event, priority, coalesce_key)
+        if self._scheduler:
+            self._scheduler(self)
+
+    def post_event_threadsafe(
+        self, event, priority: int = 0, coalesce_key: Optional[Hashable] = None
+    ) -> None:
+        """
+        Queues an event from a thread other than the one running the event
+        loop. Events posted from any thread are buffered, and moved to their
+        machines' queues by one callback on the loop per batch. If the queue
+        is full, the event is handled by the overflow policy as by
+        `post_event`, and events that are not queued are logged.
+
+        The machine must have been started, run or added to a running
+        `MachinePool`, so that it knows which loop to post to.
+        """
+        inbox = self._inbox
+        if inbox is None:
+            raise StateMachineError(
+                f"{self._log_prefix} Cannot post events from other threads before"
+                " the state machine is started"
+            )
+        inbox.post(self, event, priority, coalesce_key)
+
+    def schedule_event(
+        self,
+        delay: float,
+        event,
+        priority: int = 0,
+        state: Optional[Type[State]] = None,
+    ) -> Timer:
+        """
+        Queues an event after `delay` seconds, using the timer wheel shared by
+        all state machines on the running event loop. The returned timer can
+        be cancelled, and is cancelled automatically when `state` is exited.
+        `state` must be the current state, one of its super states or a state
+        active in one of its regions, and defaults to the current state.
+        """
+        if not self._state:
+            raise StateMachineError(
+                f"{self._log_prefix} Cannot schedule events before the state machine is started"
+            )
+        if delay < 0:
+            raise ValueError(f"{self._log_prefix} Arg `delay` - must not be negative")
+
+        if state is None:
+            index = self._state_tree.nodes[self._state.name].index
+        else:
+            active = [n for n in self._active_nodes() if n.state_class is state]
+            if not active:
+                raise ValueError(
+                    f"{self._log_prefix} Arg `state` - must be the current state, one of its super states or a state active in one of its regions"
+                )
+            index = active[0].index
+        return self._schedule_timer(delay, event, priority, index)
+
+    def snapshot(self) -> bytes:
+        """
+        Returns a snapshot of the machine's active state, the data returned
+        by `State.snapshot_data` for its states, and its queued events, which
+        can be restored into a new instance of the machine with `restore`.
+        Timers scheduled with `schedule_event` are not included. A machine
+        that has not been started is restored without being started.
+
+        See `write_snapshots` to snapshot many machines to a file.
+        """
+        return dumps(self._snapshot_record())
+
+    def restore(self, snapshot: bytes) -> None:
+        """
+        Restores a snapshot returned by `snapshot` into a machine that has not
+        been started. The snapshot's active state is made current without
+        running entry actions, and `start` is then no longer needed. Timeouts
+        of the active states are scheduled again from when the snapshot is
+        restored, so it must be restored on a running event loop if any of
+        the active states have a timeout.
+
+        Snapshots are decoded with pickle, so must only be restored from
+        trusted sources.
+        """
+        self._restore_record(loads(snapshot))
+
+    async def replay(self, events: Iterable[Any], run_actions: bool = False) -> int:
+        """
+        Rebuilds the machine's state by processing events directly, without
+        queueing them or appending them to the journal, and returns the number
+        of events processed. The machine is started first if it has not been.
+
+        Unless `run_actions` is True, transitions made while replaying change
+        the state without running entry and exit actions or scheduling
+        timeouts; timeouts of the states active at the end are then
+        scheduled. Event handlers are always run.
+
+        See `replay_journal` to replay the events of a journal.
+        """
+        await self._begin_replay(run_actions)
+        count = 0
+        try:
+            for event in events:
+                await self._process_event(event)
+                count += 1
+        finally:
+            self._end_replay()
+        return count
 
     async def transition_to(self, state: Type[State]) -> None:
         if not _is_state_subclass(state):
             raise ValueError(
-                f"{log_prefix(self)} Arg `state` - must be a subclass of State"
+                f"{self._log_prefix} Arg `state` - must be a subclass of State"
             )
 
         state_name = state.__name__
         if state_name not in self._state_tree.nodes:
-            raise ValueError(f"{log_prefix(self)} State '{state_name}' not found")
+            raise ValueError(f"{self._log_prefix} State '{state_name}' not found")
 
         if self._transitioning:
             raise StateMachineError(
-                f"{log_prefix(self)} Cannot transition while a transition is already in progress"
+                f"{self._log_prefix} Cannot transition while a transition is already in progress"
             )
 
-        await self._transition_to(state_name)
+        await self._transition_to(state)
 
     async def _run_loop(self) -> None:
         if not self._state:
             await self.start()
+        queue = self._event_queue
         while self._running:
-            event = await self._event_queue.get()
-            if event is None:
-                # Check if we've been stopped
+            if queue.empty():
+                # Woken when an event is queued or when stopped
+                await queue.wait()
                 continue
-            await self._state.process_event(event)
+            await self._drain_events(queue.get_nowait())
+            if self._running and not queue.empty():
+                # Yield between batches so other tasks are not starved
+                await asyncio.sleep(0)
+
+    async def _drain_events(self, event) -> None:
+        """
+        Processes the given event followed by any events that are ready in the
+        queue, until the queue is empty, the machine is stopped or the batch
+        size or time limits are hit.
+        """
+        queue = self._event_queue
+        if self._metrics is not None:
+            self._metrics.record_queue_depth(self, len(queue) + 1)
+        max_batch_size = self._max_batch_size
+        yield_every = self._yield_every
+        deadline = None
+        if self._max_batch_time is not None:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self._max_batch_time
+
+        count = 0
+        while True:
+            await self._process_event(event)
+            count += 1
+            if queue.empty() or count == max_batch_size or self._stopping:
+                break
+            if deadline is not None and loop.time() >= deadline:
+                break
+            if yield_every and count % yield_every == 0:
+                await asyncio.sleep(0)
+                if queue.empty() or self._stopping:
+                    break
+            event = queue.get_nowait()
+
+        stats = self._run_loop_stats
+        stats.batches += 1
+        stats.events += count
+        if count > stats.max_batch_size:
+            stats.max_batch_size = count
+
+    async def _process_event(self, event) -> bool:
+        """
+        Appends an event to the journal, if set, and dispatches it to the
+        handlers of the current state and then its super states, until one of
+        the handlers consumes the event. Instances of `Event` subclasses are
+        looked up by `Event.event_id` and passed to their handlers.
+
+        A handler that transitions ends the dispatch, and the event counts as
+        consumed, as the states the rest of the handlers belong to may have
+        been exited.
+        """
+        if self._instrumented:
+            return await self._process_event_instrumented(event)
+        if self._journal is not None:
+            self._journal.append(self._journal_key, event)
+
+        states = self._states
+        state = self._state
+        if isinstance(event, Event):
+            table = self._typed_event_handlers
+            event_id = event.event_id
+            if event_id < len(table):
+                for index, action, flyweight, is_async in table[event_id]:
+                    if flyweight:
+                        consumed = action(states[index], self, event)
+                    else:
+                        consumed = action(states[index], event)
+                    if is_async:
+                        consumed = await consumed
+                    if consumed or self._state is not state:
+                        return True
+            return False
+
+        handlers = self._event_handlers.get(event)
+        if handlers:
+            for index, action, flyweight, is_async in handlers:
+                if flyweight:
+                    consumed = action(states[index], self)
+                else:
+                    consumed = action(states[index])
+                if is_async:
+                    consumed = await consumed
+                if consumed or self._state is not state:
+                    return True
+        return False
+
+    async def _process_event_instrumented(self, event) -> bool:
+        """
+        Dispatches an event as `_process_event` does, appending it to the
+        journal unless replaying, and recording the time taken by each handler
+        and by the event as a whole with the metrics sink and tracer, if set.
+
+        While an orthogonal state is active, the event is first dispatched to
+        each of its regions, and only bubbles out to the orthogonal state and
+        its super states if no region consumed it.
+        """
+        if self._journal is not None and not self._replaying:
+            self._journal.append(self._journal_key, event)
+        metrics = self._metrics
+        tracer = self._tracer
+        if isinstance(event, Event):
+            table = self._typed_event_handlers
+            event_id = event.event_id
+            handlers = table[event_id] if event_id < len(table) else ()
+            payload = (event,)
+            name = type(event).__name__
+        else:
+            handlers = self._event_handlers.get(event, ())
+            payload = ()
+            name = str(event)
+
+        state_name = self._state.name if self._state else None
+        consumed = False
+        start = perf_counter_ns()
+        if self._regions is not None:
+            consumed = await self._dispatch_to_regions(event, payload)
+        if not consumed:
+            consumed = await self._run_handlers_instrumented(handlers, payload)
+        end = perf_counter_ns()
+        if metrics is not None:
+            metrics.record_event(self, name, (end - start) / 1e9)
+        if tracer is not None:
+            tracer.record(
+                self._trace_tid, self.name, "event", name, state_name, start, end
+            )
+        if self._deadline_missed:
+            await self._enter_error_state()
+        return consumed
+
+    async def _dispatch_to_regions(self, event, payload: Tuple[Any, ...]) -> bool:
+        """
+        Dispatches an event to the handlers of the active state of each region
+        of the current orthogonal state, out to the region's root state, and
+        returns whether any region consumed it. The regions of an independent
+        orthogonal state are dispatched to concurrently.
+        """
+        nodes = self._state_tree.nodes_by_index
+        chains = []
+        for region, index in enumerate(self._regions):
+            node = nodes[index]
+            if payload:
+                table = node.region_typed_event_handlers
+                event_id = event.event_id
+                handlers = table[event_id] if event_id < len(table) else ()
+            else:
+                handlers = node.region_event_handlers.get(event, ())
+            if handlers:
+                chains.append((region, handlers))
+        if not chains:
+            return False
+
+        state = self._state
+        if state._independent:
+            tasks = [
+                asyncio.ensure_future(
+                    self._run_handlers_instrumented(h, payload, region)
+                )
+                for region, h in chains
+            ]
+            self._region_tasks = tasks
+            try:
+                # Handlers cancelled by a sibling leaving the orthogonal state
+                # return their CancelledError
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+            finally:
+                self._region_tasks = None
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+            return any(result is True for result in results)
+
+        consumed = False
+        for region, handlers in chains:
+            if self._state is not state:
+                # A handler transitioned out of the orthogonal state
+                break
+            if await self._run_handlers_instrumented(handlers, payload, region):
+                consumed = True
+        return consumed
+
+    async def _run_handlers_instrumented(
+        self,
+        handlers: Tuple[BoundAction, ...],
+        payload: Tuple[Any, ...],
+        region: Optional[int] = None,
+    ) -> bool:
+        """
+        Calls handlers in order until one consumes the event or transitions,
+        recording the time taken by each with the metrics sink and tracer, if
+        set. If region is set, handlers are the chain of the active state of
+        that region of the current orthogonal state.
+        """
+        metrics = self._metrics
+        tracer = self._tracer
+        deadlines = self._deadline_table
+        states = self._states
+        state = self._state
+        leaf = self._regions[region] if region is not None else None
+        for index, action, flyweight, is_async in handlers:
+            handler_start = perf_counter_ns()
+            if flyweight:
+                consumed = action(states[index], self, *payload)
+            else:
+                consumed = action(states[index], *payload)
+            if is_async:
+                if deadlines is not None and (
+                    deadline := deadlines["handler"][index]
+                ) is not None:
+                    consumed = await self._await_deadline(
+                        consumed, deadline, "handler", action, index
+                    )
+                else:
+                    consumed = await consumed
+            handler_end = perf_counter_ns()
+            if metrics is not None:
+                metrics.record_handler(
+                    self, action.__qualname__, (handler_end - handler_start) / 1e9
+                )
+            if tracer is not None:
+                tracer.record(
+                    self._trace_tid,
+                    self.name,
+                    "handler",
+                    action.__qualname__,
+                    states[index].name,
+                    handler_start,
+                    handler_end,
+                )
+            if consumed or self._state is not state:
+                return True
+            if region is not None and self._regions[region] != leaf:
+                # A handler transitioned within the region
+                return True
+        return False
+
+    def _record_transition(self, plan: TransitionPlan, source: str) -> None:
+        """
+        Records the transition from the named source state and the dwell times
+        of the exited states, and notes when the entered states were entered.
+        """
+        metrics = self._metrics
+        states = self._states
+        entered_at = self._entered_at
+        now = perf_counter_ns()
+        for index in plan.exit_indices:
+            metrics.record_dwell(
+                self, states[index].name, (now - entered_at[index]) / 1e9
+            )
+        metrics.record_transition(self, source, states[plan.dest_index].name)
+        for index in plan.entry_indices:
+            entered_at[index] = now
+
+    def _schedule_timer(self, delay: float, event, priority: int, index: int) -> Timer:
+        """
+        Schedules a timer for an event that is owned by the state with the
+        given `StateNode.index`.
+        """
+        timers = self._timers
+        if timers is None:
+            timers = self._timers = {}
+        else:
+            count = len(timers)
+            if count >= 8 and not count & (count - 1):
+                # Drop fired and cancelled timers each time the count doubles
+                for timer in [t for t in timers if not t.pending]:
+                    del timers[timer]
+        timer = TimerWheel.for_loop().call_later(
+            delay, self._fire_timer, event, priority
+        )
+        timers[timer] = index
+        return timer
+
+    def _fire_timer(self, event, priority: int) -> None:
+        try:
+            self.post_event(event, priority)
+        except asyncio.QueueFull:
+            self._log(
+                ERROR,
+                "timer_event_dropped",
+                "Event queue full, dropped scheduled event %(dropped)r",
+                dropped=event,
+            )
+
+    def _cancel_timers(self, indices: Optional[Tuple[int, ...]] = None) -> None:
+        """
+        Cancels the timers owned by the states with the given indices, or all
+        timers if indices is None.
+        """
+        timers = self._timers
+        for timer, index in list(timers.items()):
+            if indices is None or index in indices or not timer.pending:
+                timer.cancel()
+                del timers[timer]
+
+    def _snapshot_record(self, key: Optional[Hashable] = None) -> SnapshotRecord:
+        if self._transitioning or self._busy_regions:
+            raise StateMachineError(
+                f"{self._log_prefix} Cannot snapshot while a transition is in progress"
+            )
+
+        data = ()
+        indices = self._state_tree.snapshot_indices
+        if indices:
+            states = self._states
+            data = tuple(
+                (states[index].name, value)
+                for index in indices
+                if (value := states[index].snapshot_data()) is not None
+            )
+        queue = self._event_queue
+        events = () if queue.empty() else tuple(queue.pending())
+        state = self._state.name if self._state else None
+        if self._regions is not None:
+            states = self._states
+            state = (state, *(states[index].name for index in self._regions))
+        return (key, state, data, events)
+
+    def _restore_record(self, record: SnapshotRecord) -> None:
+        _, state_name, data, events = record
+        if self._state:
+            raise StateMachineError(
+                f"{self._log_prefix} Cannot restore a snapshot into a started state machine"
+            )
+
+        nodes = self._state_tree.nodes
+        regions = None
+        if isinstance(state_name, tuple):
+            state_name, *region_names = state_name
+            node = nodes.get(state_name)
+            regions = [nodes.get(name) for name in region_names]
+            if (
+                node is None
+                or not node.is_orthogonal
+                or len(regions) != len(node.children)
+                or any(
+                    n is None
+                    or n.is_composite
+                    or n.orthogonal_index != node.index
+                    or n.region != i
+                    for i, n in enumerate(regions)
+                )
+            ):
+                raise ValueError(
+                    f"{self._log_prefix} Arg `snapshot` - states {(state_name, *region_names)}"
+                    " are not an orthogonal state of this machine and the active state of"
+                    " each of its regions"
+                )
+        else:
+            node = nodes.get(state_name) if state_name is not None else None
+            if state_name is not None and (node is None or node.is_composite):
+                raise ValueError(
+                    f"{self._log_prefix} Arg `snapshot` - state '{state_name}' is not a"
+                    " simple state of this machine"
+                )
+        for name, _ in data:
+            if name not in nodes:
+                raise ValueError(
+                    f"{self._log_prefix} Arg `snapshot` - state '{name}' not found"
+                )
+
+        states = self._states
+        for name, value in data:
+            states[nodes[name].index].restore_data(value)
+        if node is not None:
+            self._state = states[node.index]
+            if regions is not None:
+                self._regions = [n.index for n in regions]
+            self._event_handlers = node.event_handlers
+            self._typed_event_handlers = node.typed_event_handlers
+            active = self._active_nodes()
+            if self._entered_at is not None:
+                now = perf_counter_ns()
+                for n in active:
+                    self._entered_at[n.index] = now
+            for n in active:
+                if n.state_class._timeout:
+                    self._schedule_timer(*n.state_class._timeout, 0, n.index)
+        if events:
+            queue = self._event_queue
+            for event, priority, coalesce_key in events:
+                queue.put_nowait(event, priority, coalesce_key)
+            if self._scheduler:
+                self._scheduler(self)
+
+    async def _begin_replay(self, run_actions: bool) -> None:
+        self._replaying = True
+        self._run_actions = run_actions
+        self._update_instrumented()
+        if not self._state:
+            try:
+                await self.start()
+            except BaseException:
+                self._end_replay()
+                raise
+
+    def _end_replay(self) -> None:
+        run_actions = self._run_actions
+        self._replaying = False
+        self._run_actions = True
+        self._update_instrumented()
+        if not run_actions and self._state:
+            # Timeouts of states entered while replaying were not scheduled
+            armed = (
+                {i for t, i in self._timers.items() if t.pending} if self._timers else ()
+            )
+            for node in self._active_nodes():
+                if node.state_class._timeout and node.index not in armed:
+                    self._schedule_timer(*node.state_class._timeout, 0, node.index)
+
+    def _active_nodes(self) -> List[StateNode]:
+        """
+        Returns the nodes of the active states, outermost first, including the
+        states active in each region of the current orthogonal state.
+        """
+        if not self._state:
+            return []
+        node = self._state_tree.nodes[self._state.name]
+        active = [*node.ancestors, node]
+        if self._regions is not None:
+            nodes = self._state_tree.nodes_by_index
+            depth = len(active)
+            for index in self._regions:
+                leaf = nodes[index]
+                active.extend(leaf.ancestors[depth:])
+                active.append(leaf)
+        return active
+
+    def _log(self, level: int, event: str, msg: str, **fields: Any) -> None:
+        """
+        Logs a message prefixed with the machine's name. The message is only
+        formatted with fields if the level is enabled. With structured logs
+        enabled, a dict of the machine name, event name and fields is logged
+        instead of a message.
+        """
+        if not self._logger.isEnabledFor(level):
+            return
+        if self._structured_logs:
+            self._logger.log(level, {"machine": self.name, "event": event, **fields})
+        elif fields:
+            self._logger.log(level, f"{self._log_prefix} {msg}", fields)
+        else:
+            self._logger.log(level, f"{self._log_prefix} {msg}")
 
     async def _reset(self):
         self._state = None
+        self._regions = None
+        self._busy_regions.clear()
+        self._region_tasks = None
+        self._deadline_missed = False
+        self._event_handlers = {}
+        self._typed_event_handlers = ()
+        if self._timers:
+            self._cancel_timers()
         self._transitioning = False
         self._running = False
-        while not self._event_queue.empty():
-            self._event_queue.get_nowait()
+        self._stopping = False
+        self._event_queue.clear()
 
-    async def _transition_to(self, state_name: str):
-        dest_node = self._state_tree.nodes[state_name]
-        if dest_node.is_composite:
-            dest_node = dest_node.find_innermost_initial_sub_state()
+    def _get_transition_plan(self, source: Any, dest: Type[State]) -> TransitionPlan:
+        plans = self._state_tree.transition_plans
+        plan = plans.get((source, dest))
+        if plan is None:
+            plan = _compile_transition_plan(source, dest, self._state_tree)
+            plans[(source, dest)] = plan
+        return plan
 
+    async def _transition_to(
+        self, state: Type[State], plan: Optional[TransitionPlan] = None
+    ) -> bool:
+        """
+        Transitions to state, using the given plan if it is known to be the
+        plan from the current state. Returns True, see `_take_table_transition`.
+        """
+        if self._instrumented:
+            await self._transition_instrumented(state)
+            return True
+        if plan is None:
+            source = self._state.__class__ if self._state else None
+            plan = self._state_tree.transition_plans.get((source, state))
+            if plan is None:
+                plan = self._get_transition_plan(source, state)
+
+        states = self._states
         self._transitioning = True
         try:
-            if not self._state:
-                self._logger.debug(f"{self.name}: [*] -> {state_name}")
-            else:
-                self._logger.debug(f"{self.name}: {self._state.name} -> {state_name}")
-                exit_states_classes = _get_transition_exit_states(
-                    self._state.__class__, dest_node.state_class, self._state_tree
-                )
-                for exit_state_cls in exit_states_classes:
-                    await self._state_tree.nodes[
-                        exit_state_cls.__name__
-                    ].state_instance.exit()
-
-            entry_state_classes = _get_transition_entry_states(
-                source=self._state.__class__ if self._state else None,
-                dest=dest_node.state_class,
-                tree=self._state_tree,
-            )
-            self._state = dest_node.state_instance
-            for entry_state in entry_state_classes:
-                await self._state_tree.nodes[
-                    entry_state.__name__
-                ].state_instance.enter()
+            if self._logger.isEnabledFor(DEBUG):
+                self._log_transition(state)
+            if self._state:
+                for index, action, flyweight, is_async in plan.exit_actions:
+                    if flyweight:
+                        result = action(states[index], self)
+                    else:
+                        result = action(states[index])
+                    if is_async:
+                        await result
+                if self._timers:
+                    self._cancel_timers(plan.exit_indices)
+
+            self._state = states[plan.dest_index]
+            self._event_handlers = plan.dest_event_handlers
+            self._typed_event_handlers = plan.dest_typed_event_handlers
+            for index, action, flyweight, is_async in plan.entry_actions:
+                if flyweight:
+                    result = action(states[index], self)
+                else:
+                    result = action(states[index])
+                if is_async:
+                    await result
+            for index, delay, event in plan.entry_timeouts:
+                self._schedule_timer(delay, event, 0, index)
         finally:
             self._transitioning = False
+        return True
+
+    def _take_table_transition(
+        self, transition: TableTransition, index: int
+    ) -> Awaitable[bool]:
+        """
+        Returns the transition to the destination at index of a `transitions`
+        table entry, which resolves to True so that it can be returned as the
+        result of the entry when called as a handler.
+
+        If the entry is bound to the current state as its source, the plan
+        to the destination is cached on the entry, and the transition is made
+        without looking it up.
+        """
+        if self._transitioning:
+            raise StateMachineError(
+                f"{self._log_prefix} Cannot transition while a transition is already in progress"
+            )
+        dest = transition.targets[index][0]
+        source = transition.source
+        if source is not None and self._state.__class__ is source:
+            plan = transition.plans[index]
+            if plan is None:
+                plan = transition.plans[index] = self._get_transition_plan(source, dest)
+            return self._transition_to(dest, plan)
+        if isinstance(dest, str):
+            # Unbound entries are only called through `State.process_event`
+            dest = self._state_tree.nodes[dest].state_class
+        return self._transition_to(dest)
+
+    async def _transition_instrumented(self, state: Type[State]) -> None:
+        """
+        Makes a transition as `_transition_to` does, recording it with the
+        metrics sink, and recording spans for it and each of its actions with
+        the tracer, if set. Actions and timeouts are skipped while replaying
+        without `run_actions`.
+
+        While an orthogonal state is active, a transition to a state in one
+        of its regions only changes that region, and a transition to the
+        orthogonal state (or to a super state whose initial sub states lead
+        to it) returns each region to its initial state.
+        Transitions in different regions may be in progress at once. A
+        transition out of an independent orthogonal state first cancels the
+        handlers that other regions are still running for the current event.
+        """
+        regions = self._regions
+        if regions is None:
+            source = self._state.__class__ if self._state else None
+            plan = self._get_transition_plan(source, state)
+            await self._apply_transition(state, plan)
+            return
+
+        nodes = self._state_tree.nodes
+        orthogonal = nodes[self._state.name]
+        node = nodes[state.__name__]
+        if node.orthogonal_index == orthogonal.index:
+            await self._transition_region(node.region, state)
+        elif node.find_innermost_initial_sub_state() is orthogonal:
+            # The orthogonal state stays active, so only its regions change
+            for region in orthogonal.children:
+                await self._transition_region(region.region, region.state_class)
+        else:
+            await self._cancel_region_handlers()
+            if self._busy_regions:
+                raise StateMachineError(
+                    f"{self._log_prefix} Cannot transition while a transition is already in progress"
+                )
+            states = self._states
+            source = (orthogonal.state_class, *(states[i].__class__ for i in regions))
+            plan = self._get_transition_plan(source, state)
+            await self._apply_transition(state, plan)
+
+    async def _cancel_region_handlers(self) -> None:
+        """
+        Cancels the handlers of an independent orthogonal state's regions that
+        are still running for the current event, other than the caller's, and
+        waits for them to finish, so that none resumes on exited states.
+        """
+        tasks = self._region_tasks
+        if not tasks:
+            return
+        current = asyncio.current_task()
+        running = [t for t in tasks if t is not current and not t.done()]
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.wait(running)
+
+    async def _transition_region(self, region: int, state: Type[State]) -> None:
+        """
+        Transitions the given region of the current orthogonal state to a
+        state in the region.
+        """
+        if region in self._busy_regions:
+            raise StateMachineError(
+                f"{self._log_prefix} Cannot transition while a transition is already in progress"
+            )
+        source = self._states[self._regions[region]].__class__
+        plan = self._get_transition_plan(source, state)
+        await self._apply_transition(state, plan, region)
+
+    async def _apply_transition(
+        self, state: Type[State], plan: TransitionPlan, region: Optional[int] = None
+    ) -> None:
+        """
+        Makes the transition described by plan, changing only the active state
+        of the given region of the current orthogonal state if region is set.
+        """
+        tracer = self._tracer
+        run_actions = self._run_actions
+        start = perf_counter_ns()
+        states = self._states
+        if region is None:
+            started = self._state is not None
+            source = self._state.name if started else "[*]"
+            self._transitioning = True
+        else:
+            started = True
+            source = states[self._regions[region]].name
+            self._busy_regions.add(region)
+        try:
+            if self._logger.isEnabledFor(DEBUG):
+                self._log_transition(state, source)
+            if started:
+                if run_actions:
+                    await self._run_actions_instrumented(plan.exit_actions, "exit")
+                if self._timers:
+                    self._cancel_timers(plan.exit_indices)
+
+            if self._metrics is not None:
+                self._record_transition(plan, source)
+            if region is None:
+                self._state = states[plan.dest_index]
+                self._regions = list(plan.dest_region_indices) or None
+                self._event_handlers = plan.dest_event_handlers
+                self._typed_event_handlers = plan.dest_typed_event_handlers
+            else:
+                self._regions[region] = plan.dest_index
+            if run_actions:
+                await self._run_actions_instrumented(plan.entry_actions, "entry")
+                for index, delay, event in plan.entry_timeouts:
+                    self._schedule_timer(delay, event, 0, index)
+        finally:
+            if region is None:
+                self._transitioning = False
+            else:
+                self._busy_regions.discard(region)
+        if tracer is not None:
+            name = f"{source} -> {states[plan.dest_index].name}"
+            tracer.record(
+                self._trace_tid,
+                self.name,
+                "transition",
+                name,
+                None,
+                start,
+                perf_counter_ns(),
+            )
+        if self._deadline_missed:
+            await self._enter_error_state()
+
+    async def _run_actions_instrumented(
+        self, actions: Tuple[BoundAction, ...], category: str
+    ) -> None:
+        tracer = self._tracer
+        deadlines = self._deadline_table
+        states = self._states
+        for index, action, flyweight, is_async in actions:
+            start = perf_counter_ns()
+            if flyweight:
+                result = action(states[index], self)
+            else:
+                result = action(states[index])
+            if is_async:
+                if deadlines is not None and (
+                    deadline := deadlines[category][index]
+                ) is not None:
+                    await self._await_deadline(result, deadline, category, action, index)
+                else:
+                    await result
+            if tracer is not None:
+                tracer.record(
+                    self._trace_tid,
+                    self.name,
+                    category,
+                    action.__qualname__,
+                    states[index].name,
+                    start,
+                    perf_counter_ns(),
+                )
+
+    async def _await_deadline(
+        self, awaitable, deadline: float, kind: str, action: Any, index: int
+    ) -> Any:
+        """
+        Awaits a coroutine action, cancelling it if it takes longer than
+        deadline seconds, and returns its result, or True if it was cancelled.
+
+        The deadline is a timer on the timer wheel shared by the event loop,
+        which cancels the current task when it fires, rather than a task
+        wrapping the action. Deadlines are therefore enforced up to one tick
+        of the wheel late.
+        """
+        task = asyncio.current_task()
+        cancelling = getattr(task, "cancelling", None)
+        cancels = cancelling() if cancelling is not None else 0
+        timer = TimerWheel.for_loop().call_later(deadline, task.cancel)
+        try:
+            result = await awaitable
+        except asyncio.CancelledError:
+            if timer.pending:
+                # Cancelled by something other than the deadline
+                timer.cancel()
+                raise
+            if _withdraw_cancel(task, cancels):
+                raise
+        else:
+            if timer.pending:
+                timer.cancel()
+                return result
+            # The action caught the cancellation and returned anyway
+            if _withdraw_cancel(task, cancels):
+                raise asyncio.CancelledError()
+        self._deadline_exceeded(kind, action, index, deadline)
+        return True
+
+    def _deadline_exceeded(self, kind: str, action: Any, index: int, deadline: float) -> None:
+        name = action.__qualname__
+        if self._metrics is not None:
+            self._metrics.record_deadline_miss(self, kind, name)
+        self._log(
+            WARNING,
+            "deadline_missed",
+            "%(kind)s action %(action)s of %(state)s missed its deadline of %(deadline)gs and was cancelled",
+            kind=kind,
+            action=name,
+            state=self._states[index].name,
+            deadline=deadline,
+        )
+        options = self._deadlines
+        if options is not None and options.policy is DeadlinePolicy.ERROR_STATE:
+            self._deadline_missed = True
+
+    async def _enter_error_state(self) -> None:
+        """
+        Transitions to the error state after a missed deadline, unless a
+        transition is still in progress, in which case it is entered once
+        that transition is done.
+        """
+        if self._transitioning or self._busy_regions:
+            return
+        self._deadline_missed = False
+        await self._transition_to(self._deadlines.error_state)
+
+    def _log_transition(self, state: Type[State], source: Optional[str] = None) -> None:
+        if source is None:
+            source = self._state.name if self._state else "[*]"
+        self._log(
+            DEBUG,
+            "transition",
+            "%(source)s -> %(dest)s",
+            source=source,
+            dest=state.__name__,
+        )
+
+
+def _compile_transition_plan(source: Any, dest: Type[State], tree: StateTree) -> TransitionPlan:
+    """
+    Resolves the leaf destination state and the exit and entry chains for a
+    transition from source to dest.
+
+    The source is a tuple of an orthogonal state and the active state in each
+    of its regions while the orthogonal state is active, and the chain of
+    each region is exited, last region first, before the orthogonal state.
+    When an orthogonal state is entered, the chain into each of its regions
+    is entered, first region first, after it.
+    """
+    nodes = tree.nodes
+    dest_node = nodes[dest.__name__].find_innermost_initial_sub_state()
+
+    exit_nodes = []
+    if isinstance(source, tuple):
+        source, *source_regions = source
+        for leaf in reversed(source_regions):
+            exit_nodes.extend(
+                nodes[cls.__name__]
+                for cls in _get_transition_exit_states(leaf, source, tree)
+            )
+    if source is not None:
+        exit_nodes.extend(
+            nodes[cls.__name__]
+            for cls in _get_transition_exit_states(source, dest_node.state_class, tree)
+        )
+    entry_nodes = [
+        nodes[cls.__name__]
+        for cls in _get_transition_entry_states(source, dest_node.state_class, tree)
+    ]
+
+    region_indices: Tuple[int, ...] = ()
+    if dest_node.is_orthogonal:
+        orthogonal = dest_node
+    elif dest_node.orthogonal_index >= 0:
+        orthogonal = tree.nodes_by_index[dest_node.orthogonal_index]
+    else:
+        orthogonal = None
+    if orthogonal is not None and orthogonal in entry_nodes:
+        # Enter every region, following the chain into dest's region
+        position = entry_nodes.index(orthogonal) + 1
+        dest_chain = entry_nodes[position:]
+        del entry_nodes[position:]
+        for region in orthogonal.children:
+            if dest_chain and dest_chain[0] is region:
+                chain = dest_chain
+            else:
+                leaf = region.find_innermost_initial_sub_state()
+                chain = [*leaf.ancestors[len(region.ancestors) :], leaf]
+            entry_nodes.extend(chain)
+            region_indices += (chain[-1].index,)
+        dest_node = orthogonal
+
+    return TransitionPlan(
+        exit_indices=tuple(n.index for n in exit_nodes),
+        entry_indices=tuple(n.index for n in entry_nodes),
+        dest_index=dest_node.index,
+        dest_event_handlers=dest_node.event_handlers,
+        dest_typed_event_handlers=dest_node.typed_event_handlers,
+        dest_region_indices=region_indices,
+        exit_actions=tuple(a for n in exit_nodes for a in n.exit_actions),
+        entry_actions=tuple(a for n in entry_nodes for a in n.entry_actions),
+        entry_timeouts=tuple(
+            (n.index, *n.state_class._timeout)
+            for n in entry_nodes
+            if n.state_class._timeout
+        ),
+    )
 
 
 def _get_transition_exit_states(
@@ -231,8 +1492,18 @@ def _diff_state_hierarchies(
     return []
 
 
-def log_prefix(sm: StateMachine) -> str:
-    return f"{sm.name}.{inspect.stack()[1][3]}:"
+def _withdraw_cancel(task: asyncio.Task, cancels: int) -> bool:
+    """
+    Withdraws the cancellation requested by a deadline's timer, and returns
+    whether the task was also cancelled by something else since it had
+    `cancels` cancellations pending. Before Python 3.11, tasks don't count
+    cancellations, so other cancellations can't be told apart and False is
+    returned.
+    """
+    uncancel = getattr(task, "uncancel", None)
+    if uncancel is None:
+        return False
+    return uncancel() > cancels
 
 
 def _is_state_instance_or_subclass(s: Any) -> bool:
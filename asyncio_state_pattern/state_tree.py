@@ -1,11 +1,22 @@
 from dataclasses import dataclass, field
-from typing import List, Type, Optional, Dict
+from inspect import iscoroutinefunction
+from types import MappingProxyType
+from typing import Any, List, Type, Dict, Mapping, Optional, Tuple
 
-from .state import State
+from .event import Event
+from .state import Action, State
 from .constants import initial_state_attr
+from .transitions import TableTransition
 
+BoundAction = Tuple[int, Action, bool, bool]
+"""
+An action, the `StateNode.index` of the state that declared it, whether the
+action is called with the state machine as an argument, and whether it is a
+coroutine function that must be awaited.
+"""
 
-@dataclass
+
+@dataclass(slots=True)
 class StateNode:
     name: str
     """The name of the state."""
@@ -13,8 +24,11 @@ class StateNode:
     state_class: Type[State]
     """The state class type."""
 
-    state_instance: Optional[Type[State]] = None
-    """Instance of the state class."""
+    index: int = -1
+    """
+    Position of the node in `StateTree.nodes`, used by state machines to look
+    up their own instance of the state class.
+    """
 
     initial: bool = False
     """
@@ -32,6 +46,53 @@ class StateNode:
     ordered with the root state first and the immediate parent last.
     """
 
+    region: int = -1
+    """
+    If the state is in a region of an orthogonal state, the position of the
+    region among the orthogonal state's children, otherwise -1.
+    """
+
+    orthogonal_index: int = -1
+    """
+    If the state is in a region of an orthogonal state, the `index` of the
+    orthogonal state, otherwise -1.
+    """
+
+    event_handlers: Mapping[Any, Tuple[BoundAction, ...]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    """
+    Maps each event id to the handlers for it while this state is active,
+    ordered from this state out to the root state.
+    """
+
+    typed_event_handlers: Tuple[Tuple[BoundAction, ...], ...] = ()
+    """
+    The handlers for each `Event` subclass while this state is active, indexed
+    by `Event.event_id` and ordered from this state out to the root state. Ids
+    beyond the end of the tuple have no handlers.
+    """
+
+    region_event_handlers: Mapping[Any, Tuple[BoundAction, ...]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    """
+    Like `event_handlers`, but only ordered out to the root of the state's
+    region, for states in a region of an orthogonal state.
+    """
+
+    region_typed_event_handlers: Tuple[Tuple[BoundAction, ...], ...] = ()
+    """
+    Like `typed_event_handlers`, but only ordered out to the root of the
+    state's region, for states in a region of an orthogonal state.
+    """
+
+    entry_actions: Tuple[BoundAction, ...] = ()
+    """The actions run when this state is entered."""
+
+    exit_actions: Tuple[BoundAction, ...] = ()
+    """The actions run when this state is exited."""
+
     @property
     def is_composite(self) -> bool:
         return len(self.children) > 0
@@ -40,11 +101,18 @@ class StateNode:
     def is_simple(self) -> bool:
         return len(self.children) == 0
 
+    @property
+    def is_orthogonal(self) -> bool:
+        return self.state_class._orthogonal
+
     def infer_initial_states(self) -> None:
         if self.is_simple:
             return
 
-        if not any([child.initial for child in self.children]):
+        if self.is_orthogonal:
+            # Every region is entered, so none is the initial sub state
+            pass
+        elif not any([child.initial for child in self.children]):
             if self.state_class is State or len(self.children) == 1:
                 self.children[0].initial = True
             else:
@@ -56,7 +124,9 @@ class StateNode:
             child.infer_initial_states()
 
     def validate(self) -> None:
-        if self.is_composite:
+        if self.is_orthogonal:
+            self._validate_orthogonal()
+        elif self.is_composite:
             self._validate_composite()
 
         for node in self.children:
@@ -74,13 +144,71 @@ class StateNode:
                 f"Composite state '{self.name}' has multiple sub states declared as the initial state. Only one initial sub state is allowed. See conflicting state declarations: {', '.join([s.name for s in initial_sub_states])}"
             )
 
-    def find_innermost_initial_sub_state(self) -> Optional["StateNode"]:
-        if self.is_simple and self.initial:
-            return self
-        for child in self.children:
-            if found := child.find_innermost_initial_sub_state():
-                return found
-        return None
+    def _validate_orthogonal(self) -> None:
+        if self.is_simple:
+            raise ValueError(
+                f"Orthogonal state '{self.name}' has no regions. Declare each region as a sub state of '{self.name}'"
+            )
+
+        if self.orthogonal_index >= 0:
+            raise ValueError(
+                f"Orthogonal state '{self.name}' cannot be declared inside a region of another orthogonal state"
+            )
+
+    def find_innermost_initial_sub_state(self) -> "StateNode":
+        """
+        Follows the initial sub states of this state down to a simple state,
+        or to an orthogonal state, whose regions are all entered.
+        """
+        node = self
+        while node.is_composite and not node.is_orthogonal:
+            node = next(child for child in node.children if child.initial)
+        return node
+
+
+@dataclass(frozen=True, slots=True)
+class TransitionPlan:
+    """
+    Precompiled steps for a transition between a source and destination state.
+    States are referenced by `StateNode.index` so that a plan can be shared by
+    every state machine built from the same tree.
+    """
+
+    exit_indices: Tuple[int, ...]
+    """States to exit, ordered from the source leaf outwards."""
+
+    entry_indices: Tuple[int, ...]
+    """States to enter, ordered from the outermost state inwards."""
+
+    dest_index: int
+    """
+    The resolved leaf state that is active after the transition, or the
+    orthogonal state whose regions are active after it.
+    """
+
+    dest_event_handlers: Mapping[Any, Tuple[BoundAction, ...]]
+    """The event handlers of the resolved destination state."""
+
+    dest_typed_event_handlers: Tuple[Tuple[BoundAction, ...], ...] = ()
+    """The typed event handlers of the resolved destination state."""
+
+    dest_region_indices: Tuple[int, ...] = ()
+    """
+    If the resolved destination is an orthogonal state, the leaf state that
+    is active in each of its regions after the transition.
+    """
+
+    exit_actions: Tuple[BoundAction, ...] = ()
+    """The exit actions of the states in `exit_indices`, in order."""
+
+    entry_actions: Tuple[BoundAction, ...] = ()
+    """The entry actions of the states in `entry_indices`, in order."""
+
+    entry_timeouts: Tuple[Tuple[int, float, Any], ...] = ()
+    """
+    The index, timeout and timeout event of each state in `entry_indices`
+    that was declared with a timeout.
+    """
 
 
 @dataclass
@@ -89,6 +217,32 @@ class StateTree:
         default_factory=lambda: StateNode(name=State.__name__, state_class=State)
     )
     nodes: Dict[str, StateNode] = field(default_factory=dict)
+    nodes_by_index: List[StateNode] = field(default_factory=list)
+    """The nodes of `nodes`, indexed by `StateNode.index`."""
+
+    transition_plans: Dict[Tuple[Any, Type[State]], TransitionPlan] = field(
+        default_factory=dict
+    )
+    """
+    Transition plans keyed by (source, dest) state class, compiled on first
+    use. While an orthogonal state is active, the source is a tuple of the
+    orthogonal state's class and the class of the active state in each region.
+    """
+
+    has_orthogonal_states: bool = False
+    """Whether any state in the tree was declared with `orthogonal=True`."""
+
+    deadline_tables: Dict[Any, Any] = field(default_factory=dict)
+    """
+    The `DeadlineTable` of the tree's states for each `DeadlineOptions` used by
+    a state machine, or None if no action has a deadline, built on first use.
+    """
+
+    snapshot_indices: Tuple[int, ...] = ()
+    """
+    The `StateNode.index` of each non-flyweight state whose class overrides
+    `State.snapshot_data`, and so may have data to save in snapshots.
+    """
 
     def infer_initial_states(self) -> None:
         """
@@ -106,19 +260,44 @@ class StateTree:
         self.root_node.validate()
 
 
-def create_state_tree(state_classes: List[Type[State]]) -> StateTree:
+def create_state_tree(
+    state_classes: List[Type[State]],
+    transitions: Optional[Mapping[Type[State], Mapping[Any, TableTransition]]] = None,
+) -> StateTree:
     """
     Creates a tree of StateNodes from the given list of state classes.
+    Entries of a state machine's `transitions` table are added to the event
+    handlers of their source state, after the state's own handlers.
     """
     tree = StateTree()
+    transitions = transitions or {}
 
     for state_class in state_classes:
-        _add_state_to_tree(state_class, tree)
+        _add_state_to_tree(state_class, tree, transitions)
+
+    for state_class in transitions:
+        node = tree.nodes.get(state_class.__name__)
+        if node is None or node.state_class is not state_class:
+            raise ValueError(f"State '{state_class.__name__}' not found")
 
+    _bind_table_transitions(tree)
+    tree.has_orthogonal_states = any(
+        node.is_orthogonal for node in tree.nodes_by_index
+    )
+    tree.snapshot_indices = tuple(
+        node.index
+        for node in tree.nodes.values()
+        if not node.state_class._flyweight
+        and node.state_class.snapshot_data is not State.snapshot_data
+    )
     return tree
 
 
-def _add_state_to_tree(state_class: Type[State], tree: StateTree) -> None:
+def _add_state_to_tree(
+    state_class: Type[State],
+    tree: StateTree,
+    transitions: Mapping[Type[State], Mapping[Any, TableTransition]],
+) -> None:
     """
     Adds a node to the tree for the given state class, and adds nodes for any
     ancestor states that are not already in the tree.
@@ -130,19 +309,163 @@ def _add_state_to_tree(state_class: Type[State], tree: StateTree) -> None:
         if existing_node:
             parent = existing_node
             continue
-        node = StateNode(name=cls.__name__, state_class=cls)
+        node = StateNode(name=cls.__name__, state_class=cls, index=len(tree.nodes))
         if hasattr(cls, initial_state_attr):
             node.initial = cls.__name__ in getattr(cls, initial_state_attr)
 
         if parent:
             node.ancestors = [*parent.ancestors, parent]
+            if parent.is_orthogonal:
+                node.region = len(parent.children)
+                node.orthogonal_index = parent.index
+            else:
+                node.region = parent.region
+                node.orthogonal_index = parent.orthogonal_index
             parent.children.append(node)
         else:
             tree.root_node.children.append(node)
+        own_handlers = _bind_event_actions(node, transitions.get(cls, {}))
+        node.event_handlers = _create_event_handlers(
+            own_handlers, parent.event_handlers if parent else {}
+        )
+        node.typed_event_handlers = _create_typed_event_handlers(
+            own_handlers, parent.typed_event_handlers if parent else ()
+        )
+        if node.region >= 0:
+            # The handlers of the region's root state end the region's chain
+            in_region = not parent.is_orthogonal
+            node.region_event_handlers = _create_event_handlers(
+                own_handlers, parent.region_event_handlers if in_region else {}
+            )
+            node.region_typed_event_handlers = _create_typed_event_handlers(
+                own_handlers, parent.region_typed_event_handlers if in_region else ()
+            )
+        node.entry_actions = _bind_actions(node, "enter")
+        node.exit_actions = _bind_actions(node, "exit")
         tree.nodes[node.name] = node
+        tree.nodes_by_index.append(node)
         parent = node
 
 
+def _bind_actions(node: StateNode, method: str) -> Tuple[BoundAction, ...]:
+    """
+    Returns the entry or exit actions of node's state class, as named by
+    method. If the state class overrides `State.enter` or `State.exit`, the
+    override is called instead, unless the state is a flyweight.
+    """
+    cls = node.state_class
+    override = getattr(cls, method)
+    if not cls._flyweight and override is not getattr(State, method):
+        return ((node.index, override, False, iscoroutinefunction(override)),)
+
+    if method == "enter":
+        actions = cls._action_table.entry_actions
+    else:
+        actions = cls._action_table.exit_actions
+    return tuple(
+        (node.index, action, cls._flyweight, is_async) for action, is_async in actions
+    )
+
+
+def _bind_event_actions(
+    node: StateNode, transitions: Mapping[Any, TableTransition]
+) -> Dict[Any, Tuple[BoundAction, ...]]:
+    """
+    Returns the event handlers of node's state class by event id, followed by
+    the given entries of a state machine's `transitions` table for the state.
+    """
+    action_table = node.state_class._action_table
+    flyweight = node.state_class._flyweight
+    handlers = {
+        event_id: tuple(
+            (node.index, action, flyweight, is_async) for action, is_async in actions
+        )
+        for event_id, actions in action_table.event_actions_by_id.items()
+    }
+    for event_id, entry in transitions.items():
+        handlers[event_id] = handlers.get(event_id, ()) + (
+            (node.index, entry, flyweight, True),
+        )
+    return handlers
+
+
+def _create_event_handlers(
+    own_handlers: Mapping[Any, Tuple[BoundAction, ...]],
+    parent_handlers: Mapping[Any, Tuple[BoundAction, ...]],
+) -> Mapping[Any, Tuple[BoundAction, ...]]:
+    """
+    Returns the given event handlers of a state followed by the given event
+    handlers of its parent, so that unconsumed events bubble outwards.
+    """
+    handlers = {
+        event_id: actions
+        for event_id, actions in own_handlers.items()
+        if not _is_event_subclass(event_id)
+    }
+    for event_id, actions in parent_handlers.items():
+        handlers[event_id] = handlers.get(event_id, ()) + actions
+    return MappingProxyType(handlers)
+
+
+def _create_typed_event_handlers(
+    own_handlers: Mapping[Any, Tuple[BoundAction, ...]],
+    parent_handlers: Tuple[Tuple[BoundAction, ...], ...],
+) -> Tuple[Tuple[BoundAction, ...], ...]:
+    """
+    Returns the given handlers of a state followed by the given handlers of
+    its parent for each `Event` subclass, indexed by `Event.event_id`. The
+    tuple only extends to the highest id that has a handler.
+    """
+    handlers = list(parent_handlers)
+    for event_cls, actions in own_handlers.items():
+        if not _is_event_subclass(event_cls):
+            continue
+        event_id = event_cls.event_id
+        if event_id >= len(handlers):
+            handlers.extend(() for _ in range(event_id + 1 - len(handlers)))
+        handlers[event_id] = actions + handlers[event_id]
+    return tuple(handlers)
+
+
+def _bind_table_transitions(tree: StateTree) -> None:
+    """
+    Replaces each `TableTransition` in the event handlers of the tree's nodes
+    with a copy bound to the tree. Copies in the handlers of a simple state
+    outside any region are bound with that state as their source, as it is
+    the only state they can be dispatched to from.
+    """
+
+    def bind(actions: Tuple[BoundAction, ...], source: Any) -> Tuple[BoundAction, ...]:
+        if not any(isinstance(action, TableTransition) for _, action, _, _ in actions):
+            return actions
+        return tuple(
+            (index, action.bind(tree.nodes, source), flyweight, is_async)
+            if isinstance(action, TableTransition)
+            else (index, action, flyweight, is_async)
+            for index, action, flyweight, is_async in actions
+        )
+
+    for node in tree.nodes_by_index:
+        source = node.state_class if node.is_simple and node.region < 0 else None
+        node.event_handlers = MappingProxyType(
+            {k: bind(v, source) for k, v in node.event_handlers.items()}
+        )
+        node.typed_event_handlers = tuple(
+            bind(v, source) for v in node.typed_event_handlers
+        )
+        if node.region >= 0:
+            node.region_event_handlers = MappingProxyType(
+                {k: bind(v, None) for k, v in node.region_event_handlers.items()}
+            )
+            node.region_typed_event_handlers = tuple(
+                bind(v, None) for v in node.region_typed_event_handlers
+            )
+
+
+def _is_event_subclass(event_id: Any) -> bool:
+    return isinstance(event_id, type) and issubclass(event_id, Event)
+
+
 def _get_state_hierarchy(cls: Type[State]) -> List[Type[State]]:
     """
     Returns a list containing cls and all ancestor state classes, ordered by
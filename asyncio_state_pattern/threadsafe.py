@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from logging import ERROR
+from typing import Any, Hashable, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from .logger import logger as asp_logger
+
+
+class ThreadsafeInbox:
+    """
+    Moves events posted from other threads to the event queues of state
+    machines running on an event loop.
+
+    Events are appended to a buffer under a lock, and the first event put in
+    an empty buffer schedules a single callback on the loop, which moves
+    every buffered event to its machine's queue. Posting an event therefore
+    costs a lock and an append rather than a future and a wakeup of the
+    loop, however many events arrive before the loop runs the callback.
+    """
+
+    __slots__ = ("_loop", "_lock", "_items", "_scheduled", "_logger", "__weakref__")
+
+    _inboxes: "WeakKeyDictionary[asyncio.AbstractEventLoop, ThreadsafeInbox]" = (
+        WeakKeyDictionary()
+    )
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._items: List[Tuple[Any, Any, int, Optional[Hashable]]] = []
+        self._scheduled = False
+        self._logger = asp_logger
+
+    @classmethod
+    def for_loop(cls, loop: asyncio.AbstractEventLoop) -> "ThreadsafeInbox":
+        """
+        Returns the inbox shared by everything running on loop. Must be called
+        from the loop's thread.
+        """
+        inbox = cls._inboxes.get(loop)
+        if inbox is None:
+            inbox = cls._inboxes[loop] = cls(loop)
+        return inbox
+
+    def post(
+        self,
+        machine: Any,
+        event: Any,
+        priority: int = 0,
+        coalesce_key: Optional[Hashable] = None,
+    ) -> None:
+        """Queues an event for machine from any thread."""
+        with self._lock:
+            self._items.append((machine, event, priority, coalesce_key))
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            self._loop.call_soon_threadsafe(self._deliver)
+        except RuntimeError:
+            # The loop is closed
+            with self._lock:
+                self._scheduled = False
+            raise
+
+    def _deliver(self) -> None:
+        with self._lock:
+            items = self._items
+            self._items = []
+            self._scheduled = False
+        for machine, event, priority, coalesce_key in items:
+            try:
+                machine.post_event(event, priority, coalesce_key)
+            except asyncio.QueueFull:
+                machine._log(
+                    ERROR,
+                    "threadsafe_event_dropped",
+                    "Event queue full, dropped event %(dropped)r",
+                    dropped=event,
+                )
+            except Exception:
+                self._logger.exception(
+                    f"{machine._log_prefix} Failed to queue event {event!r}"
+                )
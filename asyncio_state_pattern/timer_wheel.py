@@ -0,0 +1,208 @@
+import asyncio
+from math import ceil
+from typing import Any, Callable, Dict, List, Optional
+from weakref import WeakKeyDictionary
+
+from .logger import logger as asp_logger
+
+_BITS = 6
+_SIZE = 1 << _BITS
+_MASK = _SIZE - 1
+_LEVELS = 4
+_SPAN = 1 << (_BITS * _LEVELS)
+"""The number of ticks covered by all levels of a wheel."""
+
+
+class Timer:
+    """
+    A callback scheduled on a `TimerWheel`.
+    """
+
+    __slots__ = ("tick", "_callback", "_args", "_wheel", "_slot")
+
+    def __init__(
+        self, tick: int, callback: Callable[..., Any], args: tuple, wheel: "TimerWheel"
+    ) -> None:
+        self.tick = tick
+        self._callback = callback
+        self._args = args
+        self._wheel = wheel
+        self._slot: Optional[Dict["Timer", None]] = None
+
+    @property
+    def pending(self) -> bool:
+        """Whether the timer has neither fired nor been cancelled."""
+        return self._slot is not None
+
+    def cancel(self) -> None:
+        """Cancels the timer if it is pending."""
+        if self._slot is not None:
+            del self._slot[self]
+            self._slot = None
+            self._wheel._remove()
+
+
+class TimerWheel:
+    """
+    A hierarchical timing wheel that runs callbacks after a delay, with O(1)
+    scheduling and cancellation.
+
+    Time is divided into ticks of `resolution` seconds. Level 0 of the wheel
+    has a slot for each of the next 64 ticks, level 1 a slot for each of the
+    next 64 blocks of 64 ticks, and so on. Timers are moved down a level when
+    the wheel reaches their slot, and run when they reach level 0. Timers run
+    no earlier than their delay, and up to one tick later.
+
+    The wheel wakes up through a single event loop callback, scheduled for
+    the next tick with a timer or for the next time a level has to be moved
+    down, and stops waking up once no timers are pending. Use `for_loop` to
+    get the wheel shared by everything running on an event loop.
+    """
+
+    __slots__ = (
+        "_loop",
+        "_resolution",
+        "_levels",
+        "_current",
+        "_count",
+        "_handle",
+        "_wake_tick",
+        "_logger",
+        "__weakref__",
+    )
+
+    _wheels: "WeakKeyDictionary[asyncio.AbstractEventLoop, TimerWheel]" = (
+        WeakKeyDictionary()
+    )
+
+    def __init__(
+        self,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        resolution: float = 0.01,
+    ) -> None:
+        if resolution <= 0:
+            raise ValueError("Arg `resolution` - must be greater than 0")
+
+        self._loop = loop or asyncio.get_running_loop()
+        self._resolution = resolution
+        self._levels: List[List[Dict[Timer, None]]] = [
+            [{} for _ in range(_SIZE)] for _ in range(_LEVELS)
+        ]
+        self._current = self._now()
+        self._count = 0
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._wake_tick = 0
+        self._logger = asp_logger
+
+    @classmethod
+    def for_loop(cls, loop: Optional[asyncio.AbstractEventLoop] = None) -> "TimerWheel":
+        """Returns the wheel shared by everything running on loop."""
+        loop = loop or asyncio.get_running_loop()
+        wheel = cls._wheels.get(loop)
+        if wheel is None:
+            wheel = cls._wheels[loop] = cls(loop)
+        return wheel
+
+    @property
+    def resolution(self) -> float:
+        return self._resolution
+
+    def __len__(self) -> int:
+        """Returns the number of pending timers."""
+        return self._count
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> Timer:
+        """Runs callback with args after delay seconds."""
+        now = self._loop.time()
+        if not self._count:
+            self._current = int(now / self._resolution)
+        tick = ceil((now + delay) / self._resolution)
+        if tick <= self._current:
+            tick = self._current + 1
+        timer = Timer(tick, callback, args, self)
+        self._place(timer)
+        self._count += 1
+        if self._handle is None or tick < self._wake_tick:
+            self._schedule_wake()
+        return timer
+
+    def _now(self) -> int:
+        return int(self._loop.time() / self._resolution)
+
+    def _place(self, timer: Timer) -> None:
+        """Adds timer to the slot for its tick at the lowest level that fits it."""
+        tick = timer.tick
+        delta = tick - self._current
+        level = (delta.bit_length() - 1) // _BITS if delta > 0 else 0
+        if level >= _LEVELS:
+            # Parked in the furthest slot, and placed again when that is reached
+            level = _LEVELS - 1
+            tick = self._current + _SPAN - 1
+        slot = self._levels[level][(tick >> (_BITS * level)) & _MASK]
+        slot[timer] = None
+        timer._slot = slot
+
+    def _remove(self) -> None:
+        # A pending wakeup is left to expire, rather than cancelled, as timers
+        # are often scheduled again soon after the last one is cancelled
+        self._count -= 1
+
+    def _schedule_wake(self) -> None:
+        """
+        Schedules a wakeup for the next tick with a level 0 timer, or the next
+        tick at which level 1 has to be moved down, whichever is sooner.
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+        boundary = (self._current | _MASK) + 1
+        wheel = self._levels[0]
+        tick = self._current + 1
+        while tick < boundary and not wheel[tick & _MASK]:
+            tick += 1
+        self._wake_tick = tick
+        self._handle = self._loop.call_at(tick * self._resolution, self._wake)
+
+    def _wake(self) -> None:
+        self._handle = None
+        # The loop may run a callback slightly before its time is reached
+        target = max(self._now(), self._wake_tick)
+        slots = self._levels[0]
+        while self._current < target and self._count:
+            # Skip ticks without level 0 timers, up to the next level 1 boundary
+            stop = min((self._current | _MASK) + 1, target)
+            tick = self._current + 1
+            while tick < stop and not slots[tick & _MASK]:
+                tick += 1
+            self._current = tick - 1
+            self._advance()
+        if self._count:
+            self._schedule_wake()
+
+    def _advance(self) -> None:
+        """Advances the wheel by one tick, and runs the timers due at that tick."""
+        self._current += 1
+        tick = self._current
+        level = 1
+        while level < _LEVELS and not tick & ((1 << (_BITS * level)) - 1):
+            level += 1
+        for cascade in range(level - 1, 0, -1):
+            slots = self._levels[cascade]
+            index = (tick >> (_BITS * cascade)) & _MASK
+            slot = slots[index]
+            if slot:
+                slots[index] = {}
+                for timer in slot:
+                    self._place(timer)
+
+        slots = self._levels[0]
+        slot = slots[tick & _MASK]
+        if not slot:
+            return
+        slots[tick & _MASK] = {}
+        for timer in slot:
+            timer._slot = None
+            self._count -= 1
+            try:
+                timer._callback(*timer._args)
+            except Exception:
+                self._logger.exception("TimerWheel: Unhandled error in timer callback")
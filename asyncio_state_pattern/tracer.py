@@ -0,0 +1,140 @@
+import json
+import os
+from array import array
+from typing import Any, Dict, List, Optional
+
+
+class Tracer:
+    """
+    Records spans for transitions, entry and exit actions, events and event
+    handlers of the state machines it is attached to, for viewing in a trace
+    viewer such as Perfetto or chrome://tracing.
+
+    Spans are written to a buffer of `capacity` entries that is allocated up
+    front. Once the buffer is full the oldest spans are overwritten, and are
+    counted by `dropped`. Each state machine is shown as its own thread, with
+    an id given by `new_thread_id` when the machine is attached.
+    """
+
+    __slots__ = (
+        "_capacity",
+        "_names",
+        "_categories",
+        "_states",
+        "_tids",
+        "_starts",
+        "_durations",
+        "_machines",
+        "_count",
+        "_next_tid",
+    )
+
+    def __init__(self, capacity: int = 65536) -> None:
+        if capacity < 1:
+            raise ValueError("Arg `capacity` - must be at least 1")
+
+        self._capacity = capacity
+        self._names: List[Optional[str]] = [None] * capacity
+        self._categories: List[Optional[str]] = [None] * capacity
+        self._states: List[Optional[str]] = [None] * capacity
+        self._tids = array("q", bytes(8 * capacity))
+        self._starts = array("q", bytes(8 * capacity))
+        self._durations = array("q", bytes(8 * capacity))
+        self._machines: List[Optional[str]] = [None] * capacity
+        self._count = 0
+        self._next_tid = 0
+
+    def __len__(self) -> int:
+        """Returns the number of spans in the buffer."""
+        return min(self._count, self._capacity)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def dropped(self) -> int:
+        """The number of spans overwritten since the buffer was last cleared."""
+        return max(self._count - self._capacity, 0)
+
+    def new_thread_id(self) -> int:
+        """
+        Returns a new id for a state machine attached to the tracer. Spans
+        recorded with the same id are shown as one thread.
+        """
+        self._next_tid += 1
+        return self._next_tid
+
+    def record(
+        self,
+        tid: int,
+        machine: str,
+        category: str,
+        name: str,
+        state: Optional[str],
+        start_ns: int,
+        end_ns: int,
+    ) -> None:
+        """
+        Records a span of the machine with the given thread id and name between
+        two `time.perf_counter_ns` times. The category is one of "transition",
+        "entry", "exit", "event" or "handler", and state is the name of the
+        state running the span.
+        """
+        i = self._count % self._capacity
+        self._count += 1
+        self._names[i] = name
+        self._categories[i] = category
+        self._states[i] = state
+        self._tids[i] = tid
+        self._machines[i] = machine
+        self._starts[i] = start_ns
+        self._durations[i] = end_ns - start_ns
+
+    def clear(self) -> None:
+        self._count = 0
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Returns the recorded spans, oldest first, in the Chrome trace event
+        format, preceded by a thread name for each machine that has spans in
+        the buffer.
+        """
+        pid = os.getpid()
+        machines: Dict[int, str] = {}
+        spans: List[Dict[str, Any]] = []
+        for n in range(max(self._count - self._capacity, 0), self._count):
+            i = n % self._capacity
+            tid = self._tids[i]
+            machines[tid] = self._machines[i]
+            args = {"machine": self._machines[i]}
+            if self._states[i] is not None:
+                args["state"] = self._states[i]
+            spans.append(
+                {
+                    "name": self._names[i],
+                    "cat": self._categories[i],
+                    "ph": "X",
+                    "ts": self._starts[i] / 1000,
+                    "dur": self._durations[i] / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+        events: List[Dict[str, Any]] = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": f"{name} ({tid})"},
+            }
+            for tid, name in machines.items()
+        ]
+        return {"traceEvents": events + spans, "displayTimeUnit": "ns"}
+
+    def write(self, path: str) -> None:
+        """Writes the recorded spans to a Chrome trace JSON file."""
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
@@ -0,0 +1,125 @@
+import sys
+from inspect import iscoroutinefunction
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Mapping, Optional, Tuple
+
+Guard = Callable[..., bool]
+"""
+A guard of a table transition. Guards are plain functions called like an event
+handler of the state that declared the transition, and the transition is only
+taken if the guard returns True.
+"""
+
+Target = Tuple[Any, Optional[Guard]]
+"""A destination state class, or its name, and an optional guard."""
+
+
+class TableTransition:
+    """
+    An event handler compiled from an entry of a `transitions` table. Calling
+    it takes the transition to the first destination whose guard passes,
+    consuming the event, or declines the event if no guard passes.
+
+    Entries are bound to each state tree they are used in, which resolves
+    destinations given by name. Entries in the handlers of a simple state are
+    bound with that state as their source, and cache the transition plan to
+    each destination, so that no plan has to be looked up to take them.
+    """
+
+    __slots__ = ("event_id", "targets", "source", "plans", "__qualname__")
+
+    def __init__(
+        self,
+        name: str,
+        event_id: Hashable,
+        targets: Tuple[Target, ...],
+        source: Any = None,
+    ) -> None:
+        self.event_id = event_id
+        self.targets = targets
+        self.source = source
+        self.plans: List[Any] = [None] * len(targets)
+        self.__qualname__ = name
+
+    def __call__(self, state: Any, *args: Any) -> Awaitable[bool]:
+        # Called like a handler: flyweight states are passed the machine
+        for index, (_, guard) in enumerate(self.targets):
+            if guard is None or guard(state, *args):
+                machine = args[0] if state._flyweight else state._context
+                return machine._take_table_transition(self, index)
+        return _declined()
+
+    def bind(self, nodes: Mapping[str, Any], source: Any) -> "TableTransition":
+        """
+        Returns a copy of the entry with its destinations resolved to the
+        state classes of nodes, and with the given source state class, or
+        None if the entry may be dispatched to from more than one state.
+        """
+        targets = []
+        for dest, guard in self.targets:
+            name = dest if isinstance(dest, str) else dest.__name__
+            node = nodes.get(name)
+            if node is None or (not isinstance(dest, str) and node.state_class is not dest):
+                raise ValueError(f"{self.__qualname__} - state '{name}' not found")
+            targets.append((node.state_class, guard))
+        return TableTransition(self.__qualname__, self.event_id, tuple(targets), source)
+
+
+async def _declined() -> bool:
+    return False
+
+
+def parse_transition_table(
+    name: str, table: Mapping[Hashable, Any]
+) -> Dict[Hashable, TableTransition]:
+    """
+    Returns a `TableTransition` for each event of a `transitions` table. Each
+    event maps to a destination, a (destination, guard) tuple, or a list of
+    them tried in order. Destinations are state classes or their names.
+    """
+    entries = {}
+    for event_id, value in table.items():
+        if isinstance(event_id, str):
+            event_id = sys.intern(event_id)
+        targets = []
+        for target in value if isinstance(value, list) else [value]:
+            dest, guard = target if isinstance(target, tuple) else (target, None)
+            if not isinstance(dest, (str, type)):
+                raise ValueError(
+                    f"Arg `transitions` - {name}[{event_id!r}] must be a state class or name, not {dest!r}"
+                )
+            if guard is not None and not callable(guard):
+                raise ValueError(
+                    f"Arg `transitions` - guard of {name}[{event_id!r}] must be callable"
+                )
+            if iscoroutinefunction(guard):
+                raise ValueError(
+                    f"Arg `transitions` - guard of {name}[{event_id!r}] must be a"
+                    " plain function, not a coroutine function"
+                )
+            targets.append((dest, guard))
+        entries[event_id] = TableTransition(
+            f"{name}[{event_id!r}]", event_id, tuple(targets)
+        )
+    return entries
+
+
+def parse_machine_transition_table(
+    name: str, table: Mapping[Tuple[Any, Hashable], Any]
+) -> Dict[Any, Dict[Hashable, TableTransition]]:
+    """
+    Returns the `TableTransition` for each event of each source state of a
+    state machine's `transitions` table, which is keyed by (source state
+    class, event) and otherwise declared as a state's table is.
+    """
+    tables: Dict[Any, Dict[Hashable, Any]] = {}
+    for key, value in table.items():
+        if not isinstance(key, tuple) or len(key) != 2 or not isinstance(key[0], type):
+            raise ValueError(
+                f"Arg `transitions` - {name} keys must be (state class, event) tuples, not {key!r}"
+            )
+        source, event_id = key
+        tables.setdefault(source, {})[event_id] = value
+    return {
+        source: parse_transition_table(f"{name}[{source.__name__}]", entries)
+        for source, entries in tables.items()
+    }
@@ -0,0 +1,62 @@
+"""
+Runs the benchmark suite.
+
+Usage:
+    python -m benchmarks                        # Run all scenarios
+    python -m benchmarks dispatch_flat          # Run selected scenarios
+    python -m benchmarks --save baseline.json   # Save results as a baseline
+    python -m benchmarks --compare baseline.json --threshold 0.2
+
+With --compare, the exit status is 1 if any scenario's ops/sec fell, or its
+bytes/machine grew, by more than the threshold relative to the baseline.
+"""
+import argparse
+import sys
+
+from .suite import SCENARIOS, find_regressions, load_results, run_suite, save_results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "scenarios", nargs="*", help=f"Scenarios to run: {', '.join(SCENARIOS)}"
+    )
+    parser.add_argument("--save", metavar="PATH", help="Save results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="Baseline JSON to compare")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Allowed fractional regression against the baseline (default 0.1)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per scenario (default 3)"
+    )
+    args = parser.parse_args()
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    results = run_suite(args.scenarios or list(SCENARIOS), repeat=args.repeat)
+    for result in results:
+        memory = ""
+        if result.bytes_per_machine is not None:
+            memory = f"   {result.bytes_per_machine:>10,.0f} bytes/machine"
+        print(f"{result.scenario:<25} {result.ops_per_sec:>14,.0f} ops/sec{memory}")
+
+    if args.save:
+        save_results(args.save, results)
+
+    if args.compare:
+        regressions = find_regressions(
+            load_results(args.compare), results, args.threshold
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
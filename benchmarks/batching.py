@@ -0,0 +1,60 @@
+"""
+Measures events/sec processed by a running StateMachine when events arrive in
+bursts, for different values of `max_batch_size`.
+
+Usage: python -m benchmarks.batching [batch_size ...]
+"""
+import asyncio
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from asyncio_state_pattern import State, StateMachine, on_event
+from asyncio_state_pattern.state_machine import RunLoopStats
+
+
+class Counting(State):
+    count = 0
+
+    @on_event("tick")
+    async def on_tick(self) -> bool:
+        Counting.count += 1
+        return True
+
+
+async def bench_batching(
+    max_batch_size: Optional[int], bursts: int = 200, burst_size: int = 500
+) -> Tuple[float, RunLoopStats]:
+    machine = StateMachine(states=[Counting], max_batch_size=max_batch_size)
+    await machine.run()
+    Counting.count = 0
+    total = bursts * burst_size
+
+    start = time.perf_counter()
+    for _ in range(bursts):
+        for _ in range(burst_size):
+            machine._event_queue.put_nowait("tick")
+        await asyncio.sleep(0)
+    while Counting.count < total:
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    await machine.stop()
+    return total / elapsed, machine.run_loop_stats
+
+
+async def main(batch_sizes: List[Optional[int]]) -> None:
+    for batch_size in batch_sizes:
+        # Best of 3 runs to reduce noise from other processes
+        rate, stats = max(
+            [await bench_batching(batch_size) for _ in range(3)], key=lambda r: r[0]
+        )
+        print(
+            f"max_batch_size={str(batch_size):<5} {rate:>12,.0f} events/sec"
+            f"   mean batch {stats.mean_batch_size:>7.1f}"
+            f"   max batch {stats.max_batch_size:>5}"
+        )
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [1, 10, 100, None]
+    asyncio.run(main(sizes))
@@ -0,0 +1,78 @@
+"""
+Measures StateMachine constructions/sec for a CoffeeMaker-style machine.
+
+Usage: python -m benchmarks.construction
+"""
+import time
+from typing import Callable
+
+from asyncio_state_pattern import State, StateMachine
+
+
+class PoweredOff(State, initial=True):
+    pass
+
+
+class PoweredOn(State):
+    pass
+
+
+class Idle(PoweredOn, initial=True):
+    pass
+
+
+class DispensingCoffee(PoweredOn):
+    pass
+
+
+class CoffeeMaker(StateMachine):
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(states=[PoweredOff, PoweredOn, Idle, DispensingCoffee])
+
+
+class FlyweightPoweredOff(State, initial=True, flyweight=True):
+    __slots__ = ()
+
+
+class FlyweightPoweredOn(State, flyweight=True):
+    __slots__ = ()
+
+
+class FlyweightIdle(FlyweightPoweredOn, initial=True, flyweight=True):
+    __slots__ = ()
+
+
+class FlyweightDispensingCoffee(FlyweightPoweredOn, flyweight=True):
+    __slots__ = ()
+
+
+class FlyweightCoffeeMaker(StateMachine):
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(
+            states=[
+                FlyweightPoweredOff,
+                FlyweightPoweredOn,
+                FlyweightIdle,
+                FlyweightDispensingCoffee,
+            ]
+        )
+
+
+def bench_construction(
+    factory: Callable[[], StateMachine] = CoffeeMaker, iterations: int = 20000
+) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        factory()
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed
+
+
+if __name__ == "__main__":
+    print(f"{bench_construction():>12,.0f} constructions/sec")
+    flyweight = bench_construction(FlyweightCoffeeMaker)
+    print(f"{flyweight:>12,.0f} constructions/sec (flyweight)")
@@ -0,0 +1,55 @@
+"""
+Measures the cost of deadlines on coroutine event handlers: no deadline, a
+deadline enforced by the state machine, and each handler wrapped in
+`asyncio.wait_for`.
+
+Usage: python -m benchmarks.deadlines
+"""
+import asyncio
+import time
+from typing import Optional
+
+from asyncio_state_pattern import DeadlineOptions, State, StateMachine, on_event
+
+
+class Idle(State):
+    @on_event("tick")
+    async def on_tick(self) -> bool:
+        return True
+
+
+class WaitFor(State):
+    @on_event("tick")
+    async def on_tick(self) -> bool:
+        return await asyncio.wait_for(self.handle(), 1.0)
+
+    async def handle(self) -> bool:
+        return True
+
+
+async def bench(
+    state: type, deadlines: Optional[DeadlineOptions], iterations: int = 50000
+) -> float:
+    """Returns events/sec dispatched to a coroutine handler."""
+    machine = StateMachine(states=[state], deadlines=deadlines)
+    await machine.start()
+    process_event = machine._process_event
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await process_event("tick")
+    return iterations / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    scenarios = (
+        ("no deadline", Idle, None),
+        ("deadline", Idle, DeadlineOptions(handler=1.0)),
+        ("wait_for", WaitFor, None),
+    )
+    for name, state, deadlines in scenarios:
+        rate = max([await bench(state, deadlines) for _ in range(5)])
+        print(f"{name:<12} {rate:>12,.0f} events/sec")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
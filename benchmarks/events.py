@@ -0,0 +1,77 @@
+"""
+Measures events/sec dispatched to a leaf state nested 1, 3 and 6 levels deep,
+with the handler declared on the leaf and on the outermost super state, for
+event ids and for typed events.
+
+Usage: python -m benchmarks.events [depth ...]
+"""
+import asyncio
+import sys
+import time
+from typing import List, Type
+
+from asyncio_state_pattern import Event, State, StateMachine, on_event
+
+
+class Tick(Event):
+    __slots__ = ("count",)
+
+
+async def handle(self) -> bool:
+    return True
+
+
+async def handle_typed(self, event: Tick) -> bool:
+    return True
+
+
+def build_chain(
+    depth: int, handler_level: int, typed: bool = False
+) -> List[Type[State]]:
+    """
+    Returns `depth` state classes, each one a sub state of the previous, with
+    an event handler for "tick", or for `Tick` if typed, declared on the state
+    at `handler_level`.
+    """
+    chain = []
+    base = State
+    for level in range(depth):
+        namespace = {}
+        if level == handler_level and typed:
+            namespace["on_tick"] = on_event(Tick)(handle_typed)
+        elif level == handler_level:
+            namespace["on_tick"] = on_event("tick")(handle)
+        base = type(f"Level{level}", (base,), namespace)
+        chain.append(base)
+    return chain
+
+
+async def bench_events(
+    depth: int, handler_level: int, iterations: int = 100000, typed: bool = False
+) -> float:
+    machine = StateMachine(states=build_chain(depth, handler_level, typed))
+    await machine.start()
+    process_event = machine._process_event
+    event = Tick(0) if typed else "tick"
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await process_event(event)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed
+
+
+async def main(depths: List[int]) -> None:
+    for depth in depths:
+        for typed in (False, True):
+            leaf = await bench_events(depth, handler_level=depth - 1, typed=typed)
+            root = await bench_events(depth, handler_level=0, typed=typed)
+            print(
+                f"depth={depth:<3} {'typed' if typed else 'id':<5}"
+                f" leaf handler {leaf:>12,.0f} events/sec"
+                f"   root handler {root:>12,.0f} events/sec"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(d) for d in sys.argv[1:]] or [1, 3, 6]))
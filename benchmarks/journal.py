@@ -0,0 +1,79 @@
+"""
+Measures the cost of journaling processed events, and how fast a journal is
+replayed to rebuild machine state.
+
+Usage: python -m benchmarks.journal
+"""
+import asyncio
+import os
+import tempfile
+import time
+from typing import Optional
+
+from asyncio_state_pattern import (
+    Journal,
+    State,
+    StateMachine,
+    on_entry,
+    on_event,
+    replay_journal,
+)
+
+
+class Idle(State):
+    @on_event("toggle")
+    async def on_toggle(self) -> bool:
+        await self.context.transition_to(Busy)
+        return True
+
+
+class Busy(State):
+    @on_entry
+    def start(self) -> None:
+        pass
+
+    @on_event("toggle")
+    async def on_toggle(self) -> bool:
+        await self.context.transition_to(Idle)
+        return True
+
+
+async def bench_dispatch(journal: Optional[Journal], iterations: int = 100000) -> float:
+    """Returns events/sec processed, each making a transition."""
+    machine = StateMachine(states=[Idle, Busy], journal=journal)
+    await machine.start()
+    process_event = machine._process_event
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await process_event("toggle")
+    if journal is not None:
+        await journal.flush()
+    return iterations / (time.perf_counter() - start)
+
+
+async def bench_replay(path: str) -> float:
+    machine = StateMachine(states=[Idle, Busy])
+    start = time.perf_counter()
+    count = await replay_journal(path, {None: machine})
+    return count / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    rate = max([await bench_dispatch(None) for _ in range(3)])
+    print(f"no journal       {rate:>12,.0f} events/sec")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "journal")
+        for fsync in (False, True):
+            os.unlink(path) if os.path.exists(path) else None
+            journal = Journal(path, fsync=fsync)
+            rates = [await bench_dispatch(journal) for _ in range(3)]
+            journal.close()
+            name = "journal+fsync" if fsync else "journal"
+            print(f"{name:<16} {max(rates):>12,.0f} events/sec")
+        size = os.path.getsize(path)
+        rate = max([await bench_replay(path) for _ in range(3)])
+        print(f"replay           {rate:>12,.0f} events/sec   {size / 300000:.1f} bytes/event")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
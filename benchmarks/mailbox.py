@@ -0,0 +1,76 @@
+"""
+Compares Mailbox with asyncio.Queue for enqueue/dequeue latency, consumer
+wakeup latency and memory per idle instance.
+
+Usage: python -m benchmarks.mailbox
+"""
+import asyncio
+import gc
+import time
+import tracemalloc
+from typing import Callable
+
+from asyncio_state_pattern.mailbox import Mailbox
+
+
+def bench_put_get(factory: Callable, iterations: int = 200000) -> float:
+    """Returns the mean ns per put_nowait/get_nowait pair."""
+    queue = factory()
+    put, get = queue.put_nowait, queue.get_nowait
+    start = time.perf_counter()
+    for i in range(iterations):
+        put(i)
+        get()
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+async def bench_wakeup(factory: Callable, iterations: int = 50000) -> float:
+    """
+    Returns the mean ns from putting an item to a waiting consumer until the
+    consumer has received it.
+    """
+    queue = factory()
+    received = asyncio.Event()
+
+    async def consumer():
+        for _ in range(iterations):
+            await queue.get()
+            received.set()
+
+    task = asyncio.get_running_loop().create_task(consumer())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    for i in range(iterations):
+        received.clear()
+        queue.put_nowait(i)
+        await received.wait()
+    elapsed = time.perf_counter() - start
+    await task
+    return elapsed / iterations * 1e9
+
+
+def bench_idle_memory(factory: Callable, count: int = 10000) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        queues = [factory() for _ in range(count)]
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del queues
+    return size / count
+
+
+async def main() -> None:
+    for factory in (asyncio.Queue, Mailbox):
+        put_get = bench_put_get(factory)
+        wakeup = await bench_wakeup(factory)
+        memory = bench_idle_memory(factory)
+        print(
+            f"{factory.__name__:<8} put/get {put_get:>7.0f} ns"
+            f"   wakeup {wakeup:>7.0f} ns   idle {memory:>6.0f} bytes"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
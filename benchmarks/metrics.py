@@ -0,0 +1,64 @@
+"""
+Measures the cost of metrics on event dispatch and transitions, with no sink,
+a sink that discards measurements, and the aggregating Metrics sink.
+
+Usage: python -m benchmarks.metrics
+"""
+import asyncio
+import time
+from typing import Optional
+
+from asyncio_state_pattern import Metrics, MetricsSink, State, StateMachine, on_event
+
+
+class Idle(State):
+    @on_event("tick")
+    def on_tick(self) -> bool:
+        return True
+
+
+class Busy(State):
+    pass
+
+
+async def bench_dispatch(
+    metrics: Optional[MetricsSink], iterations: int = 100000
+) -> float:
+    """Returns events/sec dispatched to a sync handler."""
+    machine = StateMachine(states=[Idle, Busy], metrics=metrics)
+    await machine.start()
+    process_event = machine._process_event
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await process_event("tick")
+    return iterations / (time.perf_counter() - start)
+
+
+async def bench_transitions(
+    metrics: Optional[MetricsSink], iterations: int = 20000
+) -> float:
+    machine = StateMachine(states=[Idle, Busy], metrics=metrics)
+    await machine.start()
+    start = time.perf_counter()
+    for _ in range(iterations // 2):
+        await machine.transition_to(Busy)
+        await machine.transition_to(Idle)
+    return iterations / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    for name, factory in (
+        ("no sink", lambda: None),
+        ("MetricsSink", MetricsSink),
+        ("Metrics", Metrics),
+    ):
+        dispatch = max([await bench_dispatch(factory()) for _ in range(5)])
+        transitions = max([await bench_transitions(factory()) for _ in range(5)])
+        print(
+            f"{name:<12} {dispatch:>12,.0f} events/sec"
+            f"   {transitions:>12,.0f} transitions/sec"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
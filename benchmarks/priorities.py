@@ -0,0 +1,80 @@
+"""
+Measures queueing latency per priority class for a StateMachine saturated
+with low priority events, with and without priority levels.
+
+Usage: python -m benchmarks.priorities
+"""
+import asyncio
+import statistics
+import time
+from collections import deque
+from typing import Deque, Dict, List
+
+from asyncio_state_pattern import State, StateMachine, on_event
+
+PRIORITIES = {"telemetry": 0, "command": 1, "power_off": 2}
+
+queued_at: Dict[str, Deque[float]] = {}
+latencies: Dict[str, List[float]] = {}
+
+
+def record(event: str) -> bool:
+    latencies[event].append(time.perf_counter() - queued_at[event].popleft())
+    return True
+
+
+class Running(State):
+    @on_event("telemetry")
+    async def on_telemetry(self) -> bool:
+        return record("telemetry")
+
+    @on_event("command")
+    async def on_command(self) -> bool:
+        return record("command")
+
+    @on_event("power_off")
+    async def on_power_off(self) -> bool:
+        return record("power_off")
+
+
+async def bench_priorities(
+    priority_levels: int, backlog: int = 2000, rounds: int = 500
+) -> Dict[str, List[float]]:
+    for event in PRIORITIES:
+        queued_at[event] = deque()
+        latencies[event] = []
+
+    def post(event: str) -> None:
+        priority = PRIORITIES[event] if priority_levels > 1 else 0
+        queued_at[event].append(time.perf_counter())
+        machine.post_event(event, priority)
+
+    machine = StateMachine(
+        states=[Running], priority_levels=priority_levels, max_batch_size=50
+    )
+    await machine.run()
+    for _ in range(rounds):
+        while len(machine._event_queue) < backlog:
+            post("telemetry")
+        post("command")
+        post("power_off")
+        await asyncio.sleep(0)
+    while any(queued_at[e] for e in ("command", "power_off")):
+        await asyncio.sleep(0)
+    await machine.stop()
+    return latencies
+
+
+async def main() -> None:
+    for priority_levels in (1, 3):
+        results = await bench_priorities(priority_levels)
+        print(f"priority_levels={priority_levels}")
+        for event, samples in results.items():
+            samples = sorted(samples)
+            p50 = statistics.median(samples) * 1e6
+            p99 = samples[int(len(samples) * 0.99)] * 1e6
+            print(f"  {event:<10} p50 {p50:>10,.0f} us   p99 {p99:>10,.0f} us")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""
+Measures event dispatch to orthogonal regions: sync handlers in a flat state
+and in three regions, and handlers that wait on I/O in three regions
+dispatched to in order and concurrently with `independent=True`.
+
+Usage: python -m benchmarks.regions
+"""
+import asyncio
+import time
+from typing import List, Type
+
+from asyncio_state_pattern import State, StateMachine, on_event
+
+IO_DELAY = 0.001
+
+
+class Flat(State):
+    @on_event("tick")
+    def on_tick(self) -> bool:
+        return True
+
+
+def create_regions(independent: bool, io: bool) -> List[Type[State]]:
+    """Returns the leaf states of an orthogonal state with three regions."""
+
+    class Parallel(State, orthogonal=True, independent=independent):
+        pass
+
+    leaves = []
+    for i in range(3):
+        region = type(f"Region{i}", (Parallel,), {})
+        if io:
+
+            async def on_tick(self) -> bool:
+                await asyncio.sleep(IO_DELAY)
+                return True
+
+        else:
+
+            def on_tick(self) -> bool:
+                return True
+
+        handlers = {"on_tick": on_event("tick")(on_tick)}
+        leaves.append(type(f"Leaf{i}", (region,), handlers))
+    return leaves
+
+
+async def bench(states: List[Type[State]], iterations: int) -> float:
+    """Returns events/sec dispatched to the machine's active states."""
+    machine = StateMachine(states=states)
+    await machine.start()
+    process_event = machine._process_event
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await process_event("tick")
+    return iterations / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    scenarios = (
+        ("flat, sync", [Flat], 100000),
+        ("3 regions, sync", create_regions(False, False), 100000),
+        ("3 regions, I/O", create_regions(False, True), 200),
+        ("3 independent, I/O", create_regions(True, True), 200),
+    )
+    for name, states, iterations in scenarios:
+        rate = max([await bench(states, iterations) for _ in range(3)])
+        print(f"{name:<20} {rate:>12,.0f} events/sec")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
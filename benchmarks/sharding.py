@@ -0,0 +1,73 @@
+"""
+Compares event throughput of a single MachinePool with a ShardedRuntime
+running 1 to `os.cpu_count()` worker processes, for many machines each
+doing a little CPU work per event.
+
+Usage: python -m benchmarks.sharding [events]
+"""
+import asyncio
+import os
+import sys
+import time
+from typing import Hashable
+
+from asyncio_state_pattern import MachinePool, ShardedRuntime, State, StateMachine, on_event
+
+MACHINES = 10000
+
+
+class Counting(State):
+    def __init__(self) -> None:
+        super().__init__()
+        self.total = 0
+
+    @on_event("add")
+    def on_add(self) -> bool:
+        for i in range(50):
+            self.total += i
+        return True
+
+
+def create_machine(key: Hashable = None) -> StateMachine:
+    return StateMachine(states=[Counting])
+
+
+async def bench_pool(events: int) -> float:
+    pool = MachinePool()
+    for key in range(MACHINES):
+        pool.add(key, create_machine())
+    await pool.start()
+    start = time.perf_counter()
+    for i in range(events):
+        pool[i % MACHINES].post_event("add")
+    await pool.stop()
+    return events / (time.perf_counter() - start)
+
+
+async def bench_runtime(workers: int, events: int) -> float:
+    runtime = ShardedRuntime(create_machine, workers=workers)
+    await runtime.start()
+    # Create the machines and let the workers start up before timing
+    for key in range(MACHINES):
+        runtime.post_event(key, "add")
+    await runtime.stats()
+    start = time.perf_counter()
+    for i in range(events):
+        runtime.post_event(i % MACHINES, "add")
+        if i % 1024 == 0:
+            await asyncio.sleep(0)
+    await runtime.stop()
+    return events / (time.perf_counter() - start)
+
+
+async def main(events: int) -> None:
+    print(f"MachinePool          {await bench_pool(events):>12,.0f} events/sec")
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        rate = await bench_runtime(workers, events)
+        print(f"ShardedRuntime x{workers:<3}  {rate:>12,.0f} events/sec")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000))
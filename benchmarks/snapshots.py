@@ -0,0 +1,70 @@
+"""
+Measures bulk snapshot writing and restoring, and the size of snapshots, for
+machines in a nested state, some with a queued event.
+
+Usage: python -m benchmarks.snapshots [machines]
+"""
+import asyncio
+import io
+import sys
+import time
+from typing import Dict, Hashable
+
+from asyncio_state_pattern import (
+    State,
+    StateMachine,
+    read_snapshots,
+    write_snapshots,
+)
+
+
+class PoweredOff(State):
+    pass
+
+
+class PoweredOn(State):
+    pass
+
+
+class Idle(PoweredOn, initial=True):
+    pass
+
+
+class Brewing(PoweredOn):
+    pass
+
+
+def create_machine(key: Hashable = None) -> StateMachine:
+    return StateMachine(states=[PoweredOff, Idle, Brewing])
+
+
+async def main(count: int) -> None:
+    machines: Dict[Hashable, StateMachine] = {}
+    for key in range(count):
+        machine = machines[key] = create_machine()
+        await machine.start()
+        await machine.transition_to(Brewing if key % 2 else Idle)
+        if key % 10 == 0:
+            machine.post_event("done")
+
+    file = io.BytesIO()
+    start = time.perf_counter()
+    write_snapshots(file, machines.items())
+    write_time = time.perf_counter() - start
+    size = file.tell()
+    del machines
+
+    file.seek(0)
+    start = time.perf_counter()
+    restored = sum(1 for _ in read_snapshots(file, create_machine))
+    read_time = time.perf_counter() - start
+    assert restored == count
+
+    print(f"machines        {count:>12,}")
+    print(f"write           {write_time:>12.2f} s   {count / write_time:>12,.0f} machines/sec")
+    print(f"restore         {read_time:>12.2f} s   {count / read_time:>12,.0f} machines/sec")
+    print(f"size            {size / count:>12.1f} bytes/machine")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000))
@@ -0,0 +1,241 @@
+"""
+Scenarios run by `python -m benchmarks`, and helpers for saving and comparing
+their results.
+"""
+import asyncio
+import gc
+import json
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from asyncio_state_pattern import StateMachine
+
+from .batching import bench_batching
+from .construction import CoffeeMaker, FlyweightCoffeeMaker, bench_construction
+from .events import bench_events
+from .timers import bench_timeout_transitions
+from .transitions import bench_many_states, bench_transitions
+
+
+@dataclass
+class Result:
+    scenario: str
+    ops_per_sec: float
+    bytes_per_machine: Optional[float] = None
+
+
+@dataclass
+class Regression:
+    scenario: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline
+
+    def __str__(self) -> str:
+        return (
+            f"{self.scenario}: {self.metric} regressed by {abs(self.change):.1%}"
+            f" ({self.baseline:,.1f} -> {self.current:,.1f})"
+        )
+
+
+def measure_bytes_per_machine(
+    factory: Callable[[], StateMachine], count: int = 2000
+) -> float:
+    """
+    Returns the mean memory allocated per machine, as traced by tracemalloc,
+    while `count` machines created by factory are alive.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        machines = [factory() for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+        del machines
+    finally:
+        tracemalloc.stop()
+    return (after - before) / count
+
+
+async def scenario_construction_flyweight() -> Result:
+    return Result(
+        scenario="construction_flyweight",
+        ops_per_sec=bench_construction(FlyweightCoffeeMaker),
+        bytes_per_machine=measure_bytes_per_machine(FlyweightCoffeeMaker),
+    )
+
+
+async def _started_coffee_maker() -> StateMachine:
+    machine = CoffeeMaker()
+    await machine.start()
+    return machine
+
+
+async def scenario_construction() -> Result:
+    return Result(
+        scenario="construction",
+        ops_per_sec=bench_construction(),
+        bytes_per_machine=measure_bytes_per_machine(CoffeeMaker),
+    )
+
+
+async def scenario_started_machine() -> Result:
+    start = time.perf_counter()
+    machines = [await _started_coffee_maker() for _ in range(2000)]
+    rate = len(machines) / (time.perf_counter() - start)
+    del machines
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        machines = [await _started_coffee_maker() for _ in range(2000)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return Result(
+        scenario="started_machine",
+        ops_per_sec=rate,
+        bytes_per_machine=(after - before) / len(machines),
+    )
+
+
+async def scenario_transitions_flat() -> Result:
+    return Result("transitions_flat", await bench_transitions(depth=1))
+
+
+async def scenario_transitions_nested() -> Result:
+    return Result("transitions_nested", await bench_transitions(depth=6))
+
+
+async def scenario_transitions_sync_actions() -> Result:
+    return Result(
+        "transitions_sync_actions", await bench_transitions(depth=6, actions="sync")
+    )
+
+
+async def scenario_transitions_async_actions() -> Result:
+    return Result(
+        "transitions_async_actions", await bench_transitions(depth=6, actions="async")
+    )
+
+
+async def scenario_transitions_many_states() -> Result:
+    return Result("transitions_many_states", await bench_many_states(count=200))
+
+
+async def scenario_transitions_timeout() -> Result:
+    return Result("transitions_timeout", await bench_timeout_transitions())
+
+
+async def scenario_dispatch_flat() -> Result:
+    return Result("dispatch_flat", await bench_events(depth=1, handler_level=0))
+
+
+async def scenario_dispatch_nested() -> Result:
+    return Result("dispatch_nested", await bench_events(depth=6, handler_level=0))
+
+
+async def scenario_dispatch_typed_flat() -> Result:
+    return Result(
+        "dispatch_typed_flat", await bench_events(depth=1, handler_level=0, typed=True)
+    )
+
+
+async def scenario_dispatch_typed_nested() -> Result:
+    return Result(
+        "dispatch_typed_nested",
+        await bench_events(depth=6, handler_level=0, typed=True),
+    )
+
+
+async def scenario_event_storm() -> Result:
+    rate, _ = await bench_batching(max_batch_size=None)
+    return Result("event_storm", rate)
+
+
+SCENARIOS: Dict[str, Callable[[], Awaitable[Result]]] = {
+    "construction": scenario_construction,
+    "construction_flyweight": scenario_construction_flyweight,
+    "started_machine": scenario_started_machine,
+    "transitions_flat": scenario_transitions_flat,
+    "transitions_nested": scenario_transitions_nested,
+    "transitions_sync_actions": scenario_transitions_sync_actions,
+    "transitions_async_actions": scenario_transitions_async_actions,
+    "transitions_many_states": scenario_transitions_many_states,
+    "transitions_timeout": scenario_transitions_timeout,
+    "dispatch_flat": scenario_dispatch_flat,
+    "dispatch_nested": scenario_dispatch_nested,
+    "dispatch_typed_flat": scenario_dispatch_typed_flat,
+    "dispatch_typed_nested": scenario_dispatch_typed_nested,
+    "event_storm": scenario_event_storm,
+}
+
+
+async def run_scenario(name: str, repeat: int = 3) -> Result:
+    """
+    Runs a scenario `repeat` times and returns the best throughput and the
+    lowest memory usage seen, to reduce noise from other processes.
+    """
+    results = [await SCENARIOS[name]() for _ in range(repeat)]
+    best = max(results, key=lambda r: r.ops_per_sec)
+    memory = [r.bytes_per_machine for r in results if r.bytes_per_machine]
+    best.bytes_per_machine = min(memory) if memory else None
+    return best
+
+
+def run_suite(names: List[str], repeat: int = 3) -> List[Result]:
+    return [asyncio.run(run_scenario(name, repeat)) for name in names]
+
+
+def save_results(path: str, results: List[Result]) -> None:
+    with open(path, "w") as f:
+        json.dump({r.scenario: asdict(r) for r in results}, f, indent=2)
+
+
+def load_results(path: str) -> Dict[str, Result]:
+    with open(path) as f:
+        return {name: Result(**data) for name, data in json.load(f).items()}
+
+
+def find_regressions(
+    baseline: Dict[str, Result], results: List[Result], threshold: float
+) -> List[Regression]:
+    """
+    Returns the results whose throughput fell, or whose memory usage grew, by
+    more than `threshold` (a fraction) relative to the baseline.
+    """
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.scenario)
+        if previous is None:
+            continue
+        if result.ops_per_sec < previous.ops_per_sec * (1 - threshold):
+            regressions.append(
+                Regression(
+                    result.scenario,
+                    "ops/sec",
+                    previous.ops_per_sec,
+                    result.ops_per_sec,
+                )
+            )
+        if (
+            result.bytes_per_machine is not None
+            and previous.bytes_per_machine is not None
+            and result.bytes_per_machine > previous.bytes_per_machine * (1 + threshold)
+        ):
+            regressions.append(
+                Regression(
+                    result.scenario,
+                    "bytes/machine",
+                    previous.bytes_per_machine,
+                    result.bytes_per_machine,
+                )
+            )
+    return regressions
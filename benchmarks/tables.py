@@ -0,0 +1,67 @@
+"""
+Measures event-driven transitions/sec between two states, made by `on_event`
+handlers calling `transition_to`, by `transitions` tables, and by tables with
+a guard on every entry.
+
+Usage: python -m benchmarks.tables
+"""
+import asyncio
+import time
+from typing import Tuple, Type
+
+from asyncio_state_pattern import State, StateMachine, on_event
+
+
+def create_handler_states() -> Tuple[Type[State], Type[State]]:
+    class Ping(State, initial=True):
+        @on_event("flip")
+        async def on_flip(self) -> bool:
+            await self.context.transition_to(Pong)
+            return True
+
+    class Pong(State):
+        @on_event("flip")
+        async def on_flip(self) -> bool:
+            await self.context.transition_to(Ping)
+            return True
+
+    return Ping, Pong
+
+
+def create_table_states(guarded: bool) -> Tuple[Type[State], Type[State]]:
+    def guard(self) -> bool:
+        return True
+
+    class Ping(State, initial=True):
+        transitions = {"flip": ("Pong", guard) if guarded else "Pong"}
+
+    class Pong(State):
+        transitions = {"flip": ("Ping", guard) if guarded else "Ping"}
+
+    return Ping, Pong
+
+
+async def bench(states: Tuple[Type[State], Type[State]], iterations: int) -> float:
+    """Returns transitions/sec made by processing events."""
+    machine = StateMachine(states=list(states))
+    await machine.start()
+    process_event = machine._process_event
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await process_event("flip")
+    return iterations / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    scenarios = (
+        ("on_event handlers", create_handler_states()),
+        ("table", create_table_states(False)),
+        ("table, guarded", create_table_states(True)),
+    )
+    for name, states in scenarios:
+        rate = max([await bench(states, 100000) for _ in range(3)])
+        print(f"{name:<20} {rate:>12,.0f} transitions/sec")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
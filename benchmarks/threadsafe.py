@@ -0,0 +1,83 @@
+"""
+Compares ways of queueing events on a running state machine from other
+threads: `asyncio.run_coroutine_threadsafe` with `queue_event`,
+`loop.call_soon_threadsafe` with `post_event`, and `post_event_threadsafe`.
+
+Usage: python -m benchmarks.threadsafe [threads] [events]
+"""
+import asyncio
+import sys
+import threading
+import time
+from typing import Callable
+
+from asyncio_state_pattern import State, StateMachine, on_event
+
+
+class Counting(State):
+    def __init__(self) -> None:
+        super().__init__()
+        self.count = 0
+        self.target = 0
+        self.done: asyncio.Event = None
+
+    @on_event("count")
+    def on_count(self) -> bool:
+        self.count += 1
+        if self.count == self.target:
+            self.done.set()
+        return True
+
+
+def via_run_coroutine_threadsafe(machine: StateMachine, loop) -> Callable[[], None]:
+    return lambda: asyncio.run_coroutine_threadsafe(machine.queue_event("count"), loop)
+
+
+def via_call_soon_threadsafe(machine: StateMachine, loop) -> Callable[[], None]:
+    return lambda: loop.call_soon_threadsafe(machine.post_event, "count")
+
+
+def via_post_event_threadsafe(machine: StateMachine, loop) -> Callable[[], None]:
+    return lambda: machine.post_event_threadsafe("count")
+
+
+async def bench(factory, threads: int, events: int) -> float:
+    """Returns events/sec posted by `threads` threads and processed."""
+    loop = asyncio.get_running_loop()
+    machine = StateMachine(states=[Counting])
+    await machine.run()
+    await asyncio.sleep(0)
+    state = machine.state
+    state.target = threads * events
+    state.done = asyncio.Event()
+    post = factory(machine, loop)
+
+    def produce() -> None:
+        for _ in range(events):
+            post()
+
+    workers = [threading.Thread(target=produce) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    await state.done.wait()
+    elapsed = time.perf_counter() - start
+    for worker in workers:
+        worker.join()
+    await machine.stop()
+    return threads * events / elapsed
+
+
+async def main(threads: int, events: int) -> None:
+    for name, factory in (
+        ("run_coroutine_threadsafe", via_run_coroutine_threadsafe),
+        ("call_soon_threadsafe", via_call_soon_threadsafe),
+        ("post_event_threadsafe", via_post_event_threadsafe),
+    ):
+        rate = max([await bench(factory, threads, events) for _ in range(3)])
+        print(f"{name:<26} {rate:>12,.0f} events/sec")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    asyncio.run(main(*(args + [4, 20000][len(args):])))
@@ -0,0 +1,86 @@
+"""
+Compares TimerWheel with asyncio's call_later for scheduling and cancelling
+timers, memory per pending timer, and transitions into a state with a timeout.
+
+Usage: python -m benchmarks.timers
+"""
+import asyncio
+import gc
+import time
+import tracemalloc
+from typing import Callable
+
+from asyncio_state_pattern import State, StateMachine, TimerWheel
+
+
+def noop() -> None:
+    pass
+
+
+def bench_schedule_cancel(call_later: Callable, iterations: int = 200000) -> float:
+    """
+    Returns the mean ns to schedule a timer 30 seconds ahead and cancel it,
+    with `iterations` timers pending in between.
+    """
+    start = time.perf_counter()
+    timers = [call_later(30, noop) for _ in range(iterations)]
+    for timer in timers:
+        timer.cancel()
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def measure_bytes_per_timer(call_later: Callable, count: int = 20000) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        timers = [call_later(30, noop) for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    for timer in timers:
+        timer.cancel()
+    return (after - before) / count
+
+
+class Idle(State):
+    pass
+
+
+class Heating(State, timeout=30):
+    pass
+
+
+async def bench_timeout_transitions(iterations: int = 20000) -> float:
+    """
+    Returns transitions/sec between a state without a timeout and one with a
+    timeout, which schedules and cancels a timer on every round trip.
+    """
+    machine = StateMachine(states=[Idle, Heating])
+    await machine.start()
+    start = time.perf_counter()
+    for _ in range(iterations // 2):
+        await machine.transition_to(Heating)
+        await machine.transition_to(Idle)
+    return iterations / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    loop = asyncio.get_running_loop()
+    wheel = TimerWheel.for_loop()
+    for name, call_later in (
+        ("loop.call_later", loop.call_later),
+        ("TimerWheel", wheel.call_later),
+    ):
+        latency = min(bench_schedule_cancel(call_later) for _ in range(3))
+        memory = measure_bytes_per_timer(call_later)
+        print(
+            f"{name:<16} schedule+cancel {latency:>8.0f} ns"
+            f"   {memory:>6.0f} bytes/timer"
+        )
+    rate = max([await bench_timeout_transitions() for _ in range(3)])
+    print(f"timeout state transitions {rate:>12,.0f} transitions/sec")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
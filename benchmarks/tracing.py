@@ -0,0 +1,60 @@
+"""
+Measures the cost of tracing on event dispatch and transitions, without a
+tracer and with one attached.
+
+Usage: python -m benchmarks.tracing
+"""
+import asyncio
+import time
+from typing import Optional
+
+from asyncio_state_pattern import State, StateMachine, Tracer, on_entry, on_event
+
+
+class Idle(State):
+    @on_event("tick")
+    def on_tick(self) -> bool:
+        return True
+
+
+class Busy(State):
+    @on_entry
+    def start(self) -> None:
+        pass
+
+
+async def bench_dispatch(tracer: Optional[Tracer], iterations: int = 100000) -> float:
+    """Returns events/sec dispatched to a sync handler."""
+    machine = StateMachine(states=[Idle, Busy], tracer=tracer)
+    await machine.start()
+    process_event = machine._process_event
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await process_event("tick")
+    return iterations / (time.perf_counter() - start)
+
+
+async def bench_transitions(
+    tracer: Optional[Tracer], iterations: int = 20000
+) -> float:
+    machine = StateMachine(states=[Idle, Busy], tracer=tracer)
+    await machine.start()
+    start = time.perf_counter()
+    for _ in range(iterations // 2):
+        await machine.transition_to(Busy)
+        await machine.transition_to(Idle)
+    return iterations / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    for name, factory in (("no tracer", lambda: None), ("Tracer", Tracer)):
+        dispatch = max([await bench_dispatch(factory()) for _ in range(5)])
+        transitions = max([await bench_transitions(factory()) for _ in range(5)])
+        print(
+            f"{name:<12} {dispatch:>12,.0f} events/sec"
+            f"   {transitions:>12,.0f} transitions/sec"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Measures transitions/sec between the two deepest leaves of a pair of nested
+state hierarchies, with and without entry and exit actions on every state.
+
+Usage: python -m benchmarks.transitions [depth ...]
+"""
+import asyncio
+import sys
+import time
+from typing import List, Optional, Type
+
+from asyncio_state_pattern import State, StateMachine, on_entry, on_exit
+
+
+def build_chain(
+    prefix: str, depth: int, actions: Optional[str] = None
+) -> List[Type[State]]:
+    """
+    Returns `depth` state classes, each one a sub state of the previous. If
+    actions is "sync" or "async", each state has an entry and an exit action
+    of that kind that increments a counter.
+    """
+    namespace = {}
+    if actions == "sync":
+
+        def entry(self) -> None:
+            self.count += 1
+
+        def exit_(self) -> None:
+            self.count += 1
+
+    elif actions == "async":
+
+        async def entry(self) -> None:
+            self.count += 1
+
+        async def exit_(self) -> None:
+            self.count += 1
+
+    if actions:
+        namespace = {"entry": on_entry(entry), "exit_": on_exit(exit_)}
+
+    chain = []
+    base = State
+    for level in range(depth):
+        base = type(f"{prefix}{level}", (base,), {"count": 0, **namespace})
+        chain.append(base)
+    return chain
+
+
+async def bench_transitions(
+    depth: int, iterations: int = 20000, actions: Optional[str] = None
+) -> float:
+    left = build_chain("Left", depth, actions)
+    right = build_chain("Right", depth, actions)
+
+    class Machine(StateMachine):
+        def __init__(self):
+            super().__init__(states=[*left, *right])
+
+    machine = Machine()
+    await machine.start()
+    left_leaf, right_leaf = left[-1], right[-1]
+
+    start = time.perf_counter()
+    for _ in range(iterations // 2):
+        await machine.transition_to(right_leaf)
+        await machine.transition_to(left_leaf)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed
+
+
+async def bench_many_states(count: int, iterations: int = 20000) -> float:
+    """Measures transitions/sec round-robin across `count` flat states."""
+    states = [type(f"Flat{i}", (State,), {}) for i in range(count)]
+    machine = StateMachine(states=states)
+    await machine.start()
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        await machine.transition_to(states[i % count])
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed
+
+
+async def main(depths: List[int]) -> None:
+    for depth in depths:
+        for actions in (None, "sync", "async"):
+            rate = await bench_transitions(depth, actions=actions)
+            print(
+                f"depth={depth:<3} actions={actions or 'none':<6}"
+                f" {rate:>12,.0f} transitions/sec"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(d) for d in sys.argv[1:]] or [1, 3, 6, 12]))
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from asyncio_state_pattern import (
+    MachinePool,
+    OverflowOptions,
+    OverflowPolicy,
+    State,
+    StateMachine,
+    StateMachineError,
+    on_event,
+)
+
+processed = []
+
+
+class StateA(State):
+    @on_event("tick")
+    async def on_tick(self) -> bool:
+        processed.append((self.context.key, "tick"))
+        await asyncio.sleep(0)
+        processed.append((self.context.key, "tock"))
+        return True
+
+    @on_event("next")
+    async def on_next(self) -> bool:
+        await self.context.transition_to(StateB)
+        await self.context.queue_event("tick")
+        return True
+
+
+class StateB(State):
+    @on_event("tick")
+    async def on_tick(self) -> bool:
+        processed.append((self.context.key, "tick_b"))
+        return True
+
+
+class Machine(StateMachine):
+    def __init__(self, key, **kwargs):
+        super().__init__(states=[StateA, StateB], **kwargs)
+        self.key = key
+
+
+@pytest.fixture(autouse=True)
+def reset_test_outputs():
+    global processed
+    processed = []
+
+
+async def test_events_routed_by_key():
+    """
+    Given a started MachinePool, when events are queued by key, then each
+    event is processed by the machine added with that key, after starting it.
+    """
+    pool = MachinePool()
+    pool.add("a", Machine("a"))
+    pool.add("b", Machine("b"))
+    await pool.start()
+    await pool.queue_event("b", "tick")
+    await pool.stop()
+
+    assert processed == [("b", "tick"), ("b", "tock")]
+    assert pool["a"].state is None
+    assert type(pool["b"].state) is StateA
+
+
+async def test_per_machine_ordering():
+    """
+    Given a MachinePool with several dispatchers, when events are queued for
+    several machines, then each machine's events are processed in order and
+    run to completion before its next event.
+    """
+    pool = MachinePool(dispatchers=4)
+    for key in range(10):
+        pool.add(key, Machine(key, max_batch_size=1))
+    await pool.start()
+    for _ in range(3):
+        for key in range(10):
+            await pool.queue_event(key, "tick")
+    await pool.stop()
+
+    for key in range(10):
+        assert [e for k, e in processed if k == key] == ["tick", "tock"] * 3
+
+
+async def test_events_queued_by_handlers():
+    """
+    Given a machine in a MachinePool, when a handler queues an event on its
+    own machine, then the event is processed by the pool.
+    """
+    pool = MachinePool()
+    pool.add("a", Machine("a"))
+    await pool.start()
+    await pool.queue_event("a", "next")
+    await pool.stop()
+
+    assert processed == [("a", "tick_b")]
+
+
+async def test_task_count_constant():
+    """
+    Given a MachinePool with a fixed number of dispatchers, when machines are
+    added and given events, then no further tasks are created.
+    """
+    pool = MachinePool(dispatchers=2)
+    await pool.start()
+    task_count = len(asyncio.all_tasks())
+    for key in range(100):
+        pool.add(key, Machine(key))
+        await pool.queue_event(key, "tick")
+    assert len(asyncio.all_tasks()) == task_count
+    await pool.stop()
+    assert len(processed) == 200
+
+
+async def test_pooled_machine_cannot_run():
+    """
+    Given a machine in a MachinePool, when it is run directly or added to the
+    same pool again, then an error is raised.
+    """
+    pool = MachinePool()
+    machine = Machine("a")
+    pool.add("a", machine)
+    with pytest.raises(StateMachineError):
+        await machine.run()
+    with pytest.raises(ValueError):
+        pool.add("a", Machine("a"))
+    with pytest.raises(StateMachineError):
+        pool.add("b", machine)
+
+    assert pool.remove("a") is machine
+    assert "a" not in pool
+    await machine.run()
+    await machine.stop()
+
+
+async def test_pool_overflow_options():
+    """
+    Given a MachinePool with overflow options, when machines are added, then
+    the options apply to their event queues and their stats are aggregated.
+    """
+    pool = MachinePool(overflow=OverflowOptions(OverflowPolicy.DROP_NEWEST))
+    for key in ("a", "b"):
+        pool.add(key, Machine(key, max_event_queue_size=1))
+        await pool.queue_event(key, "tick")
+        await pool.queue_event(key, "tick")
+    assert pool.event_queue_stats.dropped == 2
+    assert pool.event_queue_stats.size == 2
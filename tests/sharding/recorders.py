@@ -0,0 +1,33 @@
+import os
+from functools import partial
+
+from asyncio_state_pattern import State, StateMachine, on_event
+
+
+class Recording(State):
+    @on_event("record")
+    def on_record(self) -> bool:
+        self.context.record()
+        return True
+
+
+class Recorder(StateMachine):
+    """Appends a line to a file named after its key for each event."""
+
+    def __init__(self, directory: str, key: str, max_event_queue_size: int = 0) -> None:
+        super().__init__(states=[Recording], max_event_queue_size=max_event_queue_size)
+        self.path = os.path.join(directory, key)
+        self.count = 0
+
+    def record(self) -> None:
+        with open(self.path, "a") as f:
+            f.write(f"{self.count}:{os.getpid()}\n")
+        self.count += 1
+
+
+def recorder_factory(directory: str) -> partial:
+    return partial(Recorder, directory)
+
+
+def bounded_recorder_factory(directory: str, max_event_queue_size: int) -> partial:
+    return partial(Recorder, directory, max_event_queue_size=max_event_queue_size)
@@ -0,0 +1,78 @@
+import pytest
+
+from asyncio_state_pattern import HashRing, ShardedRuntime, StateMachineError
+
+from .recorders import bounded_recorder_factory, recorder_factory
+
+
+def test_hash_ring_distribution():
+    """
+    Tests that keys are spread over every shard, and that adding a shard only
+    moves keys to the new shard.
+    """
+    keys = [f"machine-{i}" for i in range(4000)]
+    ring = HashRing(4)
+    shards = [ring.shard_for(key) for key in keys]
+    for shard in range(4):
+        assert 600 < shards.count(shard) < 1400
+
+    grown = [HashRing(5).shard_for(key) for key in keys]
+    moved = [(old, new) for old, new in zip(shards, grown) if old != new]
+    assert all(new == 4 for _, new in moved)
+    assert len(moved) < len(keys) / 3
+
+
+def test_hash_ring_stable_keys():
+    ring = HashRing(8)
+    assert ring.shard_for("a") == HashRing(8).shard_for("a")
+    assert ring.shard_for(7) == ring.shard_for(7)
+    assert 0 <= ring.shard_for(("a", 1)) < 8
+
+
+async def test_ordered_delivery(tmp_path):
+    """
+    Tests that the events for each key are processed in order by a single
+    worker, and that stopping drains the events sent to the workers.
+    """
+    runtime = ShardedRuntime(recorder_factory(str(tmp_path)), workers=2, batch_size=7)
+    with pytest.raises(StateMachineError):
+        runtime.post_event("a", "record")
+    await runtime.start()
+    keys = [f"k{i}" for i in range(10)]
+    for _ in range(20):
+        for key in keys:
+            await runtime.queue_event(key, "record")
+
+    stats = await runtime.stats()
+    assert stats.events_processed == 200
+    stats = await runtime.stop()
+    assert not runtime.running
+    assert stats.events_routed == 200
+    assert stats.events_received == 200
+    assert stats.machines == 10
+    assert len({w.pid for w in stats.workers}) == 2
+
+    for key in keys:
+        lines = (tmp_path / key).read_text().splitlines()
+        assert [int(line.split(":")[0]) for line in lines] == list(range(20))
+        assert len({line.split(":")[1] for line in lines}) == 1
+
+
+async def test_full_event_queue_drops_event(tmp_path):
+    """
+    Tests that events refused by a full machine event queue are counted as
+    dropped, without stopping the worker or its other machines.
+    """
+    runtime = ShardedRuntime(bounded_recorder_factory(str(tmp_path), 2), workers=2)
+    await runtime.start()
+    for _ in range(5):
+        runtime.post_event("full", "record")
+    for _ in range(2):
+        for key in ("a", "b", "c"):
+            runtime.post_event(key, "record")
+
+    stats = await runtime.stop()
+    assert stats.events_received == 11
+    assert stats.events_dropped == 3
+    assert stats.events_processed == 8
+    assert (tmp_path / "full").read_text().count("\n") == 2
@@ -0,0 +1,227 @@
+import asyncio
+
+import pytest
+
+from asyncio_state_pattern import (
+    DeadlineOptions,
+    DeadlinePolicy,
+    Metrics,
+    State,
+    StateMachine,
+    TimerWheel,
+    on_entry,
+    on_event,
+    on_exit,
+)
+
+outputs = []
+
+#               State
+#      /      |       |      \
+#   Idle   Working  Stalled  Failed
+
+
+class Idle(State, initial=True):
+    @on_event("work")
+    async def on_work(self) -> bool:
+        await self.context.transition_to(Working)
+        return True
+
+    @on_event("hang")
+    async def on_hang(self) -> bool:
+        await asyncio.Event().wait()
+        return True
+
+    @on_event("ignore_cancel")
+    async def on_ignore_cancel(self) -> bool:
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            pass
+        return True
+
+    @on_exit
+    async def exit(self) -> None:
+        outputs.append("Idle:exit")
+
+
+class Working(State):
+    @on_entry
+    async def hang(self) -> None:
+        outputs.append("Working:hang")
+        await asyncio.Event().wait()
+
+    @on_entry
+    async def entry(self) -> None:
+        outputs.append("Working:entry")
+
+    @on_event("stall")
+    async def on_stall(self) -> bool:
+        await self.context.transition_to(Stalled)
+        return True
+
+
+class Stalled(State, handler_deadline=0.02):
+    @on_event("hang")
+    async def on_hang(self) -> bool:
+        await asyncio.Event().wait()
+        return True
+
+
+class Failed(State):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Failed:entry")
+
+
+def create_machine(**deadlines) -> StateMachine:
+    return StateMachine(
+        states=[Idle, Working, Stalled, Failed],
+        deadlines=DeadlineOptions(**deadlines) if deadlines else None,
+    )
+
+
+@pytest.fixture(autouse=True)
+def before_each():
+    outputs.clear()
+
+
+async def test_entry_action_cancelled_at_deadline():
+    """
+    Given a StateMachine with an entry deadline
+    When an entry action never returns
+    Then it is cancelled once the deadline passes, the transition continues,
+    and the miss is recorded with the metrics sink.
+    """
+    machine = create_machine(entry=0.02)
+    machine.metrics = Metrics()
+    await machine.start()
+
+    await asyncio.wait_for(machine._process_event("work"), 1)
+
+    assert outputs == ["Idle:exit", "Working:hang", "Working:entry"]
+    assert isinstance(machine.state, Working)
+    assert machine.metrics.deadline_misses == {
+        ("StateMachine", "entry", "Working.hang"): 1
+    }
+
+
+async def test_handler_cancelled_at_state_deadline():
+    """
+    Given a StateMachine without a handler deadline, in a state declared with
+    a handler deadline
+    When one of its handlers never returns
+    Then it is cancelled once the state's deadline passes, and the event
+    counts as consumed.
+    """
+    machine = create_machine(entry=0.02)
+    await machine.start()
+    await machine._process_event("work")
+    await machine._process_event("stall")
+
+    consumed = await asyncio.wait_for(machine._process_event("hang"), 1)
+
+    assert consumed
+    assert isinstance(machine.state, Stalled)
+
+
+async def test_state_deadline_overrides_machine_deadline():
+    """
+    Given a StateMachine with a long handler deadline
+    When a handler of a state that does not declare a deadline hangs
+    Then it is cancelled at the machine's deadline, while handlers of a state
+    declaring its own deadline are cancelled at that deadline.
+    """
+    machine = create_machine(entry=0.02, handler=0.05)
+    await machine.start()
+
+    await asyncio.wait_for(machine._process_event("hang"), 1)
+
+    assert machine._deadline_table["handler"][
+        machine._state_tree.nodes["Stalled"].index
+    ] == 0.02
+    assert machine._deadline_table["handler"][
+        machine._state_tree.nodes["Idle"].index
+    ] == 0.05
+
+
+async def test_error_state_policy():
+    """
+    Given a StateMachine with the ERROR_STATE deadline policy
+    When an entry action misses its deadline
+    Then the transition completes, and the machine then transitions to the
+    error state.
+    """
+    machine = create_machine(
+        entry=0.02, policy=DeadlinePolicy.ERROR_STATE, error_state=Failed
+    )
+    await machine.start()
+
+    await asyncio.wait_for(machine._process_event("work"), 1)
+
+    assert outputs == ["Idle:exit", "Working:hang", "Working:entry", "Failed:entry"]
+    assert isinstance(machine.state, Failed)
+
+
+async def test_other_cancellation_propagates():
+    """
+    Given a StateMachine running an action with a deadline
+    When the task running it is cancelled before the deadline
+    Then the cancellation is not mistaken for a missed deadline.
+    """
+    machine = create_machine(entry=10)
+    await machine.start()
+    task = asyncio.ensure_future(machine._process_event("work"))
+    await asyncio.sleep(0.01)
+
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert not machine._deadline_missed
+
+
+@pytest.mark.parametrize("event", ["work", "ignore_cancel"])
+async def test_cancellation_with_deadline_propagates(monkeypatch, event):
+    """
+    Given a StateMachine running an action with a deadline
+    When the task running it is cancelled as the deadline fires, whether or
+    not the action then returns
+    Then the other cancellation still propagates.
+    """
+    machine = create_machine(entry=0.02, handler=0.02)
+    await machine.start()
+    call_later = TimerWheel.call_later
+
+    def cancel_with_deadline(wheel, delay, callback, *args):
+        def fire(*args):
+            callback(*args)
+            task.cancel()
+
+        return call_later(wheel, delay, fire, *args)
+
+    monkeypatch.setattr(TimerWheel, "call_later", cancel_with_deadline)
+    task = asyncio.ensure_future(machine._process_event(event))
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(asyncio.shield(task), 1)
+    assert task.cancelled()
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError, match="entry"):
+        DeadlineOptions(entry=0)
+    with pytest.raises(ValueError, match="error_state"):
+        DeadlineOptions(policy=DeadlinePolicy.ERROR_STATE)
+    with pytest.raises(ValueError, match="handler_deadline"):
+
+        class Invalid(State, handler_deadline=-1):
+            pass
+
+
+def test_error_state_not_found():
+    class Elsewhere(State):
+        pass
+
+    with pytest.raises(ValueError, match="Elsewhere"):
+        create_machine(policy=DeadlinePolicy.ERROR_STATE, error_state=Elsewhere)
@@ -0,0 +1,79 @@
+from asyncio_state_pattern import State, StateMachine, on_entry, on_event, on_exit
+
+calls = []
+
+
+class StateA(State, flyweight=True):
+    __slots__ = ()
+
+    @on_entry
+    async def entry(self, context: StateMachine) -> None:
+        calls.append(("enter", self.__class__, context))
+
+    @on_exit
+    async def exit_(self, context: StateMachine) -> None:
+        calls.append(("exit", self.__class__, context))
+
+    @on_event("next")
+    async def on_next(self, context: StateMachine) -> bool:
+        calls.append(("next", self.__class__, context))
+        await context.transition_to(StateB)
+        return True
+
+
+class StateB(State):
+    @on_entry
+    async def entry(self) -> None:
+        calls.append(("enter", self.__class__, self.context))
+
+
+class StateC(StateA, flyweight=True):
+    __slots__ = ()
+
+
+class UnitUnderTest(StateMachine):
+    def __init__(self):
+        super().__init__(states=[StateA, StateB, StateC])
+
+
+async def test_flyweight_state_shared():
+    """
+    When multiple StateMachines are initialized with a flyweight state class,
+    then they share one instance of it, which has no context, while
+    non-flyweight states have an instance per StateMachine.
+    """
+    first = UnitUnderTest()
+    second = UnitUnderTest()
+    await first.start()
+    await second.start()
+    assert type(first.state) is StateC
+    assert first.state is second.state
+    assert first.state.context is None
+    assert first._states[first._state_tree.nodes["StateB"].index] is not (
+        second._states[second._state_tree.nodes["StateB"].index]
+    )
+
+
+async def test_flyweight_actions_receive_context():
+    """
+    Given StateMachines sharing a flyweight state, when the state's entry,
+    exit and event actions run, then they are called with the StateMachine
+    that entered, exited or dispatched to the state.
+    """
+    global calls
+    calls = []
+    first = UnitUnderTest()
+    second = UnitUnderTest()
+    await first.start()
+    await second.start()
+    assert calls == [("enter", StateA, first), ("enter", StateA, second)]
+
+    calls = []
+    assert await second._process_event("next")
+    assert type(second.state) is StateB
+    assert type(first.state) is StateC
+    assert calls == [
+        ("next", StateA, second),
+        ("exit", StateA, second),
+        ("enter", StateB, second),
+    ]
@@ -0,0 +1,55 @@
+import logging
+
+from asyncio_state_pattern import State, StateMachine
+
+
+class StateA(State):
+    pass
+
+
+class StateB(State):
+    pass
+
+
+async def test_transition_logged(caplog):
+    """
+    Given debug logging is enabled, when a StateMachine transitions, then the
+    transition is logged with the machine's name as a prefix.
+    """
+    uut = StateMachine(states=[StateA, StateB])
+    with caplog.at_level(logging.DEBUG, logger="asyncio_state_pattern"):
+        await uut.start()
+        await uut.transition_to(StateB)
+    assert caplog.messages == [
+        "StateMachine: [*] -> StateA",
+        "StateMachine: StateA -> StateB",
+    ]
+
+
+async def test_transition_logged_structured(caplog):
+    """
+    Given debug logging is enabled and the StateMachine is initialized with
+    structured logs, when it transitions, then a dict is logged.
+    """
+    uut = StateMachine(states=[StateA, StateB], structured_logs=True)
+    with caplog.at_level(logging.DEBUG, logger="asyncio_state_pattern"):
+        await uut.start()
+    assert [r.msg for r in caplog.records] == [
+        {
+            "machine": "StateMachine",
+            "event": "transition",
+            "source": "[*]",
+            "dest": "StateA",
+        }
+    ]
+
+
+async def test_transition_not_logged_when_disabled(caplog):
+    """
+    Given debug logging is disabled, when a StateMachine transitions, then
+    nothing is logged.
+    """
+    uut = StateMachine(states=[StateA, StateB])
+    with caplog.at_level(logging.INFO, logger="asyncio_state_pattern"):
+        await uut.start()
+    assert caplog.records == []
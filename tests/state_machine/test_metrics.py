@@ -0,0 +1,146 @@
+import asyncio
+
+from asyncio_state_pattern import (
+    Event,
+    MachinePool,
+    Metrics,
+    MetricsSink,
+    State,
+    StateMachine,
+    on_event,
+)
+
+#   State
+#    / \
+#   A   C
+#   |
+#   B
+
+
+class Brew(Event):
+    pass
+
+
+class StateA(State):
+    @on_event("go")
+    async def on_go(self) -> bool:
+        await self.context.transition_to(StateC)
+        return True
+
+
+class StateB(StateA):
+    @on_event("go")
+    def on_go_b(self) -> bool:
+        return False
+
+    @on_event(Brew)
+    def on_brew(self, event: Brew) -> bool:
+        return True
+
+
+class StateC(State):
+    pass
+
+
+class UnitUnderTest(StateMachine):
+    def __init__(self, metrics=None):
+        super().__init__(states=[StateA, StateB, StateC], metrics=metrics)
+
+
+async def test_transitions_and_dwell_times():
+    """
+    Given a StateMachine with a metrics sink, when it transitions, then the
+    transition is counted and a dwell time is recorded for each exited state.
+    """
+    metrics = Metrics()
+    uut = UnitUnderTest(metrics)
+    await uut.start()
+    await uut.transition_to(StateC)
+    assert metrics.transitions == {
+        ("UnitUnderTest", "[*]", "StateB"): 1,
+        ("UnitUnderTest", "StateB", "StateC"): 1,
+    }
+    assert set(metrics.dwell) == {
+        ("UnitUnderTest", "StateB"),
+        ("UnitUnderTest", "StateA"),
+    }
+
+
+async def test_event_and_handler_latencies():
+    """
+    Given a StateMachine with a metrics sink, when events are processed, then
+    the latency of each event and each handler called is recorded.
+    """
+    metrics = Metrics()
+    uut = UnitUnderTest(metrics)
+    await uut.start()
+    assert await uut._process_event(Brew())
+    assert await uut._process_event("go")
+    assert not await uut._process_event("unknown")
+    assert set(metrics.events) == {
+        ("UnitUnderTest", "Brew"),
+        ("UnitUnderTest", "go"),
+        ("UnitUnderTest", "unknown"),
+    }
+    assert set(metrics.handlers) == {
+        ("UnitUnderTest", "StateB.on_brew"),
+        ("UnitUnderTest", "StateB.on_go_b"),
+        ("UnitUnderTest", "StateA.on_go"),
+    }
+    assert type(uut.state) is StateC
+
+
+async def test_queue_depth():
+    """
+    Given a running StateMachine with a metrics sink, then the queue depth is
+    recorded at the start of each batch of events.
+    """
+    metrics = Metrics()
+    uut = UnitUnderTest(metrics)
+    await uut.run()
+    await asyncio.sleep(0)
+    for _ in range(3):
+        uut.post_event("unknown")
+    await asyncio.sleep(0)
+    await uut.stop()
+    depth = metrics.queue_depth[("UnitUnderTest",)]
+    assert (depth.count, depth.sum) == (1, 3)
+
+
+async def test_sink_attached_later_and_detached():
+    """
+    Given a StateMachine without a metrics sink, when a sink is attached, then
+    measurements are recorded until it is detached.
+    """
+
+    class CountingSink(MetricsSink):
+        def __init__(self):
+            self.calls = 0
+
+        def record_transition(self, machine, source, dest):
+            self.calls += 1
+
+    sink = CountingSink()
+    uut = UnitUnderTest()
+    await uut.start()
+    uut.metrics = sink
+    await uut.transition_to(StateC)
+    uut.metrics = None
+    await uut.transition_to(StateB)
+    assert sink.calls == 1
+
+
+async def test_pool_metrics():
+    """
+    Given a MachinePool with a metrics sink, then the sink is attached to the
+    machines added to the pool.
+    """
+    metrics = Metrics()
+    pool = MachinePool(metrics=metrics)
+    pool.add("a", UnitUnderTest())
+    pool.add("b", UnitUnderTest())
+    await pool.start()
+    await pool.queue_event("a", "go")
+    await pool.queue_event("b", "go")
+    await pool.stop()
+    assert metrics.transitions[("UnitUnderTest", "StateB", "StateC")] == 2
@@ -0,0 +1,130 @@
+import pytest
+
+from asyncio_state_pattern import Metrics, State, StateMachine, on_event
+
+handled_by = []
+
+#   State
+#     |     \
+#     A     Off
+#     |
+#     B
+
+
+class StateA(State):
+    @on_event("consumed_by_a")
+    async def on_consumed_by_a(self) -> bool:
+        handled_by.append(self.__class__)
+        return True
+
+    @on_event("power")
+    async def on_power(self) -> bool:
+        handled_by.append(StateA)
+        return True
+
+    @on_event("not_consumed")
+    async def on_not_consumed(self) -> bool:
+        handled_by.append(self.__class__)
+        return False
+
+
+class StateB(StateA):
+    @on_event("consumed_by_b")
+    async def on_consumed_by_b(self) -> bool:
+        handled_by.append(self.__class__)
+        return True
+
+    @on_event("consumed_by_a")
+    async def on_passed_to_a(self) -> bool:
+        handled_by.append(self.__class__)
+        return False
+
+    @on_event("not_consumed")
+    async def on_not_consumed(self) -> bool:
+        handled_by.append(self.__class__)
+        return False
+
+    @on_event("power")
+    async def on_power(self) -> None:
+        handled_by.append(self.__class__)
+        await self.context.transition_to(Off)
+
+
+class Off(State):
+    pass
+
+
+async def make_uut(**kwargs) -> StateMachine:
+    global handled_by
+    handled_by = []
+    uut = StateMachine(states=[StateA, StateB, Off], **kwargs)
+    await uut.start()
+    assert type(uut.state) is StateB
+    return uut
+
+
+async def test_event_consumed_by_leaf_state():
+    """
+    Given an event that is consumed by the current state's handler, then the
+    event is not passed on to its super states.
+    """
+    uut = await make_uut()
+    assert await uut._process_event("consumed_by_b")
+    assert handled_by == [StateB]
+
+
+async def test_event_bubbles_to_super_state():
+    """
+    Given an event that is not consumed by the current state's handler, then
+    the event is passed on to the handlers of its super states.
+    """
+    uut = await make_uut()
+    assert await uut._process_event("consumed_by_a")
+    assert handled_by == [StateB, StateA]
+
+
+async def test_event_not_consumed():
+    """
+    Given an event that no handler consumes, or that has no handlers, then
+    the event is reported as not consumed.
+    """
+    uut = await make_uut()
+    assert not await uut._process_event("not_consumed")
+    assert handled_by == [StateB, StateA]
+    assert not await uut._process_event("unknown")
+
+
+@pytest.mark.parametrize("instrumented", [False, True])
+async def test_transition_ends_dispatch(instrumented: bool):
+    """
+    Given a handler that transitions out of the current state and returns a
+    falsy value, then the event is not passed on to the handlers of the
+    exited super states, and counts as consumed.
+    """
+    uut = await make_uut(metrics=Metrics() if instrumented else None)
+    assert await uut._process_event("power")
+    assert handled_by == [StateB]
+    assert type(uut.state) is Off
+
+
+async def test_run_once_processes_queued_event():
+    """
+    Given a queued event, when run_once is called, then the event is
+    dispatched to the current state.
+    """
+    uut = await make_uut()
+    await uut.queue_event("consumed_by_b")
+    await uut.run_once()
+    assert handled_by == [StateB]
+
+
+def test_process_event_override_deprecated():
+    """
+    Given a state class that overrides process_event, then a
+    DeprecationWarning is raised, as state machines do not call it.
+    """
+    with pytest.warns(DeprecationWarning, match="Custom overrides State.process_event"):
+
+        class Custom(State):
+            async def process_event(self, event, context=None) -> bool:
+                return True
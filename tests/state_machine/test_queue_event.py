@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from asyncio_state_pattern import State, StateMachine, on_event
+
+processed = []
+
+
+class StateA(State):
+    @on_event("tick")
+    async def on_tick(self) -> bool:
+        processed.append("tick")
+        return True
+
+
+async def test_post_event():
+    """
+    Given a running StateMachine, when an event is posted without waiting,
+    then the event is processed.
+    """
+    uut = StateMachine(states=[StateA])
+    await uut.run()
+    uut.post_event("tick")
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    await uut.stop()
+    assert processed == ["tick"]
+
+
+async def test_post_event_when_full():
+    """
+    Given a StateMachine with a maximum event queue size, when events are
+    posted without waiting, then they are queued until the queue is full.
+    """
+    uut = StateMachine(states=[StateA], max_event_queue_size=1)
+    uut.post_event("tick")
+    with pytest.raises(asyncio.QueueFull):
+        uut.post_event("tick")
+
+
+async def test_priority_events_processed_first():
+    """
+    Given a StateMachine with multiple priority levels, when events are
+    queued with different priorities, then higher priority events are
+    processed first.
+    """
+    global processed
+    processed = []
+
+    class StateB(State):
+        @on_event("low")
+        async def on_low(self) -> bool:
+            processed.append("low")
+            return True
+
+        @on_event("high")
+        async def on_high(self) -> bool:
+            processed.append("high")
+            return True
+
+    uut = StateMachine(states=[StateB], priority_levels=2)
+    await uut.start()
+    await uut.queue_event("low")
+    await uut.queue_event("high", priority=1)
+    await uut.run_once()
+    await uut.run_once()
+    assert processed == ["high", "low"]
+
+
+async def test_stop_does_not_wait_for_queued_events():
+    """
+    Given a running StateMachine with queued events, when it is stopped, then
+    it stops after the current event and the queued events are discarded.
+    """
+    global processed
+    processed = []
+
+    class SlowState(State):
+        @on_event("tick")
+        async def on_tick(self) -> bool:
+            await asyncio.sleep(0)
+            processed.append("tick")
+            return True
+
+    uut = StateMachine(states=[SlowState])
+    await uut.run()
+    for _ in range(10):
+        uut.post_event("tick")
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    await uut.stop()
+    assert 0 < len(processed) < 10
+    assert uut._event_queue.empty()
+
+
+async def test_coalesced_events():
+    """
+    Given a StateMachine, when events are queued with the coalesce key of a
+    pending event, then only the latest of those events is processed.
+    """
+    global processed
+    processed = []
+
+    class StateC(State):
+        @on_event("status_1")
+        async def on_status_1(self) -> bool:
+            processed.append("status_1")
+            return True
+
+        @on_event("status_2")
+        async def on_status_2(self) -> bool:
+            processed.append("status_2")
+            return True
+
+    uut = StateMachine(states=[StateC])
+    await uut.start()
+    await uut.queue_event("status_1", coalesce_key="status")
+    uut.post_event("status_2", coalesce_key="status")
+    await uut.run_once()
+    await uut.run_once()
+    assert processed == ["status_2"]
+    assert uut.event_queue_stats.coalesced == 1
@@ -0,0 +1,507 @@
+import asyncio
+
+import pytest
+
+from asyncio_state_pattern import (
+    State,
+    StateMachine,
+    StateMachineError,
+    on_entry,
+    on_event,
+    on_exit,
+)
+
+outputs = []
+
+#              State
+#             /     \
+#           Off     On (orthogonal)
+#                  /           \
+#              Heater         Network
+#              /    \         /     \
+#           Cold    Hot   Offline  Online
+
+
+class Off(State, initial=True):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Off:entry")
+
+    @on_exit
+    def exit(self) -> None:
+        outputs.append("Off:exit")
+
+    @on_event("power")
+    async def on_power(self) -> bool:
+        await self.context.transition_to(On)
+        return True
+
+
+class On(State, orthogonal=True):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("On:entry")
+
+    @on_exit
+    def exit(self) -> None:
+        outputs.append("On:exit")
+
+    @on_event("power")
+    async def on_power(self) -> bool:
+        await self.context.transition_to(Off)
+        return True
+
+    @on_event("ping")
+    def on_ping(self) -> bool:
+        outputs.append("On:ping")
+        return True
+
+
+class Heater(On):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Heater:entry")
+
+    @on_event("cool")
+    def on_cool(self) -> bool:
+        outputs.append("Heater:cool")
+        return True
+
+    @on_exit
+    def exit(self) -> None:
+        outputs.append("Heater:exit")
+
+
+class Cold(Heater, initial=True):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Cold:entry")
+
+    @on_exit
+    def exit(self) -> None:
+        outputs.append("Cold:exit")
+
+    @on_event("heat")
+    async def on_heat(self) -> bool:
+        await self.context.transition_to(Hot)
+        return True
+
+    @on_event("tick")
+    def on_tick(self) -> bool:
+        outputs.append("Cold:tick")
+        return True
+
+
+class Hot(Heater):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Hot:entry")
+
+    @on_exit
+    def exit(self) -> None:
+        outputs.append("Hot:exit")
+
+    @on_event("cool")
+    async def on_cool(self) -> None:
+        await self.context.transition_to(Cold)
+
+
+class Network(On):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Network:entry")
+
+    @on_exit
+    def exit(self) -> None:
+        outputs.append("Network:exit")
+
+
+class Offline(Network, initial=True):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Offline:entry")
+
+    @on_exit
+    def exit(self) -> None:
+        outputs.append("Offline:exit")
+
+    @on_event("connect")
+    async def on_connect(self) -> bool:
+        await self.context.transition_to(Online)
+        return True
+
+    @on_event("tick")
+    def on_tick(self) -> bool:
+        outputs.append("Offline:tick")
+        return True
+
+
+class Online(Network, timeout=30):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Online:entry")
+
+    @on_exit
+    def exit(self) -> None:
+        outputs.append("Online:exit")
+
+
+# Independent regions
+
+handshake: asyncio.Event = None
+
+
+class Busy(State, orthogonal=True, independent=True):
+    pass
+
+
+class Waiting(Busy):
+    @on_event("sync")
+    async def on_sync(self) -> bool:
+        await handshake.wait()
+        outputs.append("Waiting:sync")
+        return True
+
+
+class Signalling(Busy):
+    @on_event("sync")
+    async def on_sync(self) -> bool:
+        await asyncio.sleep(0)
+        handshake.set()
+        outputs.append("Signalling:sync")
+        return True
+
+
+class Leaving(Busy):
+    @on_event("leave")
+    async def on_leave(self) -> None:
+        await asyncio.sleep(0)
+        await self.context.transition_to(Off)
+
+
+class Lingering(Busy):
+    @on_event("leave")
+    async def on_leave(self) -> bool:
+        try:
+            await handshake.wait()
+        except asyncio.CancelledError:
+            outputs.append("Lingering:cancelled")
+            raise
+        await self.context.transition_to(Busy)
+        return True
+
+
+def create_machine() -> StateMachine:
+    return StateMachine(states=[Off, Cold, Hot, Offline, Online])
+
+
+@pytest.fixture(autouse=True)
+def before_each():
+    outputs.clear()
+
+
+async def test_enter_orthogonal_state():
+    """
+    Given a StateMachine in a simple state
+    When it transitions to an orthogonal state
+    Then the orthogonal state and the initial chain of each of its regions
+    are entered in order, and each region's state is active.
+    """
+    machine = create_machine()
+    await machine.start()
+    outputs.clear()
+
+    await machine.transition_to(On)
+
+    assert outputs == [
+        "Off:exit",
+        "On:entry",
+        "Heater:entry",
+        "Cold:entry",
+        "Network:entry",
+        "Offline:entry",
+    ]
+    assert isinstance(machine.state, On)
+    assert [s.name for s in machine.active_states] == ["Cold", "Offline"]
+
+
+async def test_enter_state_in_region():
+    """
+    Given a StateMachine in a simple state
+    When it transitions to a state inside one region of an orthogonal state
+    Then that region is entered at the state and the other regions at their
+    initial states.
+    """
+    machine = create_machine()
+    await machine.start()
+    outputs.clear()
+
+    await machine.transition_to(Online)
+
+    assert outputs == [
+        "Off:exit",
+        "On:entry",
+        "Heater:entry",
+        "Cold:entry",
+        "Network:entry",
+        "Online:entry",
+    ]
+    assert [s.name for s in machine.active_states] == ["Cold", "Online"]
+
+
+async def test_event_dispatched_to_every_region():
+    """
+    Given a StateMachine in an orthogonal state
+    When an event handled by the states of both regions is processed
+    Then each region's handler runs, in region order, and the event does not
+    bubble out to the orthogonal state.
+    """
+    machine = create_machine()
+    await machine.start()
+    await machine._process_event("power")
+    outputs.clear()
+
+    consumed = await machine._process_event("tick")
+
+    assert consumed
+    assert outputs == ["Cold:tick", "Offline:tick"]
+
+
+async def test_unconsumed_event_bubbles_out_of_regions():
+    """
+    Given a StateMachine in an orthogonal state
+    When an event that no region handles is processed
+    Then it is handled by the orthogonal state.
+    """
+    machine = create_machine()
+    await machine.start()
+    await machine._process_event("power")
+    outputs.clear()
+
+    assert await machine._process_event("ping")
+    assert outputs == ["On:ping"]
+    assert not await machine._process_event("unknown")
+
+
+async def test_transition_within_region():
+    """
+    Given a StateMachine in an orthogonal state
+    When a region handler transitions to another state in its region
+    Then only that region's states are exited and entered.
+    """
+    machine = create_machine()
+    await machine.start()
+    await machine._process_event("power")
+    outputs.clear()
+
+    await machine._process_event("connect")
+
+    assert outputs == ["Offline:exit", "Online:entry"]
+    assert [s.name for s in machine.active_states] == ["Cold", "Online"]
+
+    outputs.clear()
+    await machine._process_event("heat")
+
+    assert outputs == ["Cold:exit", "Hot:entry"]
+    assert [s.name for s in machine.active_states] == ["Hot", "Online"]
+
+
+async def test_transition_within_region_ends_region_dispatch():
+    """
+    Given a StateMachine in an orthogonal state
+    When a region handler transitions within its region and returns a falsy
+    value
+    Then the event is not passed on to the handlers of the region's super
+    states, and counts as consumed.
+    """
+    machine = create_machine()
+    await machine.start()
+    await machine.transition_to(Hot)
+    outputs.clear()
+
+    assert await machine._process_event("cool")
+
+    assert outputs == ["Hot:exit", "Cold:entry"]
+    assert [s.name for s in machine.active_states] == ["Cold", "Offline"]
+
+
+async def test_leave_orthogonal_state():
+    """
+    Given a StateMachine in an orthogonal state
+    When it transitions to a state outside the orthogonal state
+    Then each region's chain is exited, last region first, before the
+    orthogonal state, and only the destination is active.
+    """
+    machine = create_machine()
+    await machine.start()
+    await machine.transition_to(Hot)
+    outputs.clear()
+
+    await machine._process_event("power")
+
+    assert outputs == [
+        "Offline:exit",
+        "Network:exit",
+        "Hot:exit",
+        "Heater:exit",
+        "On:exit",
+        "Off:entry",
+    ]
+    assert machine.active_states == (machine.state,)
+    assert isinstance(machine.state, Off)
+
+
+async def test_transition_to_orthogonal_state_resets_regions():
+    """
+    Given a StateMachine in an orthogonal state with one region away from its
+    initial state
+    When it transitions to the orthogonal state
+    Then only that region returns to its initial state.
+    """
+    machine = create_machine()
+    await machine.start()
+    await machine.transition_to(Online)
+    outputs.clear()
+
+    await machine.transition_to(On)
+
+    assert outputs == ["Online:exit", "Offline:entry"]
+    assert [s.name for s in machine.active_states] == ["Cold", "Offline"]
+
+
+async def test_region_timeouts():
+    """
+    Given a StateMachine in an orthogonal state
+    When a state with a timeout is entered in a region and then exited
+    Then its timeout is scheduled and then cancelled, and timers can be
+    scheduled for the active states of regions.
+    """
+    machine = create_machine()
+    await machine.start()
+    await machine.transition_to(Online)
+    online = machine._state_tree.nodes["Online"].index
+    assert [i for t, i in machine._timers.items() if t.pending] == [online]
+
+    timer = machine.schedule_event(10, "tick", state=Heater)
+    await machine._process_event("power")
+
+    assert not any(t.pending for t in machine._timers)
+    assert not timer.pending
+
+
+async def test_snapshot_regions():
+    """
+    Given a snapshot of a StateMachine in an orthogonal state
+    When it is restored into a new StateMachine
+    Then the new machine has the same state active in each region.
+    """
+    machine = create_machine()
+    await machine.start()
+    await machine.transition_to(Hot)
+    snapshot = machine.snapshot()
+
+    restored = create_machine()
+    restored.restore(snapshot)
+
+    assert isinstance(restored.state, On)
+    assert [s.name for s in restored.active_states] == ["Hot", "Offline"]
+    outputs.clear()
+    await restored._process_event("connect")
+    assert outputs == ["Offline:exit", "Online:entry"]
+
+
+async def test_independent_regions_dispatch_concurrently():
+    """
+    Given a StateMachine in an independent orthogonal state, whose first
+    region's handler waits for the second region's handler
+    When the event is processed
+    Then both handlers run concurrently and complete.
+    """
+    global handshake
+    handshake = asyncio.Event()
+    machine = StateMachine(states=[Waiting, Signalling])
+    await machine.start()
+
+    consumed = await asyncio.wait_for(machine._process_event("sync"), 1)
+
+    assert consumed
+    assert outputs == ["Signalling:sync", "Waiting:sync"]
+
+
+async def test_leaving_independent_state_cancels_other_regions():
+    """
+    Given a StateMachine in an independent orthogonal state
+    When one region's handler leaves the orthogonal state while another
+    region's handler is still waiting
+    Then the waiting handler is cancelled before the orthogonal state is
+    exited, and does not resume on the exited states.
+    """
+    global handshake
+    handshake = asyncio.Event()
+    machine = StateMachine(states=[Off, Leaving, Lingering])
+    await machine.start()
+    await machine.transition_to(Busy)
+    outputs.clear()
+
+    consumed = await asyncio.wait_for(machine._process_event("leave"), 1)
+    handshake.set()
+    await asyncio.sleep(0)
+
+    assert consumed
+    assert outputs == ["Lingering:cancelled", "Off:entry"]
+    assert machine.active_states == (machine.state,)
+    assert isinstance(machine.state, Off)
+
+
+async def test_transition_in_progress_in_region():
+    """
+    Given a StateMachine in an orthogonal state with a transition in progress
+    in one region
+    When another transition is made in the same region, or out of the
+    orthogonal state
+    Then a StateMachineError is raised.
+    """
+    machine = create_machine()
+    await machine.start()
+    await machine.transition_to(On)
+    machine._busy_regions.add(0)
+
+    with pytest.raises(StateMachineError):
+        await machine.transition_to(Hot)
+    with pytest.raises(StateMachineError):
+        await machine.transition_to(Off)
+
+    await machine.transition_to(Online)
+    assert [s.name for s in machine.active_states] == ["Cold", "Online"]
+
+
+def test_orthogonal_state_requires_regions():
+    class Empty(State, orthogonal=True):
+        pass
+
+    with pytest.raises(ValueError, match="has no regions"):
+        StateMachine(states=[Empty])
+
+
+def test_nested_orthogonal_state_rejected():
+    class Outer(State, orthogonal=True):
+        pass
+
+    class Inner(Outer, orthogonal=True):
+        pass
+
+    class Leaf(Inner):
+        pass
+
+    class Other(Outer):
+        pass
+
+    with pytest.raises(ValueError, match="inside a region"):
+        StateMachine(states=[Leaf, Other])
+
+
+def test_independent_requires_orthogonal():
+    with pytest.raises(ValueError, match="independent"):
+
+        class Concurrent(State, independent=True):
+            pass
@@ -0,0 +1,136 @@
+import pytest
+
+from asyncio_state_pattern import (
+    Journal,
+    MachinePool,
+    State,
+    StateMachine,
+    on_entry,
+    on_event,
+    on_exit,
+    read_journal,
+    replay_journal,
+)
+
+outputs = []
+
+#      State
+#     /     \
+#   Idle   Brewing (timeout)
+
+
+class Idle(State):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Idle:entry")
+
+    @on_exit
+    async def exit(self) -> None:
+        outputs.append("Idle:exit")
+
+    @on_event("brew")
+    async def on_brew(self) -> bool:
+        outputs.append("Idle:brew")
+        await self.context.transition_to(Brewing)
+        return True
+
+
+class Brewing(State, timeout=30):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Brewing:entry")
+
+    @on_event("done")
+    async def on_done(self) -> bool:
+        outputs.append("Brewing:done")
+        await self.context.transition_to(Idle)
+        return True
+
+
+def create_machine(**kwargs) -> StateMachine:
+    return StateMachine(states=[Idle, Brewing], **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def before_each():
+    outputs.clear()
+
+
+async def test_replay_without_actions():
+    """
+    Given a StateMachine that has not been started
+    When events are replayed into it
+    Then its handlers run but entry and exit actions do not, and the timeout
+    of the final state is scheduled.
+    """
+    uut = create_machine()
+    assert await uut.replay(["brew", "done", "brew"]) == 3
+    assert outputs == ["Idle:brew", "Brewing:done", "Idle:brew"]
+    assert uut.state.__class__ is Brewing
+    assert [i for i in uut._timers.values()] == [
+        uut._state_tree.nodes["Brewing"].index
+    ]
+    assert not uut._instrumented
+
+    outputs.clear()
+    await uut._process_event("done")
+    assert outputs == ["Brewing:done", "Idle:entry"]
+
+
+async def test_replay_with_actions():
+    """
+    Given a StateMachine, when events are replayed with `run_actions`, then
+    entry and exit actions run as when the events were first processed.
+    """
+    uut = create_machine()
+    await uut.replay(["brew"], run_actions=True)
+    assert outputs == ["Idle:entry", "Idle:brew", "Idle:exit", "Brewing:entry"]
+
+
+async def test_journal_processed_events(tmp_path):
+    """
+    Given a StateMachine with a journal
+    When it processes events
+    Then each event is appended to the journal with the machine's key, and
+    events replayed into the machine are not.
+    """
+    path = str(tmp_path / "journal")
+    journal = Journal(path, flush_interval=0)
+    uut = create_machine(journal=journal, journal_key="m1")
+    await uut.start()
+    await uut.run_once()
+    uut.post_event("brew")
+    uut.post_event("done")
+    await uut.run_once()
+    await uut.run_once()
+    await uut.replay(["brew"])
+    await journal.flush()
+    journal.close()
+    assert list(read_journal(path)) == [("m1", "brew"), ("m1", "done")]
+
+
+async def test_replay_journal_into_pool(tmp_path):
+    """
+    Given a MachinePool with a journal, then the events of its machines can
+    be replayed into a new pool to rebuild their states.
+    """
+    path = str(tmp_path / "journal")
+    journal = Journal(path)
+    pool = MachinePool(journal=journal)
+    for key in ("a", "b"):
+        pool.add(key, create_machine())
+    await pool.start()
+    await pool.queue_event("a", "brew")
+    await pool.queue_event("b", "brew")
+    await pool.queue_event("b", "done")
+    await pool.stop()
+    journal.close()
+
+    restored = MachinePool()
+    for key in ("a", "b"):
+        restored.add(key, create_machine())
+    outputs.clear()
+    assert await replay_journal(path, restored) == 3
+    assert "Brewing:entry" not in outputs
+    assert restored["a"].state.__class__ is Brewing
+    assert restored["b"].state.__class__ is Idle
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from asyncio_state_pattern import State, StateMachine, on_event
+
+processed = []
+
+
+class StateA(State):
+    @on_event("tick")
+    async def on_tick(self) -> bool:
+        processed.append("tick")
+        return True
+
+
+@pytest.fixture(autouse=True)
+def reset_test_outputs():
+    global processed
+    processed = []
+
+
+async def run_burst(uut: StateMachine, burst_size: int) -> None:
+    await uut.run()
+    await asyncio.sleep(0)  # Let the machine start and wait for events
+    for _ in range(burst_size):
+        uut._event_queue.put_nowait("tick")
+    while len(processed) < burst_size:
+        await asyncio.sleep(0)
+    await uut.stop()
+
+
+async def test_ready_events_drained_in_one_batch():
+    """
+    Given a running StateMachine without a batch size limit, when a burst of
+    events is queued, then all ready events are processed in one batch.
+    """
+    uut = StateMachine(states=[StateA])
+    await run_burst(uut, 10)
+    assert uut.run_loop_stats.batches == 1
+    assert uut.run_loop_stats.events == 10
+    assert uut.run_loop_stats.max_batch_size == 10
+
+
+async def test_max_batch_size():
+    """
+    Given a running StateMachine with a batch size limit, when a burst of
+    events is queued, then events are processed in batches of at most that
+    size.
+    """
+    uut = StateMachine(states=[StateA], max_batch_size=4)
+    await run_burst(uut, 10)
+    assert uut.run_loop_stats.batches == 3
+    assert uut.run_loop_stats.events == 10
+    assert uut.run_loop_stats.max_batch_size == 4
+    assert uut.run_loop_stats.mean_batch_size == pytest.approx(10 / 3)
+
+
+async def test_yield_every():
+    """
+    Given a running StateMachine configured to yield every 2 events, when a
+    burst of events is queued, then other tasks run while the batch is
+    drained.
+    """
+    uut = StateMachine(states=[StateA], yield_every=2)
+    observed = []
+
+    async def observer():
+        while len(processed) < 6:
+            observed.append(len(processed))
+            await asyncio.sleep(0)
+
+    task = asyncio.get_running_loop().create_task(observer())
+    await run_burst(uut, 6)
+    await task
+    assert uut.run_loop_stats.batches == 1
+    assert 2 in observed and 4 in observed
+
+
+def test_invalid_batch_options():
+    """
+    When a StateMachine is initialized with an invalid batch size or yield
+    interval, then a ValueError is raised.
+    """
+    with pytest.raises(ValueError):
+        StateMachine(states=[StateA], max_batch_size=0)
+    with pytest.raises(ValueError):
+        StateMachine(states=[StateA], yield_every=-1)
@@ -0,0 +1,101 @@
+import gc
+import weakref
+
+from asyncio_state_pattern import State, StateMachine, on_entry
+
+
+class StateA(State):
+    pass
+
+
+class StateB(State):
+    pass
+
+
+class StateC(StateB):
+    pass
+
+
+async def test_state_tree_shared_between_instances():
+    """
+    When multiple StateMachines are initialized with the same list of state
+    classes, then they share one state tree but have their own state instances.
+    """
+
+    class UnitUnderTest(StateMachine):
+        def __init__(self):
+            super().__init__(states=[StateA, StateB])
+
+    first = UnitUnderTest()
+    second = UnitUnderTest()
+    assert first._state_tree is second._state_tree
+
+    await first.start()
+    await second.start()
+    assert type(first.state) is StateA
+    assert first.state is not second.state
+    assert first.state.context is first
+    assert second.state.context is second
+
+
+async def test_state_tree_keyed_by_state_classes():
+    """
+    When StateMachines are initialized with different lists of state classes,
+    or the same classes in a different order, then they use different trees.
+    """
+    first = StateMachine(states=[StateA, StateB])
+    second = StateMachine(states=[StateB, StateA])
+    assert first._state_tree is not second._state_tree
+
+    await second.start()
+    assert type(second.state) is StateB
+
+
+def test_state_tree_cache_bounded(monkeypatch):
+    """
+    When more trees of dynamically created state classes are built than the
+    cache holds, then the least recently used tree and its state classes are
+    released, while recently used trees are kept.
+    """
+    monkeypatch.setattr(StateMachine, "_state_trees", {})
+    monkeypatch.setattr(StateMachine, "max_state_trees", 2)
+
+    def create_machine() -> StateMachine:
+        return StateMachine(states=[type("Dynamic", (State,), {})])
+
+    first = create_machine()
+    state_class = weakref.ref(type(first._states[0]))
+    del first
+    StateMachine(states=[StateA])
+    create_machine()
+    StateMachine(states=[StateA])
+    create_machine()
+    gc.collect()
+
+    assert state_class() is None
+    assert len(StateMachine._state_trees) == 2
+    assert (StateA,) in StateMachine._state_trees
+
+
+async def test_inferred_composite_state_instantiated():
+    """
+    When a StateMachine is initialized with a sub state but not its composite
+    state, then the composite state is instantiated and its entry actions are
+    run when the sub state is entered.
+    """
+    entered = []
+
+    class Outer(State):
+        @on_entry
+        async def entry(self) -> None:
+            entered.append(self.__class__)
+
+    class Inner(Outer):
+        @on_entry
+        async def entry(self) -> None:
+            entered.append(self.__class__)
+
+    uut = StateMachine(states=[Inner])
+    await uut.start()
+    assert type(uut.state) is Inner
+    assert entered == [Outer, Inner]
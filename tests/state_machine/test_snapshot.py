@@ -0,0 +1,166 @@
+import pytest
+
+from asyncio_state_pattern import (
+    Event,
+    State,
+    StateMachine,
+    StateMachineError,
+    on_entry,
+    on_event,
+)
+
+outputs = []
+
+#      State
+#     /     \
+#   Idle   Brewing (timeout)
+#          /     \
+#     Grinding  Pouring
+
+
+class Brew(Event):
+    __slots__ = ("strength",)
+
+
+class Idle(State):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Idle:entry")
+
+    @on_event(Brew)
+    async def on_brew(self, event: Brew) -> bool:
+        outputs.append(f"Idle:brew:{event.strength}")
+        await self.context.transition_to(Brewing)
+        return True
+
+
+class Brewing(State, timeout=30):
+    def __init__(self) -> None:
+        super().__init__()
+        self.cups = 0
+
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Brewing:entry")
+
+    def snapshot_data(self):
+        return self.cups or None
+
+    def restore_data(self, data) -> None:
+        self.cups = data
+
+
+class Grinding(Brewing, initial=True):
+    @on_event("ground")
+    async def on_ground(self) -> bool:
+        await self.context.transition_to(Pouring)
+        return True
+
+
+class Pouring(Brewing):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Pouring:entry")
+
+
+def create_machine() -> StateMachine:
+    return StateMachine(states=[Idle, Grinding, Pouring], priority_levels=2)
+
+
+@pytest.fixture(autouse=True)
+def before_each():
+    outputs.clear()
+
+
+async def test_restore_active_state():
+    """
+    Given a snapshot of a started StateMachine in a nested state
+    When it is restored into a new StateMachine
+    Then the new machine is in the same state, without having run entry
+    actions, and handles events like the original machine.
+    """
+    machine = create_machine()
+    await machine.start()
+    await machine._process_event(Brew(3))
+    await machine._process_event("ground")
+    snapshot = machine.snapshot()
+    outputs.clear()
+
+    uut = create_machine()
+    uut.restore(snapshot)
+    assert uut.state.__class__ is Pouring
+    assert outputs == []
+    assert len(uut._timers) == 1
+
+    await uut.transition_to(Idle)
+    assert outputs == ["Idle:entry"]
+
+
+async def test_restore_state_data_and_events():
+    """
+    Given a StateMachine with state data and queued events
+    When a snapshot of it is restored
+    Then the state data is restored and the events are queued with their
+    priorities and coalesce keys.
+    """
+    machine = create_machine()
+    await machine.start()
+    machine._states[machine._state_tree.nodes["Brewing"].index].cups = 2
+    machine.post_event(Brew(1))
+    machine.post_event("ground", priority=1, coalesce_key="g")
+
+    uut = create_machine()
+    uut.restore(machine.snapshot())
+    assert uut._states[uut._state_tree.nodes["Brewing"].index].cups == 2
+    pending = uut._event_queue.pending()
+    assert [(type(e), p, k) for e, p, k in pending] == [
+        (str, 1, "g"),
+        (Brew, 0, None),
+    ]
+    assert pending[1][0].strength == 1
+
+    await uut.run_once()
+    await uut.run_once()
+    assert outputs == ["Idle:entry", "Idle:brew:1", "Brewing:entry"]
+
+
+async def test_restore_not_started():
+    """
+    Given a StateMachine that has not been started but has queued events
+    When a snapshot of it is restored
+    Then the new machine is not started and its events are queued.
+    """
+    machine = create_machine()
+    machine.post_event("ground")
+    uut = create_machine()
+    uut.restore(machine.snapshot())
+    assert uut.state is None
+    assert uut._event_queue.pending() == [("ground", 0, None)]
+
+
+async def test_restore_started():
+    """
+    Given a StateMachine that has been started, then a snapshot cannot be
+    restored into it.
+    """
+    machine = create_machine()
+    await machine.start()
+    with pytest.raises(StateMachineError):
+        machine.restore(machine.snapshot())
+
+
+async def test_restore_unknown_state():
+    """
+    Given a snapshot of a machine with different states, then it cannot be
+    restored.
+    """
+    other = StateMachine(states=[Pouring])
+    machine = StateMachine(states=[Idle])
+    await machine.start()
+    with pytest.raises(ValueError):
+        other.restore(machine.snapshot())
+
+
+def test_restore_invalid_snapshot():
+    with pytest.raises(ValueError):
+        create_machine().restore(b"not a snapshot")
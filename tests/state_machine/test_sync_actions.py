@@ -0,0 +1,102 @@
+from asyncio_state_pattern import State, StateMachine, on_entry, on_exit, on_event
+
+outputs = []
+
+#   State
+#    / \
+#   A   C
+#   |
+#   B
+
+
+class StateA(State):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("A:entry")
+
+    @on_exit
+    async def exit_(self) -> None:
+        outputs.append("A:exit")
+
+    @on_event("go")
+    def on_go(self) -> bool:
+        outputs.append("A:go")
+        return True
+
+
+class StateB(StateA):
+    @on_entry
+    async def entry(self) -> None:
+        outputs.append("B:entry")
+
+    @on_exit
+    def exit_(self) -> None:
+        outputs.append("B:exit")
+
+    @on_event("go")
+    def on_go(self) -> bool:
+        outputs.append("B:go")
+        return False
+
+
+class StateC(State, flyweight=True):
+    @on_entry
+    def entry(self, machine: StateMachine) -> None:
+        outputs.append(f"C:entry:{machine.name}")
+
+    @on_event("go")
+    def on_go(self, machine: StateMachine) -> bool:
+        outputs.append(f"C:go:{machine.name}")
+        return True
+
+
+async def make_uut() -> StateMachine:
+    global outputs
+    outputs = []
+    uut = StateMachine(states=[StateA, StateB, StateC])
+    await uut.start()
+    return uut
+
+
+async def test_sync_and_async_entry_and_exit_actions():
+    """
+    Given states with a mix of plain function and coroutine function entry and
+    exit actions, when transitioning, then all actions run in order.
+    """
+    uut = await make_uut()
+    await uut.transition_to(StateC)
+    assert outputs == [
+        "A:entry",
+        "B:entry",
+        "B:exit",
+        "A:exit",
+        "C:entry:StateMachine",
+    ]
+
+
+async def test_sync_event_handlers():
+    """
+    Given plain function event handlers, then their return value determines
+    whether the event bubbles to the super state.
+    """
+    uut = await make_uut()
+    assert await uut._process_event("go")
+    assert outputs[-2:] == ["B:go", "A:go"]
+
+    await uut.transition_to(StateC)
+    assert await uut._process_event("go")
+    assert outputs[-1] == "C:go:StateMachine"
+
+
+async def test_state_methods_call_sync_actions():
+    """
+    Given a state with plain function actions, when its enter, exit and
+    process_event methods are called directly, then the actions are run.
+    """
+    global outputs
+    outputs = []
+    state = StateB()
+    await state.enter()
+    await state.exit()
+    assert not await state.process_event("go")
+    assert outputs == ["B:entry", "B:exit", "B:go"]
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+
+import pytest
+
+from asyncio_state_pattern import (
+    MachinePool,
+    State,
+    StateMachine,
+    StateMachineError,
+    on_event,
+)
+
+outputs = []
+
+
+class Counting(State):
+    @on_event("count")
+    def on_count(self) -> bool:
+        outputs.append(threading.get_ident())
+        return True
+
+
+@pytest.fixture(autouse=True)
+def before_each():
+    outputs.clear()
+
+
+async def wait_for_outputs(count: int) -> None:
+    for _ in range(1000):
+        if len(outputs) >= count:
+            return
+        await asyncio.sleep(0.001)
+
+
+async def test_post_from_threads():
+    """
+    Given a running StateMachine
+    When events are posted from several threads
+    Then every event is processed on the event loop's thread.
+    """
+    uut = StateMachine(states=[Counting])
+    await uut.run()
+
+    def produce() -> None:
+        for _ in range(500):
+            uut.post_event_threadsafe("count")
+
+    threads = [threading.Thread(target=produce) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        await asyncio.get_running_loop().run_in_executor(None, thread.join)
+    await wait_for_outputs(2000)
+    await uut.stop()
+    assert outputs == [threading.get_ident()] * 2000
+
+
+async def test_one_wakeup_per_batch(monkeypatch):
+    """
+    Given a started StateMachine
+    When many events are posted from another thread before the loop runs
+    Then the loop is woken once to queue all of them, in order.
+    """
+    uut = StateMachine(states=[Counting])
+    await uut.start()
+    loop = asyncio.get_running_loop()
+    wakeups = []
+    call_soon_threadsafe = loop.call_soon_threadsafe
+    monkeypatch.setattr(
+        loop,
+        "call_soon_threadsafe",
+        lambda *args: wakeups.append(args) or call_soon_threadsafe(*args),
+    )
+
+    thread = threading.Thread(
+        target=lambda: [uut.post_event_threadsafe(i) for i in range(100)]
+    )
+    thread.start()
+    thread.join()
+    assert len(wakeups) == 1
+    await asyncio.sleep(0)
+    assert [uut._event_queue.get_nowait() for _ in range(100)] == list(range(100))
+
+
+async def test_pool_machines():
+    """
+    Given a machine added to a running MachinePool before it has been
+    started, then events can be posted to it from other threads.
+    """
+    pool = MachinePool()
+    await pool.start()
+    pool.add("a", StateMachine(states=[Counting]))
+    thread = threading.Thread(target=lambda: pool["a"].post_event_threadsafe("count"))
+    thread.start()
+    thread.join()
+    await wait_for_outputs(1)
+    await pool.stop()
+    assert len(outputs) == 1
+
+
+def test_not_started():
+    with pytest.raises(StateMachineError):
+        StateMachine(states=[Counting]).post_event_threadsafe("count")
+
+
+async def test_full_queue_drops_event(caplog):
+    """
+    Given a started StateMachine whose event queue is full
+    When an event is posted from another thread
+    Then the event is dropped and logged, and the queued event is kept.
+    """
+    uut = StateMachine(states=[Counting], max_event_queue_size=1)
+    await uut.start()
+
+    thread = threading.Thread(
+        target=lambda: [uut.post_event_threadsafe(i) for i in range(2)]
+    )
+    thread.start()
+    thread.join()
+    await asyncio.sleep(0)
+
+    assert "dropped event 1" in caplog.text
+    assert len(uut._event_queue) == 1
@@ -0,0 +1,180 @@
+import asyncio
+
+import pytest
+
+from asyncio_state_pattern import (
+    State,
+    StateMachine,
+    StateMachineError,
+    TimerWheel,
+    on_event,
+)
+
+outputs = []
+
+#      State
+#     /     \
+#   Idle   Heating (timeout)
+#          /     \
+#      Warming   Holding
+
+
+class Idle(State):
+    @on_event("ping")
+    def on_ping(self) -> bool:
+        outputs.append("Idle:ping")
+        return True
+
+
+class Heating(State, timeout=0.05, timeout_event="overheat"):
+    @on_event("overheat")
+    async def on_overheat(self) -> bool:
+        outputs.append("Heating:overheat")
+        await self.context.transition_to(Idle)
+        return True
+
+    @on_event("ping")
+    def on_ping(self) -> bool:
+        outputs.append("Heating:ping")
+        return True
+
+
+class Warming(Heating, initial=True):
+    pass
+
+
+class Holding(Heating):
+    pass
+
+
+class UnitUnderTest(StateMachine):
+    def __init__(self):
+        super().__init__(states=[Idle, Heating, Warming, Holding])
+
+
+async def make_uut() -> StateMachine:
+    global outputs
+    outputs = []
+    uut = UnitUnderTest()
+    await uut.run()
+    await asyncio.sleep(0)
+    return uut
+
+
+async def test_state_timeout():
+    """
+    Given a state declared with a timeout, when the state has been active for
+    the timeout, then its timeout event is queued. Sub states do not inherit
+    the timeout.
+    """
+    uut = await make_uut()
+    await uut.transition_to(Warming)
+    await asyncio.sleep(0.1)
+    assert outputs == ["Heating:overheat"]
+    assert type(uut.state) is Idle
+    assert not uut._timers
+    await uut.stop()
+
+
+async def test_state_timeout_cancelled_on_exit():
+    """
+    Given a state declared with a timeout, when the state is exited before the
+    timeout, then the timeout event is not queued, and transitions between its
+    sub states do not restart the timeout.
+    """
+    uut = await make_uut()
+    await uut.transition_to(Warming)
+    wheel = TimerWheel.for_loop()
+    pending = len(wheel)
+    await uut.transition_to(Holding)
+    assert len(wheel) == pending
+    await uut.transition_to(Idle)
+    assert len(wheel) == pending - 1
+    await asyncio.sleep(0.1)
+    assert outputs == []
+    await uut.stop()
+
+
+async def test_scheduled_event_owned_by_state():
+    """
+    Given events scheduled while a sub state is active, then an event owned by
+    the sub state is cancelled when the sub state exits, and an event owned by
+    its super state is queued after the delay.
+    """
+    uut = await make_uut()
+    await uut.transition_to(Warming)
+    leaf_timer = uut.schedule_event(0.02, "ping")
+    super_timer = uut.schedule_event(0.02, "ping", state=Heating)
+    await uut.transition_to(Holding)
+    assert not leaf_timer.pending
+    assert super_timer.pending
+    await asyncio.sleep(0.04)
+    assert outputs == ["Heating:ping"]
+    await uut.stop()
+
+
+async def test_scheduled_event_cancelled():
+    """
+    Given a scheduled event, when its timer is cancelled, then the event is not
+    queued.
+    """
+    uut = await make_uut()
+    uut.schedule_event(0.02, "ping")
+    uut.schedule_event(0.02, "ping").cancel()
+    await asyncio.sleep(0.04)
+    assert outputs == ["Idle:ping"]
+    await uut.stop()
+
+
+async def test_stop_cancels_timers():
+    """
+    Given a scheduled event, when the state machine is stopped, then the event's
+    timer is cancelled.
+    """
+    uut = await make_uut()
+    timer = uut.schedule_event(0.02, "ping")
+    await uut.stop()
+    assert not timer.pending
+
+
+async def test_full_queue_drops_scheduled_event(caplog):
+    """
+    Given a started state machine whose bounded event queue is full, when a
+    scheduled event fires, then the event is dropped and logged, and the
+    queued event is kept.
+    """
+    uut = StateMachine(states=[Idle], max_event_queue_size=1)
+    await uut.start()
+    uut.post_event("ping")
+    timer = uut.schedule_event(0.01, "overheat")
+    await asyncio.sleep(0.03)
+    assert not timer.pending
+    assert "dropped scheduled event 'overheat'" in caplog.text
+    assert len(uut._event_queue) == 1
+
+
+async def test_schedule_event_invalid():
+    """
+    Given a state machine that is not started, or a state that is not active,
+    then schedule_event raises an error.
+    """
+    uut = UnitUnderTest()
+    with pytest.raises(StateMachineError):
+        uut.schedule_event(1, "ping")
+
+    await uut.start()
+    with pytest.raises(ValueError):
+        uut.schedule_event(1, "ping", state=Heating)
+    with pytest.raises(ValueError):
+        uut.schedule_event(-1, "ping")
+
+
+def test_invalid_timeout():
+    """
+    Given a state declared with a timeout that is not positive, then an error
+    is raised.
+    """
+    with pytest.raises(ValueError):
+
+        class InvalidTimeout(State, timeout=0):
+            pass
@@ -0,0 +1,106 @@
+from asyncio_state_pattern import MachinePool, State, StateMachine, Tracer
+from asyncio_state_pattern import on_entry, on_event, on_exit
+
+#   State
+#    / \
+#   A   C
+#   |
+#   B
+
+
+class StateA(State):
+    @on_exit
+    async def exit_a(self) -> None:
+        pass
+
+
+class StateB(StateA):
+    @on_entry
+    def entry_b(self) -> None:
+        pass
+
+    @on_exit
+    def exit_b(self) -> None:
+        pass
+
+    @on_event("go")
+    async def on_go(self) -> bool:
+        await self.context.transition_to(StateC)
+        return True
+
+
+class StateC(State):
+    pass
+
+
+def spans(tracer: Tracer):
+    return [
+        (e["cat"], e["name"], e["args"].get("state"))
+        for e in tracer.to_chrome_trace()["traceEvents"]
+        if e["ph"] == "X"
+    ]
+
+
+async def test_transition_and_action_spans():
+    """
+    Given a StateMachine with a tracer, then a span is recorded for each
+    transition and each entry and exit action, with the action spans inside
+    the transition span.
+    """
+    tracer = Tracer()
+    uut = StateMachine(states=[StateA, StateB, StateC], tracer=tracer)
+    await uut.start()
+    await uut.transition_to(StateC)
+    assert spans(tracer) == [
+        ("entry", "StateB.entry_b", "StateB"),
+        ("transition", "[*] -> StateB", None),
+        ("exit", "StateB.exit_b", "StateB"),
+        ("exit", "StateA.exit_a", "StateA"),
+        ("transition", "StateB -> StateC", None),
+    ]
+
+    events = tracer.to_chrome_trace()["traceEvents"]
+    transition = events[-1]
+    for action in events[-3:-1]:
+        assert action["ts"] >= transition["ts"]
+        assert action["ts"] + action["dur"] <= transition["ts"] + transition["dur"]
+
+
+async def test_event_and_handler_spans():
+    """
+    Given a StateMachine with a tracer, then a span is recorded for each event
+    and each handler called for it, with the state that was active.
+    """
+    tracer = Tracer()
+    uut = StateMachine(states=[StateA, StateB, StateC])
+    await uut.start()
+    uut.tracer = tracer
+    await uut._process_event("go")
+    assert spans(tracer) == [
+        ("exit", "StateB.exit_b", "StateB"),
+        ("exit", "StateA.exit_a", "StateA"),
+        ("transition", "StateB -> StateC", None),
+        ("handler", "StateB.on_go", "StateB"),
+        ("event", "go", "StateB"),
+    ]
+
+    uut.tracer = None
+    await uut.transition_to(StateB)
+    assert len(tracer) == 5
+
+
+async def test_pool_tracer():
+    """
+    Given a MachinePool with a tracer, then the tracer is attached to the
+    machines added to the pool, which are shown as separate threads.
+    """
+    tracer = Tracer()
+    pool = MachinePool(tracer=tracer)
+    pool.add("a", StateMachine(states=[StateA, StateB, StateC]))
+    pool.add("b", StateMachine(states=[StateA, StateB, StateC]))
+    await pool.start()
+    await pool.queue_event("a", "go")
+    await pool.queue_event("b", "go")
+    await pool.stop()
+    events = tracer.to_chrome_trace()["traceEvents"]
+    assert len([e for e in events if e["ph"] == "M"]) == 2
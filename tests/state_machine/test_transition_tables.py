@@ -0,0 +1,222 @@
+import pytest
+
+from asyncio_state_pattern import (
+    Event,
+    Metrics,
+    State,
+    StateMachine,
+    on_entry,
+    on_event,
+)
+
+outputs = []
+
+
+class Order(Event):
+    def __init__(self, cups: int) -> None:
+        self.cups = cups
+
+
+#               State
+#      /      |         |       \
+#   Idle   Brewing   Serving   Cleaning (flyweight)
+
+
+class Idle(State, initial=True):
+    transitions = {
+        "brew": "Brewing",
+        Order: [
+            ("Cleaning", lambda self, order: order.cups == 0),
+            ("Serving", lambda self, order: order.cups <= 2),
+        ],
+    }
+
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Idle:entry")
+
+    @on_event("brew")
+    def on_brew(self) -> bool:
+        outputs.append("Idle:brew")
+        return False
+
+
+class Brewing(State):
+    transitions = {"done": "Serving"}
+
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Brewing:entry")
+
+
+class Serving(State):
+    @on_entry
+    def entry(self) -> None:
+        outputs.append("Serving:entry")
+
+
+class Cleaning(State, flyweight=True):
+    transitions = {"done": (Idle, lambda self, machine: machine.name == "CoffeeMachine")}
+
+
+class CoffeeMachine(StateMachine):
+    transitions = {(Brewing, "done"): Idle, (Serving, "done"): Idle}
+
+
+def create_machine(machine_class=StateMachine, **kwargs) -> StateMachine:
+    return machine_class(states=[Idle, Brewing, Serving, Cleaning], **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def before_each():
+    outputs.clear()
+
+
+async def test_table_transition():
+    """
+    Given a StateMachine in a state with a `transitions` table
+    When an event in the table is processed
+    Then the state's own handler runs first, and the machine transitions to
+    the destination, consuming the event.
+    """
+    machine = create_machine()
+    await machine.start()
+    outputs.clear()
+
+    consumed = await machine._process_event("brew")
+
+    assert consumed
+    assert outputs == ["Idle:brew", "Brewing:entry"]
+    assert isinstance(machine.state, Brewing)
+    assert not await machine._process_event("brew")
+
+
+async def test_guards_tried_in_order():
+    """
+    Given a state with a list of guarded destinations for a typed event
+    When events are processed that pass the first, second or no guard
+    Then the first destination whose guard passes is entered, or the event
+    is not consumed.
+    """
+    machine = create_machine()
+    await machine.start()
+
+    assert await machine._process_event(Order(0))
+    assert isinstance(machine.state, Cleaning)
+
+    await machine.transition_to(Idle)
+    assert await machine._process_event(Order(2))
+    assert isinstance(machine.state, Serving)
+
+    await machine.transition_to(Idle)
+    assert not await machine._process_event(Order(3))
+    assert isinstance(machine.state, Idle)
+
+
+async def test_flyweight_guard_passed_machine():
+    """
+    Given a flyweight state with a guarded table transition
+    When the event is processed
+    Then the guard is called with the state machine, as handlers are.
+    """
+    machine = create_machine(CoffeeMachine)
+    plain = create_machine()
+    for m in (machine, plain):
+        await m.start()
+        await m.transition_to(Cleaning)
+
+    assert await machine._process_event("done")
+    assert isinstance(machine.state, Idle)
+    assert not await plain._process_event("done")
+
+
+async def test_machine_table():
+    """
+    Given a StateMachine subclass with a `transitions` table
+    When an event in its table is processed in a source state
+    Then the state's own table takes precedence, and otherwise the machine's
+    table entry is taken.
+    """
+    machine = create_machine(CoffeeMachine)
+    await machine.start()
+    await machine.transition_to(Brewing)
+
+    await machine._process_event("done")
+    assert isinstance(machine.state, Serving)
+
+    await machine._process_event("done")
+    assert isinstance(machine.state, Idle)
+
+    plain = create_machine()
+    await plain.start()
+    await plain.transition_to(Serving)
+    assert not await plain._process_event("done")
+
+
+async def test_plan_cached_on_entry():
+    """
+    Given a table entry of a simple state
+    When it is taken
+    Then the transition plan is cached on the entry bound to that state, and
+    reused by later transitions.
+    """
+    machine = create_machine()
+    await machine.start()
+    (*_, (_, entry, _, _)) = machine._event_handlers["brew"]
+
+    await machine._process_event("brew")
+    plan = entry.plans[0]
+    await machine.transition_to(Idle)
+    await machine._process_event("brew")
+
+    assert entry.source is Idle
+    assert plan is not None and entry.plans[0] is plan
+    assert isinstance(machine.state, Brewing)
+
+
+async def test_instrumented_table_transition():
+    """
+    Given a StateMachine with a metrics sink
+    When a table transition is taken
+    Then it is recorded as any other transition.
+    """
+    machine = create_machine(metrics=Metrics())
+    await machine.start()
+
+    await machine._process_event("brew")
+
+    assert machine.metrics.transitions[("StateMachine", "Idle", "Brewing")] == 1
+
+
+def test_unknown_destination():
+    class Lost(State):
+        transitions = {"go": "Nowhere"}
+
+    with pytest.raises(ValueError, match="Lost.transitions\\['go'\\] - state 'Nowhere'"):
+        StateMachine(states=[Lost])
+
+
+def test_invalid_tables():
+    with pytest.raises(ValueError, match="must be a state class or name"):
+
+        class Invalid(State):
+            transitions = {"go": 1}
+
+    with pytest.raises(ValueError, match="must be callable"):
+
+        class Unguarded(State):
+            transitions = {"go": ("Idle", True)}
+
+    async def guard(self) -> bool:
+        return False
+
+    with pytest.raises(ValueError, match="must be a plain function"):
+
+        class AsyncGuarded(State):
+            transitions = {"go": ("Idle", guard)}
+
+    class Keyless(StateMachine):
+        transitions = {"go": Idle}
+
+    with pytest.raises(ValueError, match="keys must be"):
+        Keyless(states=[Idle])
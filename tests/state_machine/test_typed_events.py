@@ -0,0 +1,117 @@
+from asyncio_state_pattern import Event, State, StateMachine, on_event
+
+outputs = []
+
+
+class Brew(Event):
+    __slots__ = ("strength",)
+
+
+class LargeBrew(Brew):
+    pass
+
+
+class Descale(Event):
+    pass
+
+
+#   State
+#    / \
+#   A   C
+#   |
+#   B
+
+
+class StateA(State):
+    @on_event(Brew)
+    async def on_brew(self, event: Brew) -> bool:
+        outputs.append(("A", event.strength))
+        return True
+
+    @on_event(Descale)
+    def on_descale(self, event: Descale) -> bool:
+        outputs.append(("A", "descale"))
+        return True
+
+
+class StateB(StateA):
+    @on_event(Brew)
+    def on_brew(self, event: Brew) -> bool:
+        outputs.append(("B", event.strength))
+        return event.strength > 1
+
+    @on_event("brew")
+    def on_brew_id(self) -> bool:
+        outputs.append(("B", "brew"))
+        return True
+
+
+class StateC(State, flyweight=True):
+    @on_event(Brew)
+    def on_brew(self, machine: StateMachine, event: Brew) -> bool:
+        outputs.append((machine.name, event.strength))
+        return True
+
+
+async def make_uut() -> StateMachine:
+    global outputs
+    outputs = []
+    uut = StateMachine(states=[StateA, StateB, StateC])
+    await uut.start()
+    return uut
+
+
+async def test_typed_event_payload_passed_to_handlers():
+    """
+    Given a queued Event instance, then its handlers are passed the event and
+    unconsumed events bubble to the super state's handlers.
+    """
+    uut = await make_uut()
+    await uut.queue_event(Brew(strength=2))
+    await uut.queue_event(Brew(strength=1))
+    await uut.run_once()
+    await uut.run_once()
+    assert outputs == [("B", 2), ("B", 1), ("A", 1)]
+
+
+async def test_typed_event_handled_by_super_state_only():
+    """
+    Given an Event subclass only handled by a super state, then the super
+    state's handler is called.
+    """
+    uut = await make_uut()
+    assert await uut._process_event(Descale())
+    assert outputs == [("A", "descale")]
+
+
+async def test_typed_events_matched_by_exact_type():
+    """
+    Given an instance of a subclass of a handled Event subclass, or an event
+    id that is not handled, then no handler is called.
+    """
+    uut = await make_uut()
+    assert not await uut._process_event(LargeBrew(strength=2))
+    assert await uut._process_event("brew")
+    assert outputs == [("B", "brew")]
+
+
+async def test_typed_event_flyweight_state():
+    """
+    Given a flyweight state, then its typed event handlers are passed the state
+    machine and the event.
+    """
+    uut = await make_uut()
+    await uut.transition_to(StateC)
+    assert await uut._process_event(Brew(strength=5))
+    assert outputs == [("StateMachine", 5)]
+
+
+async def test_state_process_typed_event():
+    """
+    Given a state instance, when process_event is called with an Event
+    instance, then the state's handler is passed the event.
+    """
+    global outputs
+    outputs = []
+    assert await StateA().process_event(Brew(strength=4))
+    assert outputs == [("A", 4)]
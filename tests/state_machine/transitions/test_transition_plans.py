@@ -0,0 +1,65 @@
+from asyncio_state_pattern import State, StateMachine
+
+#   State
+#    / \
+#   A   C
+#   |   |
+#   B   D
+
+
+class StateA(State):
+    pass
+
+
+class StateB(StateA):
+    pass
+
+
+class StateC(State):
+    pass
+
+
+class StateD(StateC):
+    pass
+
+
+class UnitUnderTest(StateMachine):
+    def __init__(self):
+        super().__init__(states=[StateA, StateB, StateC, StateD])
+
+
+async def test_transition_plan_is_compiled_once():
+    """
+    Given a StateMachine that has transitioned between a pair of states, when
+    the same transition is made again, by the same or another StateMachine of
+    the same class, then the previously compiled transition plan is reused.
+    """
+    uut = UnitUnderTest()
+    await uut.start()
+    await uut.transition_to(StateD)
+    plan = uut._state_tree.transition_plans[(StateB, StateD)]
+
+    await uut.transition_to(StateB)
+    await uut.transition_to(StateD)
+    assert uut._state_tree.transition_plans[(StateB, StateD)] is plan
+
+    other = UnitUnderTest()
+    await other.start()
+    await other.transition_to(StateD)
+    assert other._state_tree.transition_plans[(StateB, StateD)] is plan
+
+
+async def test_transition_plan_resolves_leaf_state():
+    """
+    Given a transition to a composite state, then the compiled plan contains
+    the exit chain, entry chain and the innermost initial sub state.
+    """
+    uut = UnitUnderTest()
+    await uut.start()
+    await uut.transition_to(StateC)
+    plan = uut._state_tree.transition_plans[(StateB, StateC)]
+
+    assert [type(uut._states[i]) for i in plan.exit_indices] == [StateB, StateA]
+    assert [type(uut._states[i]) for i in plan.entry_indices] == [StateC, StateD]
+    assert uut._states[plan.dest_index] is uut.state
+    assert type(uut.state) is StateD
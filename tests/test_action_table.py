@@ -0,0 +1,96 @@
+from asyncio_state_pattern import State, on_entry, on_exit, on_event
+
+
+class LoggingMixin:
+    @on_entry
+    async def log_entry(self) -> None:
+        pass
+
+
+def test_actions_collected_once_per_class():
+    """
+    Tests that a state class's action table is built when the class is
+    created and shared by all of its instances.
+    """
+
+    class StateA(State):
+        @on_entry
+        async def entry(self) -> None:
+            pass
+
+        @on_exit
+        async def exit_(self) -> None:
+            pass
+
+        @on_event("foo")
+        async def on_foo(self) -> None:
+            pass
+
+    table = StateA._action_table
+    assert table.entry_actions == ((StateA.__dict__["entry"], True),)
+    assert table.exit_actions == ((StateA.__dict__["exit_"], True),)
+    assert list(table.event_actions_by_id) == ["foo"]
+    assert StateA()._action_table is StateA()._action_table is table
+
+
+def test_actions_inherited_from_mixins():
+    """
+    Tests that actions declared on non-state mixin classes are included in the
+    action table, and that overriding a mixin action replaces it.
+    """
+
+    class StateA(State, LoggingMixin):
+        pass
+
+    class StateB(State, LoggingMixin):
+        @on_entry
+        async def log_entry(self) -> None:
+            pass
+
+    assert StateA._action_table.entry_actions == ((LoggingMixin.log_entry, True),)
+    assert StateB._action_table.entry_actions == (
+        (StateB.__dict__["log_entry"], True),
+    )
+
+
+def test_super_state_actions_excluded():
+    """
+    Tests that actions declared on a super state, or on the super state's
+    mixins, are not included in a sub state's action table.
+    """
+
+    class StateA(State, LoggingMixin):
+        @on_exit
+        async def exit_(self) -> None:
+            pass
+
+    class StateB(StateA):
+        pass
+
+    assert StateB._action_table.entry_actions == ()
+    assert StateB._action_table.exit_actions == ()
+
+
+def test_sync_actions_detected():
+    """
+    Tests that plain function actions are recorded as not needing to be
+    awaited, and coroutine function actions as needing to be awaited.
+    """
+
+    class StateA(State):
+        @on_entry
+        def entry(self) -> None:
+            pass
+
+        @on_exit
+        async def exit_(self) -> None:
+            pass
+
+        @on_event("foo")
+        def on_foo(self) -> bool:
+            return True
+
+    table = StateA._action_table
+    assert table.entry_actions == ((StateA.__dict__["entry"], False),)
+    assert table.exit_actions == ((StateA.__dict__["exit_"], True),)
+    assert table.event_actions_by_id["foo"] == ((StateA.__dict__["on_foo"], False),)
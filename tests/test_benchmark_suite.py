@@ -0,0 +1,60 @@
+import pytest
+
+from benchmarks.suite import Result, find_regressions, measure_bytes_per_machine
+
+BASELINE = {
+    "dispatch": Result("dispatch", ops_per_sec=1000.0),
+    "construction": Result("construction", ops_per_sec=1000.0, bytes_per_machine=100.0),
+}
+
+
+def test_results_within_threshold_pass():
+    """
+    Given results that are slower or larger than the baseline by less than the
+    threshold, or faster and smaller, then no regressions are found.
+    """
+    results = [
+        Result("dispatch", ops_per_sec=910.0),
+        Result("construction", ops_per_sec=2000.0, bytes_per_machine=109.0),
+    ]
+    assert find_regressions(BASELINE, results, 0.1) == []
+
+
+def test_results_beyond_threshold_regress():
+    """
+    Given results whose throughput fell, or whose memory grew, by more than
+    the threshold, then a regression is found for each metric.
+    """
+    results = [
+        Result("dispatch", ops_per_sec=890.0),
+        Result("construction", ops_per_sec=850.0, bytes_per_machine=111.0),
+    ]
+    regressions = find_regressions(BASELINE, results, 0.1)
+
+    assert [(r.scenario, r.metric) for r in regressions] == [
+        ("dispatch", "ops/sec"),
+        ("construction", "ops/sec"),
+        ("construction", "bytes/machine"),
+    ]
+    assert regressions[0].change == pytest.approx(-0.11)
+    assert str(regressions[2]) == (
+        "construction: bytes/machine regressed by 11.0% (100.0 -> 111.0)"
+    )
+
+
+def test_scenarios_missing_from_baseline_ignored():
+    results = [Result("new", ops_per_sec=1.0, bytes_per_machine=1e9)]
+    assert find_regressions(BASELINE, results, 0.1) == []
+
+
+def test_measure_bytes_per_machine_raises_factory_error():
+    """
+    Given a factory that raises, then its error propagates rather than being
+    hidden by the cleanup.
+    """
+
+    def factory():
+        raise RuntimeError("factory failed")
+
+    with pytest.raises(RuntimeError, match="factory failed"):
+        measure_bytes_per_machine(factory, count=1)
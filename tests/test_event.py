@@ -0,0 +1,51 @@
+import pytest
+
+from asyncio_state_pattern import Event
+
+
+class Ping(Event):
+    pass
+
+
+class Brew(Event):
+    __slots__ = ("strength", "size")
+
+
+class LargeBrew(Brew):
+    __slots__ = ("extra_shot",)
+
+
+def test_event_ids_unique():
+    """
+    Tests that each Event subclass is assigned its own dispatch id.
+    """
+    ids = {Event.event_id, Ping.event_id, Brew.event_id, LargeBrew.event_id}
+    assert len(ids) == 4
+    assert Ping().event_id == Ping.event_id
+
+
+def test_event_payload_from_slots():
+    """
+    Tests that an event's payload fields are set from positional and keyword
+    arguments, in the order of the slots of the class and its bases.
+    """
+    brew = LargeBrew(3, size="large", extra_shot=True)
+    assert (brew.strength, brew.size, brew.extra_shot) == (3, "large", True)
+    assert repr(brew) == "LargeBrew(strength=3, size='large', extra_shot=True)"
+
+
+@pytest.mark.parametrize(
+    "args, kwargs",
+    [
+        ((1, "small", "extra"), {}),
+        ((1,), {"colour": "black"}),
+        ((1,), {}),
+    ],
+)
+def test_event_invalid_arguments(args, kwargs):
+    """
+    Tests that an event cannot be created with too many arguments, unknown
+    fields or missing fields.
+    """
+    with pytest.raises(TypeError):
+        Brew(*args, **kwargs)
@@ -0,0 +1,125 @@
+import threading
+
+import pytest
+
+from asyncio_state_pattern import Event, Journal, read_journal
+from asyncio_state_pattern.journal import MAGIC, VERSION
+
+
+class Brew(Event):
+    __slots__ = ("strength",)
+
+
+async def test_append_and_read(tmp_path):
+    """
+    Tests that appended events are written in the order they were appended,
+    and can be read once flushed.
+    """
+    path = str(tmp_path / "journal")
+    journal = Journal(path, flush_interval=0.001)
+    journal.append("a", "power_on")
+    journal.append("b", Brew(3))
+    journal.append(None, "power_off")
+    await journal.flush()
+
+    entries = list(read_journal(path))
+    assert [key for key, _ in entries] == ["a", "b", None]
+    assert entries[1][1].strength == 3
+    journal.close()
+    assert journal.closed
+    with pytest.raises(ValueError):
+        journal.append("a", "power_on")
+
+
+async def test_batches(tmp_path):
+    """
+    Tests that events appended between writes are written together, and that
+    a full batch is written without waiting for the interval.
+    """
+    path = str(tmp_path / "journal")
+    journal = Journal(path, flush_interval=60, max_batch_size=100)
+    for i in range(100):
+        journal.append(None, i)
+    await journal.flush()
+    journal.close()
+    assert [event for _, event in read_journal(path)] == list(range(100))
+
+
+async def test_events_journaled_as_appended(tmp_path):
+    """
+    Tests that an event changed after it was appended is journaled as it was
+    when appended, and that an event that cannot be pickled is refused without
+    stopping the journal.
+    """
+    path = str(tmp_path / "journal")
+    journal = Journal(path, flush_interval=60)
+    brew = Brew(3)
+    journal.append(None, brew)
+    brew.strength = 5
+    with pytest.raises(TypeError):
+        journal.append(None, threading.Lock())
+    journal.append(None, "b")
+    await journal.flush()
+    journal.close()
+
+    (_, first), second = read_journal(path)
+    assert first.strength == 3
+    assert second == (None, "b")
+
+
+async def test_append_raises_after_failed_write(tmp_path):
+    """
+    Tests that once a write has failed, flush and append raise its error
+    rather than accepting events that would not be written.
+    """
+
+    def fail(batch):
+        raise OSError("disk full")
+
+    journal = Journal(str(tmp_path / "journal"), flush_interval=0.001)
+    journal._write = fail
+    journal.append(None, "a")
+    with pytest.raises(OSError, match="disk full"):
+        await journal.flush()
+    with pytest.raises(OSError, match="disk full"):
+        journal.append(None, "b")
+    journal.close()
+
+
+async def test_close_writes_buffered_events(tmp_path):
+    path = str(tmp_path / "journal")
+    journal = Journal(path, flush_interval=60, fsync=False)
+    journal.append(None, "a")
+    journal.close()
+    assert list(read_journal(path)) == [(None, "a")]
+
+
+async def test_reopen_after_torn_write(tmp_path):
+    """
+    Tests that a frame cut short at the end of a journal is ignored when it
+    is read, and removed when the journal is opened again.
+    """
+    path = str(tmp_path / "journal")
+    journal = Journal(path)
+    journal.append(None, "a")
+    journal.close()
+    with open(path, "ab") as f:
+        f.write(b"\x10\x00\x00\x00partial")
+    assert list(read_journal(path)) == [(None, "a")]
+
+    journal = Journal(path)
+    journal.append(None, "b")
+    journal.close()
+    assert list(read_journal(path)) == [(None, "a"), (None, "b")]
+
+
+def test_invalid_journal(tmp_path):
+    path = tmp_path / "journal"
+    path.write_bytes(b"ASPS\x01")
+    with pytest.raises(ValueError):
+        Journal(str(path))
+    with pytest.raises(ValueError):
+        list(read_journal(str(path)))
+    path.write_bytes(MAGIC + bytes([VERSION + 1]))
+    with pytest.raises(ValueError):
+        Journal(str(path))
@@ -0,0 +1,163 @@
+import asyncio
+
+import pytest
+
+from asyncio_state_pattern.mailbox import Mailbox, PriorityMailbox
+
+
+async def test_fifo_order():
+    """Tests that items are returned in the order they were put."""
+    mailbox = Mailbox()
+    assert mailbox.empty()
+    for i in range(3):
+        mailbox.put_nowait(i)
+    assert len(mailbox) == 3
+    assert [mailbox.get_nowait() for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(asyncio.QueueEmpty):
+        mailbox.get_nowait()
+
+
+async def test_get_waits_for_item():
+    """Tests that get waits until an item is put, and is then woken."""
+    mailbox = Mailbox()
+    task = asyncio.get_running_loop().create_task(mailbox.get())
+    await asyncio.sleep(0)
+    assert not task.done()
+    mailbox.put_nowait("a")
+    assert await task == "a"
+
+
+async def test_put_waits_when_full():
+    """
+    Tests that put_nowait raises QueueFull when the mailbox is full, and that
+    put waits until an item is removed.
+    """
+    mailbox = Mailbox(maxsize=1)
+    mailbox.put_nowait("a")
+    assert mailbox.full()
+    with pytest.raises(asyncio.QueueFull):
+        mailbox.put_nowait("b")
+
+    task = asyncio.get_running_loop().create_task(mailbox.put("b"))
+    await asyncio.sleep(0)
+    assert not task.done()
+    assert mailbox.get_nowait() == "a"
+    await task
+    assert mailbox.get_nowait() == "b"
+
+
+async def test_cancelled_put_wakes_next_producer():
+    """
+    Tests that a producer cancelled while waiting for space does not prevent
+    the next waiting producer from being woken.
+    """
+    mailbox = Mailbox(maxsize=1)
+    mailbox.put_nowait("a")
+    loop = asyncio.get_running_loop()
+    first = loop.create_task(mailbox.put("b"))
+    second = loop.create_task(mailbox.put("c"))
+    await asyncio.sleep(0)
+    first.cancel()
+    mailbox.get_nowait()
+    await second
+    assert mailbox.get_nowait() == "c"
+    assert first.cancelled()
+
+
+async def test_clear():
+    """Tests that clear removes all items."""
+    mailbox = Mailbox()
+    mailbox.put_nowait("a")
+    mailbox.clear()
+    assert mailbox.empty()
+
+
+async def test_priority_order():
+    """
+    Tests that a PriorityMailbox returns items with a higher priority first,
+    and items with the same priority in the order they were put.
+    """
+    mailbox = PriorityMailbox(levels=3)
+    mailbox.put_nowait("low1")
+    mailbox.put_nowait("high1", priority=2)
+    mailbox.put_nowait("mid1", priority=1)
+    mailbox.put_nowait("high2", priority=2)
+    mailbox.put_nowait("low2")
+    assert len(mailbox) == 5
+    assert mailbox.level_size(2) == 2
+    assert [mailbox.get_nowait() for _ in range(5)] == [
+        "high1",
+        "high2",
+        "mid1",
+        "low1",
+        "low2",
+    ]
+    assert mailbox.empty()
+
+
+async def test_invalid_priority():
+    """Tests that putting an item with an unknown priority raises ValueError."""
+    with pytest.raises(ValueError):
+        Mailbox().put_nowait("a", priority=1)
+    with pytest.raises(ValueError):
+        PriorityMailbox(levels=2).put_nowait("a", priority=2)
+    with pytest.raises(ValueError):
+        PriorityMailbox(levels=2).put_nowait("a", priority=-1)
+
+
+async def test_wake():
+    """Tests that wake resumes a waiting consumer without putting an item."""
+    mailbox = Mailbox()
+    task = asyncio.get_running_loop().create_task(mailbox.wait())
+    await asyncio.sleep(0)
+    mailbox.wake()
+    await task
+    assert mailbox.empty()
+
+
+async def test_coalescing():
+    """
+    Tests that an item put with the coalesce key of a pending item replaces
+    that item in place, and that the key can be reused once it is removed.
+    """
+    mailbox = Mailbox()
+    mailbox.put_nowait("status1", coalesce_key="status")
+    mailbox.put_nowait("command")
+    mailbox.put_nowait("status2", coalesce_key="status")
+    assert len(mailbox) == 2
+    assert mailbox.coalesced == 1
+    assert mailbox.get_nowait() == "status2"
+
+    mailbox.put_nowait("status3", coalesce_key="status")
+    assert mailbox.coalesced == 1
+    assert mailbox.get_nowait() == "command"
+    assert mailbox.get_nowait() == "status3"
+
+
+async def test_coalescing_when_full():
+    """
+    Tests that an item replacing a pending item can be put in a full mailbox.
+    """
+    mailbox = PriorityMailbox(levels=2, maxsize=1)
+    mailbox.put_nowait("status1", priority=1, coalesce_key="status")
+    mailbox.put_nowait("status2", coalesce_key="status")
+    await mailbox.put("status3", coalesce_key="status")
+    with pytest.raises(asyncio.QueueFull):
+        mailbox.put_nowait("other", coalesce_key="other")
+    assert mailbox.level_size(1) == 1
+    assert mailbox.get_nowait() == "status3"
+    assert mailbox.coalesced == 2
+
+
+async def test_pending():
+    """
+    Tests that pending returns the queued items in the order they would be
+    got, with their priority and coalesce key.
+    """
+    mailbox = PriorityMailbox(2)
+    mailbox.put_nowait("a")
+    mailbox.put_nowait("b", priority=1, coalesce_key="k")
+    mailbox.put_nowait("c", priority=1, coalesce_key="k")
+    mailbox.put_nowait("d")
+    assert mailbox.pending() == [("c", 1, "k"), ("a", 0, None), ("d", 0, None)]
+    assert Mailbox().pending() == []
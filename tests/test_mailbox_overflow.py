@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+
+from asyncio_state_pattern import OverflowOptions, OverflowPolicy
+from asyncio_state_pattern.mailbox import Mailbox, PriorityMailbox
+
+
+def make_full_mailbox(**kwargs) -> Mailbox:
+    mailbox = Mailbox(maxsize=2, overflow=OverflowOptions(**kwargs))
+    mailbox.put_nowait("a")
+    mailbox.put_nowait("b")
+    return mailbox
+
+
+def drain(mailbox: Mailbox) -> list:
+    return [mailbox.get_nowait() for _ in range(len(mailbox))]
+
+
+async def test_block():
+    """
+    Tests that with the BLOCK policy, put_nowait raises QueueFull and put
+    does not return until space is available.
+    """
+    mailbox = make_full_mailbox(policy=OverflowPolicy.BLOCK)
+    with pytest.raises(asyncio.QueueFull):
+        mailbox.put_nowait("c")
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(mailbox.put("c"), timeout=0.01)
+    assert mailbox.stats.rejected == 1
+
+
+async def test_drop_newest():
+    """Tests that with the DROP_NEWEST policy, new items are discarded."""
+    mailbox = make_full_mailbox(policy=OverflowPolicy.DROP_NEWEST)
+    mailbox.put_nowait("c")
+    await mailbox.put("d", coalesce_key="d")
+    assert drain(mailbox) == ["a", "b"]
+    assert mailbox.stats.dropped == 2
+
+    mailbox.put_nowait("d", coalesce_key="d")
+    assert drain(mailbox) == ["d"]
+
+
+async def test_drop_oldest():
+    """
+    Tests that with the DROP_OLDEST policy, the oldest item with the lowest
+    priority is discarded to make space for new items.
+    """
+    mailbox = PriorityMailbox(
+        levels=2, maxsize=3, overflow=OverflowOptions(OverflowPolicy.DROP_OLDEST)
+    )
+    mailbox.put_nowait("high", priority=1)
+    mailbox.put_nowait("a", coalesce_key="a")
+    mailbox.put_nowait("b")
+    await mailbox.put("c")
+    mailbox.put_nowait("d")
+    assert drain(mailbox) == ["high", "c", "d"]
+    assert mailbox.stats.dropped == 2
+
+    mailbox.put_nowait("a", coalesce_key="a")
+    assert drain(mailbox) == ["a"]
+
+
+async def test_reject():
+    """Tests that with the REJECT policy, put and put_nowait raise QueueFull."""
+    mailbox = make_full_mailbox(policy=OverflowPolicy.REJECT)
+    with pytest.raises(asyncio.QueueFull):
+        mailbox.put_nowait("c")
+    with pytest.raises(asyncio.QueueFull):
+        await mailbox.put("c")
+    assert mailbox.stats.rejected == 2
+    assert drain(mailbox) == ["a", "b"]
+
+
+async def test_spill():
+    """
+    Tests that with the SPILL policy, items put while the mailbox is full are
+    held in the overflow buffer and returned in order, and that items put
+    while the overflow buffer is full are rejected.
+    """
+    mailbox = make_full_mailbox(policy=OverflowPolicy.SPILL, spill_size=2)
+    mailbox.put_nowait("c")
+    await mailbox.put("d")
+    with pytest.raises(asyncio.QueueFull):
+        mailbox.put_nowait("e")
+    assert mailbox.stats.size == 4
+    assert mailbox.stats.spilled == 2
+    assert mailbox.stats.rejected == 1
+    assert [mailbox.get_nowait() for _ in range(4)] == ["a", "b", "c", "d"]
+    assert mailbox.empty()
+
+
+@pytest.mark.parametrize(
+    "policy", [OverflowPolicy.SPILL, OverflowPolicy.DROP_OLDEST]
+)
+def test_invalid_priority_refused_before_overflow(policy):
+    """
+    Tests that an item put with a priority out of range raises ValueError
+    before the overflow policy runs, so it is neither spilled nor allowed to
+    displace a queued item.
+    """
+    options = OverflowOptions(policy, spill_size=1)
+    for mailbox in (
+        make_full_mailbox(policy=policy, spill_size=1),
+        PriorityMailbox(levels=2, maxsize=2, overflow=options),
+    ):
+        if type(mailbox) is PriorityMailbox:
+            mailbox.put_nowait("a")
+            mailbox.put_nowait("b", priority=1)
+        with pytest.raises(ValueError, match="priority"):
+            mailbox.put_nowait("c", priority=7)
+        with pytest.raises(ValueError, match="priority"):
+            mailbox.put_nowait("c", priority=-1, coalesce_key="c")
+        assert mailbox.stats.dropped == mailbox.stats.spilled == 0
+        assert sorted(drain(mailbox)) == ["a", "b"]
+
+
+async def test_watermarks():
+    """
+    Tests that the watermark callback is called with True when the queue
+    grows to the high watermark, and with False when it shrinks to the low
+    watermark.
+    """
+    calls = []
+    owner = object()
+    mailbox = Mailbox(
+        overflow=OverflowOptions(
+            high_watermark=3,
+            low_watermark=1,
+            on_watermark=lambda o, above: calls.append((o, above)),
+        ),
+        owner=owner,
+    )
+    for i in range(4):
+        mailbox.put_nowait(i)
+    assert calls == [(owner, True)]
+    mailbox.get_nowait()
+    mailbox.get_nowait()
+    assert calls == [(owner, True)]
+    mailbox.get_nowait()
+    assert calls == [(owner, True), (owner, False)]
+
+
+def test_invalid_options():
+    """Tests that invalid overflow options raise ValueError."""
+    with pytest.raises(ValueError):
+        OverflowOptions(policy=OverflowPolicy.SPILL)
+    with pytest.raises(ValueError):
+        OverflowOptions(high_watermark=2, low_watermark=2)
+    assert OverflowOptions(high_watermark=10).low_watermark == 5
@@ -0,0 +1,101 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from asyncio_state_pattern import Metrics
+from asyncio_state_pattern.metrics import Histogram
+
+machine = SimpleNamespace(name="CoffeeMaker")
+
+
+def test_histogram_buckets():
+    """
+    Tests that observations are counted in the first bucket whose upper bound
+    is not below them, or in the final bucket if above all bounds.
+    """
+    histogram = Histogram((1, 2, 4))
+    for value in (0.5, 1, 1.5, 4, 5):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.cumulative_counts() == [2, 3, 4, 5]
+    assert histogram.count == 5
+    assert histogram.sum == 12
+
+
+def test_histogram_merge():
+    """
+    Tests that histograms with the same bounds can be merged, and histograms
+    with different bounds cannot.
+    """
+    first, second = Histogram((1, 2)), Histogram((1, 2))
+    first.observe(1)
+    second.observe(3)
+    first.merge(second)
+    assert first.counts == [1, 0, 1]
+    assert first.count == 2
+    with pytest.raises(ValueError):
+        first.merge(Histogram((1,)))
+
+
+def test_metrics_merge():
+    """
+    Tests that merging collectors adds their transition counts and histograms.
+    """
+    first, second = Metrics(), Metrics()
+    first.record_transition(machine, "Idle", "Brewing")
+    second.record_transition(machine, "Idle", "Brewing")
+    second.record_dwell(machine, "Idle", 0.5)
+    first.merge(second)
+    assert first.transitions == {("CoffeeMaker", "Idle", "Brewing"): 2}
+    assert first.dwell[("CoffeeMaker", "Idle")].count == 1
+
+
+def test_to_prometheus():
+    """
+    Tests that measurements are exported in the Prometheus text format, with
+    cumulative bucket counts and escaped label values.
+    """
+    metrics = Metrics(dwell_buckets=(1, 10))
+    metrics.record_transition(machine, "[*]", "Idle")
+    metrics.record_dwell(machine, "Idle", 0.5)
+    metrics.record_dwell(machine, "Idle", 20)
+    metrics.record_event(machine, 'say "hi"', 0.001)
+    text = metrics.to_prometheus()
+    lines = text.splitlines()
+    assert "# TYPE asp_transitions_total counter" in lines
+    assert (
+        'asp_transitions_total{machine="CoffeeMaker",source="[*]",dest="Idle"} 1'
+        in lines
+    )
+    assert "# TYPE asp_state_dwell_seconds histogram" in lines
+    assert (
+        'asp_state_dwell_seconds_bucket{machine="CoffeeMaker",state="Idle",le="1"} 1'
+        in lines
+    )
+    assert (
+        'asp_state_dwell_seconds_bucket{machine="CoffeeMaker",state="Idle",le="10"} 1'
+        in lines
+    )
+    assert (
+        'asp_state_dwell_seconds_bucket{machine="CoffeeMaker",state="Idle",le="+Inf"} 2'
+        in lines
+    )
+    assert 'asp_state_dwell_seconds_sum{machine="CoffeeMaker",state="Idle"} 20.5' in lines
+    assert 'asp_state_dwell_seconds_count{machine="CoffeeMaker",state="Idle"} 2' in lines
+    assert 'event="say \\"hi\\""' in text
+
+
+def test_to_json():
+    """
+    Tests that measurements are exported as JSON.
+    """
+    metrics = Metrics()
+    metrics.record_transition(machine, "Idle", "Brewing")
+    metrics.record_queue_depth(machine, 3)
+    data = json.loads(metrics.to_json())
+    assert data["transitions"] == [
+        {"machine": "CoffeeMaker", "source": "Idle", "dest": "Brewing", "count": 1}
+    ]
+    assert data["queue_depth"][0]["count"] == 1
+    assert data["queue_depth"][0]["sum"] == 3
@@ -0,0 +1,88 @@
+import io
+
+import pytest
+
+from asyncio_state_pattern import (
+    MachinePool,
+    State,
+    StateMachine,
+    on_event,
+    read_snapshots,
+    write_snapshots,
+)
+from asyncio_state_pattern.snapshot import MAGIC
+
+
+class Off(State):
+    @on_event("toggle")
+    async def on_toggle(self) -> bool:
+        await self.context.transition_to(On)
+        return True
+
+
+class On(State):
+    @on_event("toggle")
+    async def on_toggle(self) -> bool:
+        await self.context.transition_to(Off)
+        return True
+
+
+def create_machine(key=None) -> StateMachine:
+    return StateMachine(states=[Off, On])
+
+
+async def test_write_and_read_snapshots():
+    """
+    Tests that snapshots of many machines are written in frames, and read
+    back into new machines created by the factory.
+    """
+    machines = {}
+    for key in range(10):
+        machine = machines[key] = create_machine()
+        await machine.start()
+        if key % 2:
+            await machine.transition_to(On)
+        if key % 3 == 0:
+            machine.post_event("toggle")
+
+    file = io.BytesIO()
+    assert write_snapshots(file, machines.items(), chunk_size=4) == 10
+    file.seek(0)
+    restored = dict(read_snapshots(file, create_machine))
+    assert list(restored) == list(machines)
+    for key, machine in restored.items():
+        assert machine.state.__class__ is (On if key % 2 else Off)
+        assert len(machine._event_queue) == (1 if key % 3 == 0 else 0)
+
+
+async def test_pool_snapshots():
+    """
+    Tests that a pool's machines are restored into a new pool, and that their
+    queued events are processed when the pool is started.
+    """
+    pool = MachinePool()
+    for key in ("a", "b"):
+        pool.add(key, create_machine())
+    await pool.start()
+    await pool.queue_event("b", "toggle")
+    await pool.stop()
+    pool["a"].post_event("toggle")
+
+    file = io.BytesIO()
+    assert pool.write_snapshots(file) == 2
+    file.seek(0)
+    restored = MachinePool()
+    assert restored.restore_snapshots(file, create_machine) == 2
+    await restored.start()
+    await restored.stop()
+    assert restored["a"].state.__class__ is On
+    assert restored["b"].state.__class__ is On
+
+
+def test_read_invalid_streams():
+    with pytest.raises(ValueError):
+        list(read_snapshots(io.BytesIO(b"ASPX\x01"), create_machine))
+    with pytest.raises(ValueError):
+        list(read_snapshots(io.BytesIO(MAGIC + b"\x63"), create_machine))
+    with pytest.raises(ValueError):
+        list(read_snapshots(io.BytesIO(MAGIC + b"\x01\x10\x00"), create_machine))
@@ -0,0 +1,142 @@
+import heapq
+import logging
+from typing import Callable, List, Tuple
+
+import pytest
+
+from asyncio_state_pattern import TimerWheel
+
+
+class FakeHandle:
+    def __init__(self) -> None:
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class FakeLoop:
+    """An event loop clock that only advances when told to."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.wakeups = 0
+        self._handles: List[Tuple[float, int, FakeHandle, Callable]] = []
+
+    def time(self) -> float:
+        return self.now
+
+    def call_at(self, when: float, callback: Callable) -> FakeHandle:
+        handle = FakeHandle()
+        heapq.heappush(self._handles, (when, id(handle), handle, callback))
+        return handle
+
+    @property
+    def pending_handles(self) -> int:
+        return sum(1 for h in self._handles if not h[2].cancelled)
+
+    def advance(self, seconds: float) -> None:
+        end = self.now + seconds
+        while self._handles and self._handles[0][0] <= end:
+            when, _, handle, callback = heapq.heappop(self._handles)
+            if handle.cancelled:
+                continue
+            self.now = max(self.now, when)
+            self.wakeups += 1
+            callback()
+        self.now = end
+
+
+def make_wheel() -> Tuple[TimerWheel, FakeLoop, List]:
+    loop = FakeLoop()
+    return TimerWheel(loop, resolution=1.0), loop, []
+
+
+def test_timers_run_in_order_after_delay():
+    """
+    Tests that timers run once their delay has elapsed, and not before, in
+    order of their deadlines.
+    """
+    wheel, loop, fired = make_wheel()
+    wheel.call_later(5, fired.append, "b")
+    wheel.call_later(2, fired.append, "a")
+    wheel.call_later(70, fired.append, "c")
+    assert len(wheel) == 3
+
+    loop.advance(1.5)
+    assert fired == []
+    loop.advance(0.5)
+    assert fired == ["a"]
+    loop.advance(3)
+    assert fired == ["a", "b"]
+    loop.advance(64)
+    assert fired == ["a", "b"]
+    loop.advance(1)
+    assert fired == ["a", "b", "c"]
+    assert len(wheel) == 0
+    assert loop.pending_handles == 0
+
+
+@pytest.mark.parametrize("delay", [63, 64, 65, 4095, 4096, 300000])
+def test_timers_moved_down_levels(delay):
+    """
+    Tests that timers beyond the range of the lowest level run at their
+    deadline, and that the wheel does not wake up every tick while waiting.
+    """
+    wheel, loop, fired = make_wheel()
+    loop.advance(17)
+    wheel.call_later(delay, fired.append, delay)
+
+    loop.advance(delay - 1)
+    assert fired == []
+    loop.advance(1)
+    assert fired == [delay]
+    assert loop.wakeups <= delay // 64 + 2
+
+
+def test_cancel():
+    """
+    Tests that a cancelled timer does not run, and that the wheel stops waking
+    up once no timers are pending.
+    """
+    wheel, loop, fired = make_wheel()
+    first = wheel.call_later(3, fired.append, "first")
+    second = wheel.call_later(3000, fired.append, "second")
+    first.cancel()
+    first.cancel()
+    assert not first.pending and second.pending
+    assert len(wheel) == 1
+
+    second.cancel()
+    assert len(wheel) == 0
+    loop.advance(4000)
+    assert fired == []
+    assert loop.wakeups <= 1
+    assert loop.pending_handles == 0
+
+
+def test_callback_errors_logged(caplog):
+    """
+    Tests that an error raised by a timer callback is logged and does not
+    prevent other timers due at the same tick from running.
+    """
+    wheel, loop, fired = make_wheel()
+    wheel.call_later(1, lambda: 1 / 0)
+    wheel.call_later(1, fired.append, "ok")
+    with caplog.at_level(logging.ERROR):
+        loop.advance(1)
+    assert fired == ["ok"]
+    assert "Unhandled error in timer callback" in caplog.text
+
+
+def test_timer_scheduled_by_callback():
+    """
+    Tests that a timer scheduled with no delay by a timer callback runs on the
+    next tick.
+    """
+    wheel, loop, fired = make_wheel()
+    wheel.call_later(1, lambda: wheel.call_later(0, fired.append, loop.now))
+    loop.advance(1)
+    assert fired == []
+    loop.advance(1)
+    assert fired == [1.0]
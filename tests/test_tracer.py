@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from asyncio_state_pattern import Tracer
+
+
+def test_chrome_trace_format(tmp_path):
+    """
+    Tests that spans are exported as Chrome trace complete events in
+    microseconds, with a thread name for each machine.
+    """
+    tracer = Tracer(capacity=4)
+    tid = tracer.new_thread_id()
+    tracer.record(tid, "CoffeeMaker", "transition", "[*] -> Idle", None, 1000, 5000)
+    tracer.record(tid, "CoffeeMaker", "entry", "Idle.entry", "Idle", 2000, 3000)
+    path = tmp_path / "trace.json"
+    tracer.write(str(path))
+
+    events = json.loads(path.read_text())["traceEvents"]
+    metadata, transition, entry = events
+    assert metadata["ph"] == "M"
+    assert metadata["tid"] == tid
+    assert metadata["args"]["name"].startswith("CoffeeMaker")
+    assert transition == {
+        "name": "[*] -> Idle",
+        "cat": "transition",
+        "ph": "X",
+        "ts": 1.0,
+        "dur": 4.0,
+        "pid": transition["pid"],
+        "tid": tid,
+        "args": {"machine": "CoffeeMaker"},
+    }
+    assert entry["args"] == {"machine": "CoffeeMaker", "state": "Idle"}
+
+
+def test_oldest_spans_overwritten():
+    """
+    Tests that once the buffer is full, the oldest spans are overwritten and
+    counted as dropped.
+    """
+    tracer = Tracer(capacity=3)
+    for i in range(5):
+        tracer.record(1, "CoffeeMaker", "event", str(i), None, i, i + 1)
+    assert len(tracer) == 3
+    assert tracer.dropped == 2
+    names = [e["name"] for e in tracer.to_chrome_trace()["traceEvents"][1:]]
+    assert names == ["2", "3", "4"]
+
+    tracer.clear()
+    assert len(tracer) == 0
+    assert tracer.to_chrome_trace()["traceEvents"] == []
+
+
+def test_thread_names_of_buffered_spans():
+    """
+    Tests that each thread is named after the machine of its spans, and that
+    threads whose spans have all been overwritten are not named.
+    """
+    tracer = Tracer(capacity=2)
+    first, second = tracer.new_thread_id(), tracer.new_thread_id()
+    assert first != second
+    tracer.record(first, "Grinder", "event", "grind", None, 0, 1)
+    tracer.record(second, "CoffeeMaker", "event", "brew", None, 1, 2)
+    tracer.record(second, "CoffeeMaker", "event", "pour", None, 2, 3)
+
+    metadata, *spans = tracer.to_chrome_trace()["traceEvents"]
+    assert metadata["tid"] == second
+    assert metadata["args"]["name"] == f"CoffeeMaker ({second})"
+    assert [s["args"]["machine"] for s in spans] == ["CoffeeMaker"] * 2
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        Tracer(capacity=0)